@@ -0,0 +1,81 @@
+"""Benchmark chunk section serialization, run with `python benchmarks/bench_chunk_serialization.py` from src/"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../'))
+
+from core import binary_operations
+from dataclass.save import Chunk, ChunkColumn
+
+DURATION = 2.0
+
+def legacy_to_packet_data(chunk: Chunk) -> tuple[bytes, bytes, bytes, bytes, bytes, bytes]:
+    """The per-block encoder that Chunk.to_packet_data used before the bulk serializer"""
+
+    block_types = []
+    block_lights = []
+    sky_lights = []
+    biomes = []
+
+    for y in range(16):
+        for z in range(16):
+            for x in range(16):
+                block_types.append(chunk.get_block_id(x, y, z))
+                block_lights.append(0b100)
+                sky_lights.append(0b1111)
+            biomes.append(1)
+
+    block_type = b""
+    block_light = b""
+    sky_light = b""
+    biome = b""
+    for c in range(len(block_types)):
+        block_type += binary_operations._encode_unsigned_byte(block_types[c])
+        if c % 2 != 0:
+            block_light += binary_operations._encode_nibbles(block_lights[c-1], block_lights[c])
+            sky_light += binary_operations._encode_nibbles(sky_lights[c-1], sky_lights[c])
+        if c % 16 == 0:
+            biome += binary_operations._encode_byte(biomes[int(c/16)])
+
+    return (block_type, bytes(chunk.metadata), block_light, sky_light, b"", biome)
+
+def legacy_serialize(column: ChunkColumn) -> bytes:
+    block_type = block_metadata = block_light = sky_light = add = biome = b""
+    for c in range(16):
+        if c in column.chunks:
+            chunk_data = legacy_to_packet_data(column.chunks[c])
+            block_type += chunk_data[0]
+            block_metadata += chunk_data[1]
+            block_light += chunk_data[2]
+            sky_light += chunk_data[3]
+            add += chunk_data[4]
+            biome += chunk_data[5]
+    return block_type + block_metadata + block_light + sky_light + add + biome
+
+def bench(name: str, func, column: ChunkColumn) -> float:
+    sections = len(column.chunks)
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        func(column)
+        count += 1
+    elapsed = time.perf_counter() - start
+    rate = count * sections / elapsed
+    print(f"{name:>8}: {rate:12.1f} sections/s ({count} columns in {elapsed:.2f}s)")
+    return rate
+
+def run():
+    column = ChunkColumn()
+    for y in range(64):
+        for z in range(16):
+            for x in range(16):
+                column.set_block_id(x, y, z, (x + y + z) % 50 + 1, y & 15)
+
+    before = bench("before", legacy_serialize, column)
+    after = bench("after", lambda col: col.serialize(), column)
+    print(f"speedup: {after / before:.0f}x")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,104 @@
+"""Benchmark packet encoding and decoding, run with `python benchmarks/bench_packets.py` from src/"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '../'))
+
+from core import binary_operations
+from dataclass.position import Position
+from dataclass.rotation import Rotation
+from network import client_packets, server_packets
+from network.readable_buffer import ReadableBuffer
+
+DURATION = 1.0
+
+# the hand-written encoders and decoders that the packet classes used before their field schemas
+
+def legacy_encode_position_and_look(packet: server_packets.PlayerPositionAndLook) -> bytes:
+    return (binary_operations._encode_varint(0x08) +
+            binary_operations._encode_double(packet.position.x) +
+            binary_operations._encode_double(packet.position.y) +
+            binary_operations._encode_double(packet.position.z) +
+            binary_operations._encode_float(packet.look.yaw) +
+            binary_operations._encode_float(packet.look.pitch) +
+            binary_operations._encode_boolean(packet.on_ground))
+
+def legacy_encode_block_change(packet: server_packets.BlockChange) -> bytes:
+    return (binary_operations._encode_varint(0x23) +
+            binary_operations._encode_int(packet.position.x) +
+            binary_operations._encode_unsigned_byte(packet.position.y) +
+            binary_operations._encode_int(packet.position.z) +
+            binary_operations._encode_varint(packet.block_id) +
+            binary_operations._encode_unsigned_byte(packet.metadata))
+
+def legacy_encode_player_list_item(packet: server_packets.PlayerListItem) -> bytes:
+    return (binary_operations._encode_varint(0x38) +
+            binary_operations._encode_string(packet.player_name) +
+            binary_operations._encode_boolean(packet.online) +
+            binary_operations._encode_short(packet.ping))
+
+def legacy_decode_position_and_look(packet: client_packets.PlayerPositionAndLook) -> None:
+    packet.x = binary_operations._decode_double(packet.stream)
+    packet.feety = binary_operations._decode_double(packet.stream)
+    packet.heady = binary_operations._decode_double(packet.stream)
+    packet.z = binary_operations._decode_double(packet.stream)
+    packet.yaw = binary_operations._decode_float(packet.stream)
+    packet.pitch = binary_operations._decode_float(packet.stream)
+    packet.on_ground = binary_operations._decode_boolean(packet.stream)
+
+def legacy_decode_digging(packet: client_packets.PlayerDigging) -> None:
+    packet.status = binary_operations._decode_byte(packet.stream)
+    packet.x = binary_operations._decode_int(packet.stream)
+    packet.y = binary_operations._decode_unsigned_byte(packet.stream)
+    packet.z = binary_operations._decode_int(packet.stream)
+    packet.face = binary_operations._decode_byte(packet.stream)
+
+def bench(func) -> float:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        for _ in range(1000):
+            func()
+        count += 1000
+    return count / (time.perf_counter() - start)
+
+def compare(name: str, before, after) -> None:
+    before_rate = bench(before)
+    after_rate = bench(after)
+    print(f"{name:>24}: {before_rate:12.0f} -> {after_rate:12.0f} packets/s ({after_rate / before_rate:.1f}x)")
+
+def run():
+    position_and_look = server_packets.PlayerPositionAndLook(Position(10.5, 64.0, -3.25), Rotation(90.0, 12.5), True)
+    block_change = server_packets.BlockChange(Position(10, 64, -3), 0, 0)
+    player_list_item = server_packets.PlayerListItem("Steve", True, 0)
+    assert legacy_encode_position_and_look(position_and_look) == position_and_look.encode()
+    assert legacy_encode_block_change(block_change) == block_change.encode()
+    assert legacy_encode_player_list_item(player_list_item) == player_list_item.encode()
+
+    print("encoding")
+    compare("PlayerPositionAndLook", lambda: legacy_encode_position_and_look(position_and_look), position_and_look.encode)
+    compare("BlockChange", lambda: legacy_encode_block_change(block_change), block_change.encode)
+    compare("PlayerListItem", lambda: legacy_encode_player_list_item(player_list_item), player_list_item.encode)
+
+    # the client sends its feet and head y
+    look_data = (binary_operations._encode_double(10.5) + binary_operations._encode_double(64.0) + binary_operations._encode_double(65.62)
+                 + binary_operations._encode_double(-3.25) + binary_operations._encode_float(90.0) + binary_operations._encode_float(12.5)
+                 + binary_operations._encode_boolean(True))
+    digging_data = bytes([2]) + binary_operations._encode_int(10) + bytes([64]) + binary_operations._encode_int(-3) + bytes([1])
+
+    def decode(packet_class, data, load):
+        def func():
+            packet = packet_class(data=data, stream=ReadableBuffer(data))
+            load(packet)
+        return func
+
+    print("decoding")
+    compare("PlayerPositionAndLook", decode(client_packets.PlayerPositionAndLook, look_data, legacy_decode_position_and_look),
+            decode(client_packets.PlayerPositionAndLook, look_data, client_packets.PlayerPositionAndLook.load))
+    compare("PlayerDigging", decode(client_packets.PlayerDigging, digging_data, legacy_decode_digging),
+            decode(client_packets.PlayerDigging, digging_data, client_packets.PlayerDigging.load))
+
+if __name__ == '__main__':
+    run()
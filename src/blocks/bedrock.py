@@ -0,0 +1,4 @@
+from blocks.block import Block
+
+class Bedrock(Block):
+    block_id = 7
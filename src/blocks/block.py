@@ -1,2 +1,21 @@
 class Block():
+    """A block type with its metadata
+
+    Blocks are immutable and shared by every position they are at, get them from
+    block_registry.get() instead of creating new ones. Equal blocks are the same object.
+    """
+
     block_id = -1
+    metadata = 0
+
+    def __init__(self, metadata: int = 0) -> None:
+        if metadata:
+            object.__setattr__(self, "metadata", metadata)
+
+    def __setattr__(self, name: str, value) -> None:
+        if name in ("block_id", "metadata"):
+            raise AttributeError(f"{type(self).__name__} is immutable")
+        super().__setattr__(name, value)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.block_id}:{self.metadata})"
@@ -0,0 +1,69 @@
+"""The block types by their id, and one shared block object for every (block id, metadata) pair"""
+
+import threading
+
+from blocks.air import Air
+from blocks.bedrock import Bedrock
+from blocks.block import Block
+from blocks.dirt import Dirt
+from blocks.grass import Grass
+from blocks.log import Log
+from blocks.sand import Sand
+from blocks.stone import Stone
+from blocks.tnt import TNT
+from blocks.water import Water
+
+# chunks store block ids as bytes and metadata as nibbles
+MAX_BLOCK_ID = 255
+MAX_METADATA = 15
+
+_types: dict[int, type[Block]] = {}
+_unknown_types: dict[int, type[Block]] = {}
+# indexed by (block_id << 4) | metadata, filled on first use
+_blocks: list[Block | None] = [None] * ((MAX_BLOCK_ID + 1) << 4)
+_lock = threading.Lock()
+
+def register(block_type: type[Block]) -> None:
+    """Add a block type, its block id must not be registered yet"""
+
+    if not 0 <= block_type.block_id <= MAX_BLOCK_ID:
+        raise ValueError(f"Invalid block id {block_type.block_id} of {block_type.__name__}")
+    with _lock:
+        if block_type.block_id in _types:
+            raise ValueError(f"Block id {block_type.block_id} is already registered to {_types[block_type.block_id].__name__}")
+        _types[block_type.block_id] = block_type
+        # drop placeholder blocks created before the type was known
+        for key in range(block_type.block_id << 4, (block_type.block_id + 1) << 4):
+            _blocks[key] = None
+
+def get(block_id: int, metadata: int = 0) -> Block:
+    """Return the shared block object for the given block id and metadata"""
+
+    if block_id & ~MAX_BLOCK_ID or metadata & ~MAX_METADATA:
+        raise ValueError(f"Invalid block {block_id}:{metadata}")
+    block_obj = _blocks[(block_id << 4) | metadata]
+    if block_obj is None:
+        with _lock:
+            key = (block_id << 4) | metadata
+            if _blocks[key] is None:
+                _blocks[key] = block_type(block_id)(metadata)
+            block_obj = _blocks[key]
+    return block_obj
+
+def block_type(block_id: int) -> type[Block]:
+    """Return the type registered for the block id, or a plain type for block ids without their own class yet"""
+
+    block_cls = _types.get(block_id)
+    if block_cls is None:
+        block_cls = _unknown_types.get(block_id)
+        if block_cls is None:
+            block_cls = _unknown_types[block_id] = type(f"Block{block_id}", (Block,), {"block_id": block_id})
+    return block_cls
+
+def is_registered(block_id: int) -> bool:
+    return block_id in _types
+
+for _block_type in (Air, Stone, Grass, Dirt, Bedrock, Water, Sand, Log, TNT):
+    register(_block_type)
+
+AIR = get(Air.block_id)
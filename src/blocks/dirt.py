@@ -0,0 +1,4 @@
+from blocks.block import Block
+
+class Dirt(Block):
+    block_id = 3
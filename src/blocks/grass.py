@@ -0,0 +1,4 @@
+from blocks.block import Block
+
+class Grass(Block):
+    block_id = 2
@@ -0,0 +1,4 @@
+from blocks.block import Block
+
+class Sand(Block):
+    block_id = 12
@@ -0,0 +1,4 @@
+from blocks.block import Block
+
+class Stone(Block):
+    block_id = 1
@@ -0,0 +1,4 @@
+from blocks.block import Block
+
+class Water(Block):
+    block_id = 9
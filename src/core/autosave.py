@@ -0,0 +1,166 @@
+"""Periodically saves the modified chunk columns in the background"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable
+
+from core import tick_timer
+from dataclass.save import World
+from database import region_db_manager
+
+class AutoSaver():
+    """Writes the dirty columns of a world to the region files every interval_ticks ticks
+
+    The tick thread only copies the dirty columns, compressing and writing them happens on a
+    single background thread, so saves are written in the order they were taken.
+    """
+
+    def __init__(self, world: World, interval_ticks: int) -> None:
+        self.world = world
+        self.interval_ticks = interval_ticks
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="autosave")
+        self._last_save: Future | None = None
+        self._event_id = None
+        self._lock = threading.Lock()
+        # columns whose write failed, re-added to the dirty set on the next save
+        self._failed: list[tuple[int, int]] = []
+        # number of unfinished writes of each column
+        self._pending: dict[tuple[int, int], int] = {}
+
+        # metrics
+        self.saves = 0
+        self.saved_columns = 0
+        self.failed_saves = 0
+        self.last_dirty_count = 0
+        self.last_snapshot_ms = 0.0
+        self.last_write_ms = 0.0
+
+    def start(self) -> None:
+        """Start saving periodically"""
+
+        self._event_id = tick_timer.add_event(self.interval_ticks, self.save_dirty, self.interval_ticks)
+
+    def stop(self) -> None:
+        if self._event_id is not None:
+            tick_timer.remove_event(self._event_id)
+            self._event_id = None
+
+    def save_dirty(self) -> Future:
+        """Copy all dirty columns and hand them to the writer thread, return the future of the write"""
+
+        self._requeue_failed()
+        dirty = self.world.dirty_columns
+        self.world.dirty_columns = set()
+        return self._save(dirty)
+
+    def save_columns(self, columns: Iterable[tuple[int, int]]) -> Future:
+        """Save only the given columns if they are dirty, e.g. before they are unloaded
+
+        The future's result is False if the write failed.
+        """
+
+        self._requeue_failed()
+        dirty = self.world.dirty_columns.intersection(columns)
+        self.world.dirty_columns.difference_update(dirty)
+        return self._save(dirty)
+
+    def flush(self) -> None:
+        """Save all dirty columns and wait until everything is written"""
+
+        self.save_dirty().result()
+
+    def shutdown(self) -> None:
+        """Stop saving periodically and write all dirty columns on the calling thread
+
+        At interpreter exit, concurrent.futures shuts the writer down before atexit handlers run,
+        so the final save can't be handed to it.
+        """
+
+        self.stop()
+        # let the writes that were already handed over finish first, so they can't overwrite the final save
+        self._writer.shutdown()
+        self._requeue_failed()
+        dirty = self.world.dirty_columns
+        self.world.dirty_columns = set()
+        self._write(self._snapshot(dirty))
+        self._requeue_failed()
+
+    def pending_columns(self) -> set[tuple[int, int]]:
+        """Return the columns that aren't dirty anymore but whose write didn't finish or failed
+
+        They mustn't be unloaded yet, the region files don't have their latest state.
+        """
+
+        with self._lock:
+            return set(self._pending).union(self._failed)
+
+    def stats(self) -> dict:
+        return {
+            "saves": self.saves,
+            "saved_columns": self.saved_columns,
+            "failed_saves": self.failed_saves,
+            "dirty_columns": len(self.world.dirty_columns),
+            "last_dirty_count": self.last_dirty_count,
+            "last_snapshot_ms": self.last_snapshot_ms,
+            "last_write_ms": self.last_write_ms
+        }
+
+    def _requeue_failed(self) -> None:
+        with self._lock:
+            self.world.dirty_columns.update(self._failed)
+            self._failed.clear()
+
+    def _save(self, columns: Iterable[tuple[int, int]]) -> Future:
+        self._last_save = self._writer.submit(self._write, self._snapshot(columns))
+        return self._last_save
+
+    def _snapshot(self, columns: Iterable[tuple[int, int]]) -> list[tuple[int, int, tuple[bytes, int]]]:
+        start_time = time.perf_counter()
+
+        snapshot = []
+        for chunk_x, chunk_z in columns:
+            column = self.world.get_column(chunk_x, chunk_z)
+            if column is not None:
+                snapshot.append((chunk_x, chunk_z, column.serialize()))
+
+        with self._lock:
+            for chunk_x, chunk_z, _ in snapshot:
+                self._pending[(chunk_x, chunk_z)] = self._pending.get((chunk_x, chunk_z), 0) + 1
+        self.last_dirty_count = len(snapshot)
+        self.last_snapshot_ms = (time.perf_counter() - start_time) * 1000
+        return snapshot
+
+    def _write(self, snapshot: list[tuple[int, int, tuple[bytes, int]]]) -> bool:
+        """Compress and write a snapshot, runs on the writer thread except for the final save"""
+
+        if not snapshot:
+            return True
+
+        start_time = time.perf_counter()
+        try:
+            region_db_manager.save_columns([(chunk_x, chunk_z, region_db_manager.encode_data(*data)) for chunk_x, chunk_z, data in snapshot])
+        except Exception:
+            logging.exception(f"Autosave of {len(snapshot)} columns failed")
+            self.failed_saves += 1
+            self._finish_write(snapshot, failed=True)
+            return False
+        self._finish_write(snapshot, failed=False)
+
+        self.last_write_ms = (time.perf_counter() - start_time) * 1000
+        self.saves += 1
+        self.saved_columns += len(snapshot)
+        logging.debug(f"Autosaved {len(snapshot)} columns in {self.last_write_ms:.1f} ms")
+        return True
+
+    def _finish_write(self, snapshot: list[tuple[int, int, tuple[bytes, int]]], failed: bool) -> None:
+        with self._lock:
+            for chunk_x, chunk_z, _ in snapshot:
+                coords = (chunk_x, chunk_z)
+                if self._pending[coords] == 1:
+                    del self._pending[coords]
+                else:
+                    self._pending[coords] -= 1
+                if failed:
+                    self._failed.append(coords)
@@ -1,4 +1,22 @@
 import struct
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from network.readable_buffer import ReadableBuffer
+
+# precompiled structs for the fixed-width types
+_UNSIGNED_SHORT = struct.Struct(">H")
+_SHORT = struct.Struct(">h")
+_INT = struct.Struct(">i")
+_LONG = struct.Struct(">q")
+_FLOAT = struct.Struct(">f")
+_DOUBLE = struct.Struct(">d")
+_BOOLEAN = struct.Struct(">?")
+_UNSIGNED_BYTE = struct.Struct(">B")
+_BYTE = struct.Struct(">b")
+
+# a 32 bit VarInt takes at most 5 bytes
+MAX_VARINT_LENGTH = 5
 
 def bools_to_binary(vals: list[bool]) -> bytes:
     inp = [True, True, True, False, False, True, False, False, False, True]
@@ -21,13 +39,14 @@ def _encode_varint(val):
     total += struct.pack('B', bits)
     return total
 
-def _decode_varint(socket_conn):
+def _decode_varint(stream: "ReadableBuffer") -> int:
     total = 0
     shift = 0
     val = 0x80
     while val & 0x80:
-        raw = socket_conn.recv(1)
-        val = struct.unpack('B', raw)[0]
+        if shift >= 7 * MAX_VARINT_LENGTH:
+            raise ValueError("VarInt is too long")
+        val = stream.read_byte()
         total |= ((val & 0x7F) << shift)
         shift += 7
         if total & (1 << 31):
@@ -39,81 +58,70 @@ def _encode_string(value) -> bytes:
     # noinspection PyArgumentList
     return _encode_varint(len(data)) + data
 
-def _decode_string(socket_conn) -> str:
-    varint = _decode_varint(socket_conn)
-    b = socket_conn.recv(varint)
-    return b.decode(encoding='UTF-8')
+def _decode_string(stream: "ReadableBuffer") -> str:
+    varint = _decode_varint(stream)
+    return str(stream.recv(varint), encoding='UTF-8')
 
 def _encode_unsigned_short(value) -> bytes:
-    return struct.pack('>H', value)
+    return _UNSIGNED_SHORT.pack(value)
 
-def _decode_unsigned_short(socket_conn) -> int:
-    raw_bytes = socket_conn.recv(2)
-    return struct.unpack('>H', raw_bytes)[0]
+def _decode_unsigned_short(stream: "ReadableBuffer") -> int:
+    return stream.unpack(_UNSIGNED_SHORT)[0]
 
 def _encode_short(value) -> bytes:
-    return struct.pack('>h', value)
+    return _SHORT.pack(value)
 
-def _decode_short(socket_conn) -> int:
-    raw_bytes = socket_conn.recv(2)
-    return struct.unpack('>h', raw_bytes)[0]
+def _decode_short(stream: "ReadableBuffer") -> int:
+    return stream.unpack(_SHORT)[0]
 
 def _encode_int(value) -> bytes:
-    return struct.pack('>i', value)
+    return _INT.pack(value)
 
-def _decode_int(socket_conn) -> int:
-    raw_bytes = socket_conn.recv(4)
-    return struct.unpack('>i', raw_bytes)[0]
+def _decode_int(stream: "ReadableBuffer") -> int:
+    return stream.unpack(_INT)[0]
 
 def _encode_long(value) -> bytes:
-    return struct.pack('>q', value)
+    return _LONG.pack(value)
 
-def _decode_long(socket_conn) -> int:
-    raw_bytes = socket_conn.recv(8)
-    return struct.unpack('>q', raw_bytes)[0]
+def _decode_long(stream: "ReadableBuffer") -> int:
+    return stream.unpack(_LONG)[0]
 
 def _encode_float(value) -> bytes:
-    return struct.pack('>f', value)
+    return _FLOAT.pack(value)
 
-def _decode_float(socket_conn):
-    raw_bytes = socket_conn.recv(4)
-    return struct.unpack('>f', raw_bytes)[0]
+def _decode_float(stream: "ReadableBuffer"):
+    return stream.unpack(_FLOAT)[0]
 
 def _encode_double(value) -> bytes:
-    return struct.pack('>d', value)
+    return _DOUBLE.pack(value)
 
-def _decode_double(socket_conn):
-    raw_bytes = socket_conn.recv(8)
-    return struct.unpack('>d', raw_bytes)[0]
+def _decode_double(stream: "ReadableBuffer"):
+    return stream.unpack(_DOUBLE)[0]
 
 def _encode_boolean(value) -> bytes:
-    return struct.pack('>?', value)
+    return _BOOLEAN.pack(value)
 
-def _decode_boolean(socket_conn) -> bool:
-    raw_bytes = socket_conn.recv(1)
-    return struct.unpack('>?', raw_bytes)[0]
+def _decode_boolean(stream: "ReadableBuffer") -> bool:
+    return stream.unpack(_BOOLEAN)[0]
 
 def _encode_unsigned_byte(value) -> bytes:
-    return struct.pack('>B', value)
+    return _UNSIGNED_BYTE.pack(value)
 
-def _decode_unsigned_byte(socket_conn) -> int:
-    raw_bytes = socket_conn.recv(1)
-    return struct.unpack('>B', raw_bytes)[0]
+def _decode_unsigned_byte(stream: "ReadableBuffer") -> int:
+    return stream.unpack(_UNSIGNED_BYTE)[0]
 
 def _encode_byte(value) -> bytes:
-    return struct.pack('>b', value)
+    return _BYTE.pack(value)
 
-def _decode_byte(socket_conn) -> int:
-    raw_bytes = socket_conn.recv(1)
-    return struct.unpack('>b', raw_bytes)[0]
+def _decode_byte(stream: "ReadableBuffer") -> int:
+    return stream.unpack(_BYTE)[0]
 
 def _encode_nibbles(a, b) -> bytes:
     return ((a << 4) + b).to_bytes(1, byteorder='big')
 
-def _decode_nibbles(socket_conn) -> tuple[int, int]:
-    raw_bytes = socket_conn.recv(1)
-    a = int.from_bytes(raw_bytes, byteorder="big") >> 4
-    return (a, int.from_bytes(raw_bytes, byteorder="big") - (a << 4))
+def _decode_nibbles(stream: "ReadableBuffer") -> tuple[int, int]:
+    value = stream.read_byte()
+    return (value >> 4, value & 0x0F)
 
 def _encode_bytearray(value: list[bytes]) -> tuple[int, bytes]:
     x = b""
@@ -121,16 +129,15 @@ def _encode_bytearray(value: list[bytes]) -> tuple[int, bytes]:
         x += y
     return (len(value), x)
 
-def _decode_bytearray(socket_conn, length: int) -> list[bytes]:
-    x = []
-    for _ in range(length):
-        x.append(socket_conn.recv(1))
-    return x
+def _decode_bytearray(stream: "ReadableBuffer", length: int) -> memoryview:
+    """Return a view of the next length bytes"""
+
+    return stream.recv(length)
 
 def _encode_metakey(key, typ) -> bytes:
-    return ((key << 5) + typ).to_bytes(1, byteorder='big')
+    # the type is in the upper 3 bits, the key in the lower 5 bits
+    return ((typ << 5) | (key & 0x1F)).to_bytes(1, byteorder='big')
 
-def _decode_metakey(socket_conn) -> tuple[int, int]:
-    raw_bytes = socket_conn.recv(1)
-    a = int.from_bytes(raw_bytes, byteorder="big") >> 3
-    return (a, int.from_bytes(raw_bytes, byteorder="big") - (a << 3))
+def _decode_metakey(stream: "ReadableBuffer") -> tuple[int, int]:
+    value = stream.read_byte()
+    return (value & 0x1F, value >> 5)
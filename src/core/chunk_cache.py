@@ -0,0 +1,146 @@
+"""Shared cache for compressed chunk column data"""
+
+from __future__ import annotations
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dataclass.save import ChunkColumn
+from core import binary_operations
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_ZLIB_HEADER = b"\x78\x9c"
+_FINAL_BLOCK = b"\x03\x00" # empty, final deflate block
+_ADLER_BASE = 65521
+
+@dataclass(frozen=True)
+class CompressedColumn():
+    """A chunk column compressed into a byte-aligned raw deflate segment
+
+    Segments don't reference each other, so any number of them can be joined into one zlib stream.
+    """
+
+    chunk_x: int
+    chunk_z: int
+    segment: bytes
+    adler: int
+    raw_len: int
+    metadata: bytes
+
+    @property
+    def size(self) -> int:
+        return len(self.segment) + len(self.metadata)
+
+def compress_column(chunk_x: int, chunk_z: int, column: "ChunkColumn") -> CompressedColumn:
+    """Serialize and compress a chunk column"""
+
+    return compress_data(chunk_x, chunk_z, *column.serialize())
+
+def compress_data(chunk_x: int, chunk_z: int, data: bytes, primary_bitmap: int) -> CompressedColumn:
+    """Compress the output of ChunkColumn.serialize()"""
+
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+    segment = compressor.compress(data) + compressor.flush(zlib.Z_FULL_FLUSH)
+
+    metadata = binary_operations._encode_int(chunk_x)
+    metadata += binary_operations._encode_int(chunk_z)
+    metadata += binary_operations._encode_unsigned_short(primary_bitmap) # primary bitmap, 1 sends chunk
+    metadata += binary_operations._encode_unsigned_short(0b0000000000000000) # add bitmap, all empty
+    return CompressedColumn(chunk_x, chunk_z, segment, zlib.adler32(data), len(data), metadata)
+
+def build_bulk_payload(columns: list[CompressedColumn]) -> tuple[int, int, bool, bytes, bytes]:
+    """Return the MapChunkBulk arguments for the given columns, without compressing anything again"""
+
+    adler = 1
+    for column in columns:
+        adler = _adler32_combine(adler, column.adler, column.raw_len)
+
+    data = b"".join([_ZLIB_HEADER, *(column.segment for column in columns), _FINAL_BLOCK, adler.to_bytes(4, byteorder="big")])
+    metadata = b"".join([column.metadata for column in columns])
+    return (len(columns), len(data), True, data, metadata)
+
+def _adler32_combine(adler1: int, adler2: int, len2: int) -> int:
+    """Return the adler32 of two concatenated byte strings, given their separate checksums"""
+
+    rem = len2 % _ADLER_BASE
+    sum1 = adler1 & 0xFFFF
+    sum2 = (rem * sum1) % _ADLER_BASE
+    sum1 = (sum1 + (adler2 & 0xFFFF) + _ADLER_BASE - 1) % _ADLER_BASE
+    sum2 = (sum2 + ((adler1 >> 16) & 0xFFFF) + ((adler2 >> 16) & 0xFFFF) + _ADLER_BASE - rem) % _ADLER_BASE
+    return (sum2 << 16) | sum1
+
+class ChunkPacketCache():
+    """A memory-bounded LRU cache of compressed chunk columns, shared by all players"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple[int, int], CompressedColumn] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chunk_x: int, chunk_z: int) -> CompressedColumn | None:
+        """Return the cached column and mark it as recently used, or None"""
+
+        with self._lock:
+            entry = self._entries.get((chunk_x, chunk_z))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((chunk_x, chunk_z))
+            self.hits += 1
+            return entry
+
+    def put(self, entry: CompressedColumn) -> None:
+        """Add a column, evicting the least recently used ones if the cache is full"""
+
+        with self._lock:
+            old_entry = self._entries.pop((entry.chunk_x, entry.chunk_z), None)
+            if old_entry is not None:
+                self.size -= old_entry.size
+            if entry.size > self.max_bytes:
+                return
+
+            self._entries[(entry.chunk_x, entry.chunk_z)] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+                self.evictions += 1
+
+    def invalidate(self, chunk_x: int, chunk_z: int) -> None:
+        """Drop the cached data of a column that was modified"""
+
+        with self._lock:
+            entry = self._entries.pop((chunk_x, chunk_z), None)
+            if entry is not None:
+                self.size -= entry.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        """Return the cache counters"""
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size": self.size,
+                "max_size": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,136 @@
+"""Streams the chunk columns around a player to its client"""
+
+from __future__ import annotations
+import logging
+import zlib
+from collections import deque
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    from network.protocol import MinecraftProtocol
+from core.chunk_cache import CompressedColumn, build_bulk_payload
+from network import server_packets
+
+MAX_COLUMNS_PER_PACKET = 16
+MAX_BYTES_PER_PACKET = 1024 * 1024
+# columns that may be requested from the column source at once, per player
+MAX_COLUMNS_IN_FLIGHT = 32
+# times a column that failed to load is requested again, until the queue is rebuilt
+MAX_COLUMN_RETRIES = 3
+
+_EMPTY_COLUMN_DATA = zlib.compress(b"")
+
+@lru_cache(maxsize=None)
+def _spiral_offsets(radius: int) -> tuple[tuple[int, int], ...]:
+    """Return all column offsets within the given radius, nearest first"""
+
+    offsets = [(dx, dz) for dx in range(-radius, radius + 1) for dz in range(-radius, radius + 1)]
+    offsets.sort(key=lambda offset: (max(abs(offset[0]), abs(offset[1])), offset[0] ** 2 + offset[1] ** 2))
+    return tuple(offsets)
+
+class ColumnSource(Protocol):
+    """Anything that hands out compressed columns as futures, e.g. World or ChunkWorkerPool"""
+
+    def request_column(self, chunk_x: int, chunk_z: int) -> Future:
+        ...
+
+class ChunkStreamer():
+    """Keeps a nearest-first queue of the columns a player still needs and sends them in batches"""
+
+    def __init__(self) -> None:
+        self.loaded: set[tuple[int, int]] = set()
+        self._queue: deque[tuple[int, int]] = deque()
+        self._in_flight: dict[tuple[int, int], Future] = {}
+        self._failures: dict[tuple[int, int], int] = {}
+        self._center: tuple[int, int] | None = None
+        self._view_dist: int | None = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue) + len(self._in_flight)
+
+    @property
+    def viewed(self) -> set[tuple[int, int]]:
+        """The columns that were sent to the client or are requested for it"""
+
+        return self.loaded.union(self._in_flight)
+
+    def update(self, center_x: int, center_z: int, view_dist: int, mcprot: "MinecraftProtocol") -> None:
+        """Rebuild the queue if the player entered another column or changed its view distance"""
+
+        if self._center == (center_x, center_z) and self._view_dist == view_dist:
+            return
+        self._center = (center_x, center_z)
+        self._view_dist = view_dist
+
+        # unload columns that are out of range, one column of slack avoids resending on the border
+        for chunk_x, chunk_z in list(self.loaded):
+            if max(abs(chunk_x - center_x), abs(chunk_z - center_z)) > view_dist + 1:
+                self.loaded.discard((chunk_x, chunk_z))
+                mcprot.write_packet(server_packets.ChunkData(chunk_x, chunk_z, True, 0, 0, _EMPTY_COLUMN_DATA))
+
+        # forget requests for columns that are out of range now, their futures still complete on their own
+        for coords in list(self._in_flight):
+            if max(abs(coords[0] - center_x), abs(coords[1] - center_z)) > view_dist:
+                del self._in_flight[coords]
+        self._failures.clear()
+
+        self._queue = deque((center_x + dx, center_z + dz) for dx, dz in _spiral_offsets(view_dist)
+                            if (center_x + dx, center_z + dz) not in self.loaded and (center_x + dx, center_z + dz) not in self._in_flight)
+
+    def tick(self, source: ColumnSource, mcprot: "MinecraftProtocol", bytes_per_tick: int) -> int:
+        """Send finished columns until the byte budget is used up, return the number of columns sent
+
+        Columns are requested nearest first, those that aren't ready yet are sent on a later tick.
+        """
+
+        while self._queue and len(self._in_flight) < MAX_COLUMNS_IN_FLIGHT:
+            coords = self._queue.popleft()
+            if coords not in self.loaded:
+                self._in_flight[coords] = source.request_column(*coords)
+
+        sent_bytes = 0
+        sent_columns = 0
+        batch: list[CompressedColumn] = []
+        batch_bytes = 0
+
+        # always send at least one column, so a tiny budget can't stall loading
+        for coords, future in list(self._in_flight.items()):
+            if sent_bytes >= bytes_per_tick:
+                break
+            if not future.done():
+                continue
+            del self._in_flight[coords]
+            if future.exception() is not None:
+                self._retry(coords, future.exception())
+                continue
+            self._failures.pop(coords, None)
+
+            column = future.result()
+            if batch and (len(batch) >= MAX_COLUMNS_PER_PACKET or batch_bytes + column.size > MAX_BYTES_PER_PACKET):
+                mcprot.write_packet(server_packets.MapChunkBulk(*build_bulk_payload(batch)))
+                batch = []
+                batch_bytes = 0
+
+            batch.append(column)
+            batch_bytes += column.size
+            sent_bytes += column.size
+            sent_columns += 1
+            self.loaded.add(coords)
+
+        if batch:
+            mcprot.write_packet(server_packets.MapChunkBulk(*build_bulk_payload(batch)))
+        return sent_columns
+
+    def _retry(self, coords: tuple[int, int], exc: BaseException) -> None:
+        """Queue a failed column again, behind the columns that are already queued"""
+
+        failures = self._failures.get(coords, 0) + 1
+        self._failures[coords] = failures
+        if failures > MAX_COLUMN_RETRIES:
+            logging.error(f"Failed to load chunk column {coords} {failures} times, giving up until the player moves", exc_info=exc)
+            return
+        logging.warning(f"Failed to load chunk column {coords}, retrying: {exc!r}")
+        self._queue.append(coords)
@@ -0,0 +1,198 @@
+"""Loads, generates, serializes and compresses chunk columns off the tick thread"""
+
+from __future__ import annotations
+import logging
+import multiprocessing
+import queue
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core.worldgen import WorldGenerator
+from core.chunk_cache import CompressedColumn, compress_column, compress_data
+from database import region_db_manager
+from dataclass.save import COLUMN_BUFFER_SIZE, ChunkColumn, World
+
+THREAD_MODE = "thread"
+PROCESS_MODE = "process"
+
+# generators created inside worker processes, by (level type, seed, flat preset)
+_worker_generators: dict[tuple[str, int, str], "WorldGenerator"] = {}
+
+def _generate_shared_job(shm_name: str, options: tuple[str, int, str], chunk_x: int, chunk_z: int) -> tuple[list[int], CompressedColumn]:
+    """Generate a column directly into shared memory, only the section indices and compressed data are pickled"""
+
+    from core.worldgen import WorldGenerator
+
+    if options not in _worker_generators:
+        level_type, seed, flat_preset = options
+        _worker_generators[options] = WorldGenerator(level_type, None, seed, flat_preset)
+
+    shm = SharedMemory(shm_name)
+    column = ChunkColumn.from_buffer(shm.buf, initialize=True)
+    try:
+        _worker_generators[options].generate_column(chunk_x, chunk_z, column)
+        sections = [c for c, chunk in sorted(column.chunks.items()) if not chunk.is_empty()]
+        trimmed = ChunkColumn(chunks={c: column.chunks[c] for c in sections}, biomes=column.biomes)
+        return (sections, compress_column(chunk_x, chunk_z, trimmed))
+    finally:
+        # the views have to be gone before the shared memory can be closed
+        column.release()
+        shm.close()
+
+class ChunkWorkerPool():
+    """A pool of worker threads or processes that prepares chunk columns for the tick thread
+
+    Missing columns are read from the region files if they were saved before, otherwise they are generated.
+    Finished columns are put into a completion queue, which the tick thread drains with process_completed().
+    Only then are columns added to the world and the futures returned by request_column() resolved,
+    so callbacks and world changes always happen on the tick thread.
+    """
+
+    def __init__(self, world: World, generator: "WorldGenerator", workers: int = 2, mode: str = THREAD_MODE) -> None:
+        if mode not in (THREAD_MODE, PROCESS_MODE):
+            raise ValueError(f"Unknown chunk worker mode {mode}")
+
+        self.world = world
+        self.generator = generator
+        self.mode = mode
+        # the threads load and compress columns, in process mode they hand generating off to the processes
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="chunk-worker")
+        self._processes: ProcessPoolExecutor | None = None
+        if mode == PROCESS_MODE:
+            self._processes = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        self._completed = queue.SimpleQueue()
+        self._requests: dict[tuple[int, int], Future] = {}
+        self._shut_down = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._requests)
+
+    def request_column(self, chunk_x: int, chunk_z: int) -> Future:
+        """Return a future for the compressed column, which is resolved on the tick thread"""
+
+        coords = (chunk_x, chunk_z)
+        future = self._requests.get(coords)
+        if future is not None:
+            return future
+
+        entry = self.world.packet_cache.get(chunk_x, chunk_z)
+        if entry is not None:
+            future = Future()
+            future.set_result(entry)
+            return future
+
+        if self._shut_down:
+            future = Future()
+            future.set_exception(RuntimeError("The chunk worker pool was shut down"))
+            return future
+
+        future = self._requests[coords] = Future()
+        self._submit(coords)
+        return future
+
+    def process_completed(self) -> int:
+        """Add finished columns to the world and resolve their futures, return the number of finished requests"""
+
+        finished = 0
+        while True:
+            try:
+                coords, version, job = self._completed.get_nowait()
+            except queue.Empty:
+                return finished
+
+            if job.cancelled():
+                # shutdown() cancelled the job before a worker started it
+                self._fail(coords, RuntimeError("The chunk worker pool was shut down"))
+                finished += 1
+                continue
+
+            try:
+                entry = self._install(coords, version, job.result())
+            except Exception as exc:
+                logging.exception(f"Failed to prepare chunk column {coords}")
+                self._fail(coords, exc)
+                finished += 1
+                continue
+
+            if entry is None:
+                if self._shut_down:
+                    self._fail(coords, RuntimeError("The chunk worker pool was shut down"))
+                    finished += 1
+                    continue
+                # the column changed while the worker was busy, try again
+                self._submit(coords)
+                continue
+
+            self.world.packet_cache.put(entry)
+            future = self._requests.pop(coords, None)
+            if future is not None:
+                future.set_result(entry)
+            finished += 1
+
+    def shutdown(self) -> None:
+        self._shut_down = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+
+    def _fail(self, coords: tuple[int, int], exc: BaseException) -> None:
+        future = self._requests.pop(coords, None)
+        if future is not None:
+            future.set_exception(exc)
+
+    def _submit(self, coords: tuple[int, int]) -> None:
+        column = self.world.get_column(*coords)
+        if column is not None:
+            # only copy the column on the tick thread, compress it on a worker
+            version = column.version
+            job = self._executor.submit(compress_data, *coords, *column.serialize())
+        else:
+            version = None
+            job = self._executor.submit(self._load_or_generate, *coords)
+        job.add_done_callback(lambda job: self._completed.put((coords, version, job)))
+
+    def _load_or_generate(self, chunk_x: int, chunk_z: int) -> tuple[ChunkColumn, CompressedColumn, bool]:
+        """Return the column, its compressed data and whether it came from the region files, runs on a worker thread"""
+
+        column = region_db_manager.load_column(chunk_x, chunk_z)
+        if column is not None:
+            return (column, compress_column(chunk_x, chunk_z, column), True)
+
+        if self._processes is None:
+            column = self.generator.generate_column(chunk_x, chunk_z)
+            return (column, compress_column(chunk_x, chunk_z, column), False)
+
+        shm = SharedMemory(create=True, size=COLUMN_BUFFER_SIZE)
+        options = (self.generator.level_type, self.generator.seed, self.generator.flat_preset)
+        try:
+            sections, entry = self._processes.submit(_generate_shared_job, shm.name, options, chunk_x, chunk_z).result()
+            # copy the non-empty sections out, the segment can't be closed while views into it are alive
+            shared = ChunkColumn.from_buffer(shm.buf, sections)
+            column = shared.copy()
+            shared.release()
+        finally:
+            shm.close()
+            shm.unlink()
+        return (column, entry, False)
+
+    def _install(self, coords: tuple[int, int], version: int | None, result) -> CompressedColumn | None:
+        """Add a loaded or generated column to the world, return None if the result is outdated"""
+
+        existing = self.world.get_column(*coords)
+
+        if version is not None:
+            # compressed an existing column
+            if existing is None or existing.version != version:
+                return None
+            return result
+
+        column, entry, loaded = result
+        if existing is not None:
+            # something else created the column in the meantime, keep that one
+            return None
+        # columns read from the region files don't have to be written back
+        self.world.set_column(*coords, column, dirty=not loaded)
+        return entry
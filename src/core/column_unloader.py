@@ -0,0 +1,120 @@
+"""Removes chunk columns from memory once no player has been able to see them for a while"""
+
+import logging
+from concurrent.futures import Future
+from typing import Callable
+
+from core import tick_timer
+from core.autosave import AutoSaver
+from dataclass.save import World
+
+class ColumnUnloader():
+    """Unloads the columns that nobody viewed for delay_ticks ticks, checked every interval_ticks ticks
+
+    viewed_columns returns the columns that have to stay in memory, e.g. those sent to or
+    requested by a player. If more than max_columns columns are loaded, the columns that were
+    unviewed the longest are unloaded early. Modified columns are saved first and only
+    removed once their write finished, columns the autosaver is still writing or failed
+    to write are kept.
+    """
+
+    def __init__(self, world: World, autosaver: AutoSaver, viewed_columns: Callable[[], set[tuple[int, int]]],
+                 delay_ticks: int, max_columns: int, interval_ticks: int) -> None:
+        self.world = world
+        self.autosaver = autosaver
+        self.viewed_columns = viewed_columns
+        self.delay_ticks = delay_ticks
+        self.max_columns = max_columns
+        self.interval_ticks = interval_ticks
+        self._event_id = None
+        self._ticks = 0
+        # tick at which each loaded column was last viewed
+        self._last_viewed: dict[tuple[int, int], int] = {}
+        # columns waiting for their save to finish, with the save and the column version that was saved
+        self._saving: dict[tuple[int, int], tuple[Future, int]] = {}
+
+        # metrics
+        self.unloaded_columns = 0
+
+    def start(self) -> None:
+        self._event_id = tick_timer.add_event(self.interval_ticks, self.check, self.interval_ticks)
+
+    def stop(self) -> None:
+        if self._event_id is not None:
+            tick_timer.remove_event(self._event_id)
+            self._event_id = None
+
+    def check(self) -> int:
+        """Unload or start saving all columns that are due, return the number of unloaded columns"""
+
+        self._ticks += self.interval_ticks
+        viewed = self.viewed_columns()
+        pending = self.autosaver.pending_columns()
+        unloaded = self._finish_saving(viewed, pending)
+
+        last_viewed = {}
+        candidates = []
+        for chunk_x, row in self.world.chunk_columns.items():
+            for chunk_z, column in row.items():
+                if column is None:
+                    continue
+                coords = (chunk_x, chunk_z)
+                if coords in viewed:
+                    last_viewed[coords] = self._ticks
+                    continue
+                last_viewed[coords] = self._last_viewed.get(coords, self._ticks)
+                if coords not in self._saving and coords not in pending:
+                    candidates.append((last_viewed[coords], coords))
+        self._last_viewed = last_viewed
+
+        # the columns that were unviewed the longest go first
+        candidates.sort()
+        excess = len(last_viewed) - len(self._saving) - self.max_columns
+        to_save = []
+        for index, (tick, coords) in enumerate(candidates):
+            if index >= excess and self._ticks - tick < self.delay_ticks:
+                break
+            if coords in self.world.dirty_columns:
+                to_save.append(coords)
+            else:
+                self._unload(coords)
+                unloaded += 1
+
+        if to_save:
+            future = self.autosaver.save_columns(to_save)
+            for coords in to_save:
+                self._saving[coords] = (future, self.world.get_column(*coords).version)
+
+        return unloaded
+
+    def stats(self) -> dict:
+        return {
+            "loaded_columns": len(self._last_viewed),
+            "saving_columns": len(self._saving),
+            "unloaded_columns": self.unloaded_columns
+        }
+
+    def _finish_saving(self, viewed: set[tuple[int, int]], pending: set[tuple[int, int]]) -> int:
+        """Unload the columns whose save finished, unless they were viewed or changed in the meantime"""
+
+        unloaded = 0
+        for coords, (future, version) in list(self._saving.items()):
+            if not future.done():
+                continue
+            del self._saving[coords]
+
+            column = self.world.get_column(*coords)
+            if column is None or coords in viewed or coords in self.world.dirty_columns or coords in pending:
+                continue
+            if not future.result() or column.version != version:
+                # the write failed or the column changed, try again on the next check
+                continue
+            self._unload(coords)
+            unloaded += 1
+        return unloaded
+
+    def _unload(self, coords: tuple[int, int]) -> None:
+        self.world.remove_column(*coords)
+        self._last_viewed.pop(coords, None)
+        self.unloaded_columns += 1
+        logging.debug(f"Unloaded chunk column {coords}")
@@ -0,0 +1,149 @@
+"""Spawns entities for the players that can see them and sends them their movement"""
+
+from __future__ import annotations
+import math
+from typing import TYPE_CHECKING, Callable, Iterable
+
+if TYPE_CHECKING:
+    from entities.entity import Entity
+    from network.packet import ServerPacket
+from core import tick_timer
+from core.spatial_index import SpatialIndex, chunk_of
+from network import server_packets
+
+# the range of the deltas in relative move packets, in 1/32 blocks
+_MIN_DELTA = -128
+_MAX_DELTA = 127
+
+def _fixed_point(value: float) -> int:
+    return math.floor(value * 32)
+
+def _angle(value: float) -> int:
+    return math.floor(value * 256 / 360) & 0xFF
+
+class _TrackedEntity():
+    __slots__ = ("entity", "viewers", "position", "angles", "ticks_since_teleport")
+
+    def __init__(self, entity: Entity) -> None:
+        self.entity = entity
+        self.viewers: set[Entity] = set()
+        # what the viewers were sent last, as fixed-point position and angles
+        self.position = (0, 0, 0)
+        self.angles = (0, 0)
+        self.ticks_since_teleport = 0
+
+class EntityTracker():
+    """Keeps the set of players that see each tracked entity
+
+    Every interval_ticks ticks, an entity is spawned for the players that started viewing its column
+    and destroyed for the ones that stopped. Its viewers get its movement since the last update as a
+    relative move and/or look packet. If it moved too far for that, or every teleport_interval ticks
+    to correct rounding errors, they get a teleport. Each packet is encoded once for all viewers.
+    """
+
+    def __init__(self, spatial_index: SpatialIndex, broadcast: Callable[[ServerPacket, Iterable[Entity]], None],
+                 interval_ticks: int, teleport_interval: int) -> None:
+        self.spatial_index = spatial_index
+        self.broadcast = broadcast
+        self.interval_ticks = interval_ticks
+        self.teleport_interval = teleport_interval
+        self._tracked: dict[Entity, _TrackedEntity] = {}
+        self._event_id = None
+
+        # metrics
+        self.spawns = 0
+        self.destroys = 0
+        self.movement_packets = 0
+        self.teleports = 0
+
+    def start(self) -> None:
+        self._event_id = tick_timer.add_event(self.interval_ticks, self.update, self.interval_ticks)
+
+    def stop(self) -> None:
+        if self._event_id is not None:
+            tick_timer.remove_event(self._event_id)
+            self._event_id = None
+
+    def track(self, entity: Entity) -> None:
+        """Start showing the entity to the players that can see it, from the next update on"""
+
+        if entity not in self._tracked:
+            self._tracked[entity] = _TrackedEntity(entity)
+
+    def untrack(self, entity: Entity) -> None:
+        """Destroy the entity for its viewers and stop showing it, it also stops viewing other entities"""
+
+        tracked = self._tracked.pop(entity, None)
+        if tracked is not None and tracked.viewers:
+            self.broadcast(server_packets.DestroyEntities([entity.entity_id]), tracked.viewers)
+            self.destroys += len(tracked.viewers)
+        for other in list(self._tracked.values()):
+            other.viewers.discard(entity)
+
+    def viewers(self, entity: Entity) -> set[Entity]:
+        """Return the players the entity is currently spawned for"""
+
+        tracked = self._tracked.get(entity)
+        return set(tracked.viewers) if tracked is not None else set()
+
+    def update(self) -> None:
+        """Spawn, destroy and move all tracked entities for their viewers"""
+
+        # entity ids to destroy per player, sent together at the end
+        destroyed: dict[Entity, list[int]] = {}
+
+        for tracked in list(self._tracked.values()):
+            entity = tracked.entity
+            viewers = self.spatial_index.viewers_of_chunk(*chunk_of(entity.position))
+            viewers.discard(entity)
+
+            for viewer in tracked.viewers - viewers:
+                destroyed.setdefault(viewer, []).append(entity.entity_id)
+            entered = viewers - tracked.viewers
+
+            self._send_movement(tracked, tracked.viewers & viewers)
+            if entered:
+                self.broadcast(entity.spawn_packet(), entered)
+                self.broadcast(server_packets.EntityHeadLook(entity.entity_id, entity.rotation.yaw), entered)
+                self.spawns += len(entered)
+            tracked.viewers = viewers
+
+        for viewer, entity_ids in destroyed.items():
+            for start in range(0, len(entity_ids), server_packets.DestroyEntities.MAX_ENTITIES):
+                viewer.mcprot.write_packet(server_packets.DestroyEntities(entity_ids[start:start + server_packets.DestroyEntities.MAX_ENTITIES]))
+            self.destroys += len(entity_ids)
+
+    def _send_movement(self, tracked: _TrackedEntity, viewers: set[Entity]) -> None:
+        entity = tracked.entity
+        feet = entity.feet_position
+        position = (_fixed_point(feet.x), _fixed_point(feet.y), _fixed_point(feet.z))
+        angles = (_angle(entity.rotation.yaw), _angle(entity.rotation.pitch))
+        dx, dy, dz = (new - old for new, old in zip(position, tracked.position))
+        moved = position != tracked.position
+        looked = angles != tracked.angles
+
+        tracked.position = position
+        tracked.ticks_since_teleport += self.interval_ticks
+        if not viewers:
+            tracked.angles = angles
+            tracked.ticks_since_teleport = 0
+            return
+
+        if tracked.ticks_since_teleport >= self.teleport_interval or not all(_MIN_DELTA <= delta <= _MAX_DELTA for delta in (dx, dy, dz)):
+            packet = server_packets.EntityTeleport(entity.entity_id, feet, entity.rotation)
+            tracked.ticks_since_teleport = 0
+            self.teleports += 1
+        elif moved and looked:
+            packet = server_packets.EntityLookAndRelativeMove(entity.entity_id, dx, dy, dz, entity.rotation)
+        elif moved:
+            packet = server_packets.EntityRelativeMove(entity.entity_id, dx, dy, dz)
+        elif looked:
+            packet = server_packets.EntityLook(entity.entity_id, entity.rotation)
+        else:
+            return
+
+        self.broadcast(packet, viewers)
+        self.movement_packets += len(viewers)
+        if angles[0] != tracked.angles[0]:
+            self.broadcast(server_packets.EntityHeadLook(entity.entity_id, entity.rotation.yaw), viewers)
+        tracked.angles = angles
@@ -0,0 +1,145 @@
+"""Processes the packets received from the players, fairly between them"""
+
+from __future__ import annotations
+import logging
+import queue
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from entities.player_entity import PlayerEntity
+    from network.packet import ClientPacket
+from core.rate_limit import TokenBucket
+
+class _PlayerState():
+    __slots__ = ("buckets", "full_ticks")
+
+    def __init__(self) -> None:
+        self.buckets: dict[type, TokenBucket] = {}
+        # ticks the player's queue stayed above the limit
+        self.full_ticks = 0
+
+class InboundProcessor():
+    """Processes the queued packets of all players round-robin, one packet per player in turn
+
+    Each tick, a player gets at most packets_per_tick packets and time_per_tick seconds, and all players together
+    at most tick_budget seconds. The player that goes first rotates every tick. Packets that didn't fit stay queued
+    for the next tick. The packet types in rate_limits are limited to (packets per second, burst) per player, packets
+    over the limit are dropped. A player whose queue stays above max_queue for queue_timeout ticks is disconnected.
+    """
+
+    def __init__(self, packets_per_tick: int, time_per_tick: float, tick_budget: float,
+                 rate_limits: dict[type, tuple[float, float]], max_queue: int, queue_timeout: int,
+                 disconnect: Callable[["PlayerEntity", str], None]) -> None:
+        self.packets_per_tick = packets_per_tick
+        self.time_per_tick = time_per_tick
+        self.tick_budget = tick_budget
+        self.rate_limits = rate_limits
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.disconnect = disconnect
+        self._states: dict[PlayerEntity, _PlayerState] = {}
+        self._rotation = 0
+
+        # metrics
+        self.processed = 0
+        self.dropped: dict[str, int] = {}
+        self.deferred = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.disconnected = 0
+
+    def process(self, players: list[PlayerEntity]) -> dict[PlayerEntity, float]:
+        """Process the packets for this tick, return the seconds spent on each player"""
+
+        spent = {player: 0.0 for player in players}
+        counts = dict.fromkeys(players, 0)
+        if players:
+            self._rotation = (self._rotation + 1) % len(players)
+        turns = deque(players[self._rotation:] + players[:self._rotation])
+
+        tick_start = time.perf_counter()
+        while turns:
+            player = turns.popleft()
+            if counts[player] >= self.packets_per_tick or spent[player] >= self.time_per_tick:
+                continue
+            try:
+                conn_info: ClientPacket = player.network_in.get_nowait()
+            except queue.Empty:
+                continue
+
+            start = time.perf_counter()
+            if self._allow(player, conn_info, start):
+                try:
+                    conn_info.process(player)
+                except OSError as oserr:
+                    # player disconnected client-side
+                    logging.debug(oserr)
+                self.processed += 1
+            end = time.perf_counter()
+            spent[player] += end - start
+            counts[player] += 1
+            turns.append(player)
+
+            if end - tick_start >= self.tick_budget:
+                break
+
+        self._check_queues(players)
+        return spent
+
+    def forget_player(self, player: PlayerEntity) -> None:
+        self._states.pop(player, None)
+
+    def stats(self) -> dict:
+        return {
+            "processed": self.processed,
+            "dropped": dict(self.dropped),
+            "deferred": self.deferred,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "disconnected": self.disconnected
+        }
+
+    def _allow(self, player: PlayerEntity, conn_info: ClientPacket, now: float) -> bool:
+        limit = self.rate_limits.get(type(conn_info))
+        if limit is None:
+            return True
+
+        state = self._state(player)
+        bucket = state.buckets.get(type(conn_info))
+        if bucket is None:
+            bucket = state.buckets[type(conn_info)] = TokenBucket(*limit)
+        if bucket.take(now):
+            return True
+
+        name = type(conn_info).__name__
+        self.dropped[name] = self.dropped.get(name, 0) + 1
+        return False
+
+    def _check_queues(self, players: list[PlayerEntity]) -> None:
+        """Count the packets left for the next tick and disconnect players that send more than they can get processed"""
+
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        for player in players:
+            depth = player.network_in.qsize()
+            self.queue_depth += depth
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+            state = self._state(player)
+            if depth <= self.max_queue:
+                state.full_ticks = 0
+                continue
+            state.full_ticks += 1
+            if state.full_ticks == self.queue_timeout:
+                logging.warning(f"{player.name} has {depth} packets waiting to be processed, disconnecting")
+                self.disconnect(player, "Sent too many packets")
+                self.disconnected += 1
+        self.deferred += self.queue_depth
+
+    def _state(self, player: PlayerEntity) -> _PlayerState:
+        state = self._states.get(player)
+        if state is None:
+            state = self._states[player] = _PlayerState()
+        return state
@@ -1,31 +1,81 @@
+import asyncio
 import atexit
-import base64
 import logging
 import os
 import sys
-from datetime import datetime
 from socket import socket
 from socketserver import ThreadingTCPServer
 from threading import Thread
-from time import sleep
+from time import perf_counter
+from typing import Iterable
 import uuid
 
-from core import tick_timer, server_provider
-from core.worldgen import WorldGenerator
-from database import json_db_manager
-from dataclass import metadata
+from core import chunk_workers, tick_scheduler, tick_timer, server_provider
+from core.autosave import AutoSaver
+from core.chunk_workers import ChunkWorkerPool
+from core.column_unloader import ColumnUnloader
+from core.inbound_processor import InboundProcessor
+from core.player_registry import EntityIdAllocator, PlayerRegistry
+from core.rate_limit import KeyedRateLimiter
+from core.entity_tracker import EntityTracker
+from core.spatial_index import SpatialIndex
+from core.status_cache import StatusCache
+from core.tick_profiler import TickProfiler
+from core.tick_scheduler import TickScheduler
+from core.worldgen import DEFAULT_FLAT_PRESET, WorldGenerator
+from database import region_db_manager
 from dataclass.position import Position
 from dataclass.rotation import Rotation
 from dataclass.save import World
 from entities.player_entity import PlayerEntity
+from events import event_factory
 from events.event_factory import EventFactory
 from events.block_break_event import BlockBreakEvent
-from network import handshake_packets, packet, server_packets, client_packets, login_packets
+from network import handshake_packets, packet, protocol, server_packets, client_packets, login_packets
+from network.async_connection import AsyncConnection
 from network.protocol import MinecraftProtocol
 
 TPS = 20
 VIEW_DIST = 8
 MAX_PLAYERS = 20
+CHUNK_BYTES_PER_TICK = 128 * 1024
+CHUNK_WORKERS = 2
+AUTOSAVE_INTERVAL = TPS * 60 # ticks
+LEVEL_TYPE = "flat" # "flat" or "default"
+WORLD_SEED = 0
+FLAT_PRESET = DEFAULT_FLAT_PRESET
+CHUNK_WORKER_MODE = chunk_workers.THREAD_MODE
+SPAWN_RADIUS = 4 # columns around the spawn that always stay loaded
+COLUMN_UNLOAD_DELAY = TPS * 30 # ticks a column stays loaded after the last player stopped viewing it
+COLUMN_UNLOAD_INTERVAL = TPS # ticks between unload checks
+MAX_LOADED_COLUMNS = 4096
+NETWORK_MODE = protocol.ASYNCIO_MODE
+MAX_OUTBOUND_BYTES = 4 * 1024 * 1024 # bytes a player may have waiting to be sent
+SLOW_CLIENT_TIMEOUT = TPS * 10 # ticks a player may stay above MAX_OUTBOUND_BYTES
+ENTITY_UPDATE_INTERVAL = 2 # ticks between entity movement updates
+ENTITY_TELEPORT_INTERVAL = TPS * 20 # ticks between full entity positions that correct rounding errors
+PROFILER_WINDOW = TPS * 60 # ticks the tick statistics are kept for
+TICK_OVERLOAD_POLICY = tick_scheduler.CATCH_UP # what to do with ticks that are late, CATCH_UP or SKIP
+MAX_CATCH_UP_TICKS = TPS * 2 # late ticks that are run right away with CATCH_UP, later ones are skipped
+INBOUND_PACKETS_PER_TICK = 50 # packets processed per player and tick, the rest waits for the next tick
+INBOUND_TIME_PER_TICK = 0.005 # seconds spent on a player's packets per tick
+INBOUND_TICK_BUDGET = 0.025 # seconds spent on the packets of all players per tick
+# (packets per second, burst) per player for packet types that clients could flood
+INBOUND_RATE_LIMITS = {
+    client_packets.ChatMessage: (5, 20),
+    client_packets.PlayerPosition: (40, 80),
+    client_packets.PlayerLook: (40, 80),
+    client_packets.PlayerPositionAndLook: (40, 80),
+    client_packets.PlayerP: (40, 80),
+    client_packets.Animation: (40, 80),
+    client_packets.PluginMessage: (20, 40),
+}
+MAX_INBOUND_QUEUE = 1000 # packets a player may have waiting to be processed
+INBOUND_QUEUE_TIMEOUT = TPS * 5 # ticks a player may stay above MAX_INBOUND_QUEUE
+ENTITY_ID_REUSE_DELAY = 60 # seconds before the entity id of a player that left is given out again
+MOTD = f"IridiumMC server! - Running with Python {sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}!"
+SERVER_ICON = "server-icon.png" # in the server directory
+STATUS_RATE_LIMIT = (1, 10) # (status pings per second, burst) per IP address
 
 class IridiumServer():
     """The server core"""
@@ -36,67 +86,157 @@ class IridiumServer():
         self.server = None
         self.world = None
         self.world_gen = None
-        self.players: dict[str, PlayerEntity] = {}
+        self.chunk_workers = None
+        self.autosaver = None
+        self.column_unloader = None
+        self.spawn_columns: set[tuple[int, int]] = set()
+        self.spawn_position = Position(20, 10, 10)
+        self.players = PlayerRegistry()
+        self.entity_ids = EntityIdAllocator(self.ENTITY_ID_REUSE_DELAY)
+        self.status_cache = StatusCache(os.path.join(path, self.SERVER_ICON), self.MOTD, self.MAX_PLAYERS, lambda: len(self.players))
+        self.status_limiter = KeyedRateLimiter(*self.STATUS_RATE_LIMIT)
+        self.spatial_index = SpatialIndex()
+        self.tick_profiler = TickProfiler(self.PROFILER_WINDOW)
+        self.inbound_processor = InboundProcessor(self.INBOUND_PACKETS_PER_TICK, self.INBOUND_TIME_PER_TICK, self.INBOUND_TICK_BUDGET,
+                                                  self.INBOUND_RATE_LIMITS, self.MAX_INBOUND_QUEUE, self.INBOUND_QUEUE_TIMEOUT,
+                                                  self.disconnect_player)
+        self.tick_scheduler = TickScheduler(self.TPS, self.TICK_OVERLOAD_POLICY, self.MAX_CATCH_UP_TICKS)
+        self.entity_tracker = EntityTracker(self.spatial_index, self.broadcast, self.ENTITY_UPDATE_INTERVAL, self.ENTITY_TELEPORT_INTERVAL)
         server_provider._iridium_server = self
 
     TPS = TPS
     VIEW_DIST = VIEW_DIST
     MAX_PLAYERS = MAX_PLAYERS
+    CHUNK_BYTES_PER_TICK = CHUNK_BYTES_PER_TICK
+    CHUNK_WORKERS = CHUNK_WORKERS
+    AUTOSAVE_INTERVAL = AUTOSAVE_INTERVAL
+    LEVEL_TYPE = LEVEL_TYPE
+    WORLD_SEED = WORLD_SEED
+    FLAT_PRESET = FLAT_PRESET
+    CHUNK_WORKER_MODE = CHUNK_WORKER_MODE
+    SPAWN_RADIUS = SPAWN_RADIUS
+    COLUMN_UNLOAD_DELAY = COLUMN_UNLOAD_DELAY
+    COLUMN_UNLOAD_INTERVAL = COLUMN_UNLOAD_INTERVAL
+    MAX_LOADED_COLUMNS = MAX_LOADED_COLUMNS
+    NETWORK_MODE = NETWORK_MODE
+    MAX_OUTBOUND_BYTES = MAX_OUTBOUND_BYTES
+    SLOW_CLIENT_TIMEOUT = SLOW_CLIENT_TIMEOUT
+    ENTITY_UPDATE_INTERVAL = ENTITY_UPDATE_INTERVAL
+    ENTITY_TELEPORT_INTERVAL = ENTITY_TELEPORT_INTERVAL
+    PROFILER_WINDOW = PROFILER_WINDOW
+    TICK_OVERLOAD_POLICY = TICK_OVERLOAD_POLICY
+    MAX_CATCH_UP_TICKS = MAX_CATCH_UP_TICKS
+    INBOUND_PACKETS_PER_TICK = INBOUND_PACKETS_PER_TICK
+    INBOUND_TIME_PER_TICK = INBOUND_TIME_PER_TICK
+    INBOUND_TICK_BUDGET = INBOUND_TICK_BUDGET
+    INBOUND_RATE_LIMITS = INBOUND_RATE_LIMITS
+    MAX_INBOUND_QUEUE = MAX_INBOUND_QUEUE
+    INBOUND_QUEUE_TIMEOUT = INBOUND_QUEUE_TIMEOUT
+    ENTITY_ID_REUSE_DELAY = ENTITY_ID_REUSE_DELAY
+    MOTD = MOTD
+    SERVER_ICON = SERVER_ICON
+    STATUS_RATE_LIMIT = STATUS_RATE_LIMIT
 
     def run_server(self):
         """Start the server"""
 
         logging.info(f"IridiumMC server starting on port {self.port}")
-        self.server = ThreadingTCPServer(("0.0.0.0", self.port), self.handle_client_connect)
 
-        logging.info("loading world...")
-        self.world = json_db_manager.load_world()
-        logging.info("done")
+        self.world = region_db_manager.open_world()
+        self.world_gen = WorldGenerator(self.LEVEL_TYPE, self.world, self.WORLD_SEED, self.FLAT_PRESET)
+        self.world.loader = self.load_column
 
-        logging.info("creating world...")
-        self.world_gen = WorldGenerator("flat", self.world)
-        self.world_gen.generate_start_region(Position(0, 0, 0))
+        logging.info("preparing spawn area...")
+        self.spawn_columns = {(chunk_x, chunk_z) for chunk_x in range(-self.SPAWN_RADIUS, self.SPAWN_RADIUS)
+                              for chunk_z in range(-self.SPAWN_RADIUS, self.SPAWN_RADIUS)}
+        for chunk_x, chunk_z in self.spawn_columns:
+            self.world.load_column(chunk_x, chunk_z)
+        self.spawn_position = Position(20, self.world.get_highest_block_y(20, 10) + 2, 10)
         logging.info("done")
 
+        self.chunk_workers = ChunkWorkerPool(self.world, self.world_gen, self.CHUNK_WORKERS, self.CHUNK_WORKER_MODE)
+        self.autosaver = AutoSaver(self.world, self.AUTOSAVE_INTERVAL)
+        self.autosaver.start()
+        self.column_unloader = ColumnUnloader(self.world, self.autosaver, self.viewed_columns, self.COLUMN_UNLOAD_DELAY,
+                                              self.MAX_LOADED_COLUMNS, self.COLUMN_UNLOAD_INTERVAL)
+        self.column_unloader.start()
+        self.entity_tracker.start()
+
         self.register_callbacks()
 
         atexit.register(self._exit_handler)
 
         # start the game loop
         Thread(target=self.mainloop, daemon=True).start()
-        self.server.serve_forever()
+
+        if self.NETWORK_MODE == protocol.ASYNCIO_MODE:
+            asyncio.run(self._serve_async())
+        else:
+            self.server = ThreadingTCPServer(("0.0.0.0", self.port), self.handle_client_connect)
+            self.server.serve_forever()
 
     def register_callbacks(self):
         """Register callbacks"""
 
-        EventFactory.register_callback(BlockBreakEvent, client_packets.PlayerDigging.break_block_callback)
+        EventFactory.register_callback(BlockBreakEvent, client_packets.PlayerDigging.break_block_callback,
+                                      priority=event_factory.MONITOR, ignore_cancelled=True)
 
     def mainloop(self):
         """The game loop"""
 
+        profiler = self.tick_profiler
         while True:
-            start_time = datetime.now()
-
-            for player in self.players.values():
+            profiler.start_tick()
+
+            # add columns finished by the chunk workers to the world
+            phase_start = perf_counter()
+            self.chunk_workers.process_completed()
+            profiler.add_phase("chunk_workers", perf_counter() - phase_start)
+
+            players = self.players.players()
+            phase_start = perf_counter()
+            for player in players:
+                self.handle_keepalive(player)
+            profiler.add_phase("keepalive", perf_counter() - phase_start)
+
+            # process the received packets, round-robin between the players
+            phase_start = perf_counter()
+            for player, seconds in self.inbound_processor.process(players).items():
+                profiler.add_player(player.name, seconds)
+            profiler.add_phase("network_in", perf_counter() - phase_start)
+
+            phase_start = perf_counter()
+            for player in players:
                 try:
-                    self.handle_keepalive(player)
-
-                    while not player.network_in.empty():
-                        conn_info: packet.ClientPacket = player.network_in.get()
-                        conn_info.process(player)
-
-                    player.load_chunks(self.world)
+                    player_start = perf_counter()
+                    player.load_chunks(self.chunk_workers, self.CHUNK_BYTES_PER_TICK)
+                    profiler.add_player(player.name, perf_counter() - player_start)
                 except OSError as oserr:
                     # player disconnected client-side
                     logging.debug(oserr)
+            profiler.add_phase("load_chunks", perf_counter() - phase_start)
 
+            phase_start = perf_counter()
             tick_timer.tick()
+            profiler.add_phase("tick_timer", perf_counter() - phase_start)
 
-            sleep_time = (1 / TPS) - (datetime.now() - start_time).total_seconds()
-            if sleep_time > 0:
-                sleep(sleep_time)
-            else:
-                logging.warning(f"One tick took {int((datetime.now() - start_time).total_seconds() * 1000)} ms, is the server hanging?")
+            # send everything written this tick
+            phase_start = perf_counter()
+            for player in self.players.players():
+                self.flush_player(player)
+            profiler.add_phase("flush", perf_counter() - phase_start)
+
+            duration = profiler.end_tick()
+            if duration > self.tick_scheduler.interval:
+                phase, phase_duration = profiler.slowest_phase()
+                logging.warning(f"One tick took {int(duration * 1000)} ms, {int(phase_duration * 1000)} ms in {phase}, is the server hanging?")
+            self.tick_scheduler.wait()
+
+    def set_tps(self, tps: float) -> None:
+        """Change the ticks per second while the server is running"""
+
+        self.TPS = tps
+        self.tick_scheduler.tps = tps
 
     @staticmethod
     def handle_client_connect(request: socket, client_address: tuple[str, int], server: ThreadingTCPServer) -> None:
@@ -106,60 +246,103 @@ class IridiumServer():
         logging.debug("Client connected!")
 
         mcprot = MinecraftProtocol(request)
-        conn_info = mcprot.read_packet(handshake_packets.Handshake)
+        try:
+            conn_info = mcprot.read_packet(handshake_packets.Handshake)
+
+            if conn_info.is_status_next():
+                if self.status_limiter.allow(client_address[0]):
+                    mcprot.handle_status(self.status_cache.frame())
+                else:
+                    logging.debug(f"Too many status requests from {client_address[0]}")
+                return
+            elif conn_info.is_login_next():
+                conn_info = mcprot.read_packet(login_packets.LoginStart)
+                player = self.login_player(mcprot, conn_info.name)
+            else:
+                logging.exception(f"unknown next_state {conn_info.next_state}")
+                return
 
-        if conn_info.is_status_next():
-            mcprot.handle_status(self._get_status())
-            return
-        elif conn_info.is_login_next():
-            conn_info = mcprot.read_packet(login_packets.LoginStart)
+            # player network loop
+            player.network_func()
+        finally:
+            # the server closes the socket once this returns, so wait for the last packets to be sent
+            mcprot.close()
+            mcprot.connection.wait_closed(5)
 
-            entity_id = len(self.players)+1
-            player_uuid = uuid.uuid4()
-            name = conn_info.name
+    async def handle_client_connect_async(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Callback when a new client connects to the asyncio server"""
 
-            mcprot.write_packet(login_packets.LoginSuccess(name, player_uuid))
-            mcprot.write_packet(server_packets.JoinGame(entity_id, 0, 0, 0, self.MAX_PLAYERS, "default"))
+        logging.debug("Client connected!")
 
-            # create a new player object
-            player = PlayerEntity(player_uuid, name, self.VIEW_DIST, mcprot, health=20, position=Position(20, 10, 10), rotation=Rotation(0, 0), on_ground=False, entity_id=entity_id)
-            logging.info(f"{name} joined the game")
+        connection = AsyncConnection(reader, writer)
+        mcprot = MinecraftProtocol(connection)
+        try:
+            conn_info = await mcprot.read_packet_async(handshake_packets.Handshake)
+
+            if conn_info.is_status_next():
+                client_address = writer.get_extra_info("peername")
+                if self.status_limiter.allow(client_address[0]):
+                    await mcprot.handle_status_async(self.status_cache.frame())
+                else:
+                    logging.debug(f"Too many status requests from {client_address[0]}")
+                return
+            elif conn_info.is_login_next():
+                conn_info = await mcprot.read_packet_async(login_packets.LoginStart)
+                player = self.login_player(mcprot, conn_info.name)
+            else:
+                logging.exception(f"unknown next_state {conn_info.next_state}")
+                return
 
-            # send player joined message
-            for pl in self.players.values():
-                pl.mcprot.write_packet(server_packets.ChatMesage(f"{name} joined the game"))
+            # player network loop
+            await player.network_task()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as err:
+            logging.debug(err)
+        finally:
+            await connection.wait_closed()
 
-            # send pos and rot to new player
-            player.mcprot.write_packet(server_packets.PlayerPositionAndLook(player.position, player.rotation, player.on_ground))
-        else:
-            logging.exception(f"unknown next_state {conn_info.next_state}")
-            return
+    def login_player(self, mcprot: MinecraftProtocol, name: str) -> PlayerEntity:
+        """Let a client that sent LoginStart join the game, return its new player"""
+
+        entity_id = self.entity_ids.allocate()
+        player_uuid = uuid.uuid4()
+
+        mcprot.write_packet(login_packets.LoginSuccess(name, player_uuid))
+        mcprot.write_packet(server_packets.JoinGame(entity_id, 0, 0, 0, self.MAX_PLAYERS, self.LEVEL_TYPE))
+
+        # create a new player object
+        player = PlayerEntity(player_uuid, name, self.VIEW_DIST, mcprot, health=20, position=Position(self.spawn_position.x, self.spawn_position.y, self.spawn_position.z), rotation=Rotation(0, 0), on_ground=False, entity_id=entity_id)
+        logging.info(f"{name} joined the game")
+
+        # send player joined message
+        self.broadcast(server_packets.ChatMesage(f"{name} joined the game"))
+
+        # send pos and rot to new player
+        player.mcprot.write_packet(server_packets.PlayerPositionAndLook(player.position, player.rotation, player.on_ground))
 
         # send currently connected players chat message
-        player.mcprot.write_packet(server_packets.ChatMesage("Players: " + ", ".join([item.name for item in self.players.values()] + [player.name])))
+        players = self.players.players()
+        player.mcprot.write_packet(server_packets.ChatMesage("Players: " + ", ".join([item.name for item in players] + [player.name])))
 
-        for pl in self.players.values():
-            # add new player to tab list
-            pl.mcprot.write_packet(server_packets.PlayerListItem(player.name, True, 0))
+        # add new player to tab list
+        self.broadcast(server_packets.PlayerListItem(player.name, True, 0))
+
+        for pl in players:
             # add already connected player to tab list
             player.mcprot.write_packet(server_packets.PlayerListItem(pl.name, True, 0))
 
-            # !!! not yet working !!!
-            # should load new player if it is in render distance
-            # test_player_data = binary_operations._encode_string("textures") + binary_operations._encode_string(base64.b64encode("textures".encode("ascii")).decode("ascii")) + binary_operations._encode_string(base64.b64encode("textures".encode("ascii")).decode("ascii"))
-            # test_player_data2 = binary_operations._encode_string("t") + binary_operations._encode_string("a") + binary_operations._encode_string("s")
-            player_metadata = metadata.Human(health=10).to_bytes() + metadata.STOP_BYTE
-            if pl.pos.dist_to_horizontal(player.position) < self.VIEW_DIST * 16:
-                # pl.mcprot.write_packet(server_packets.SpawnPlayer(player.entity_id, str(player.uuid), player.name, b"", player.position, player.rotation, 0, player_metadata))
-                pass
-
         # add self to tab list
         player.mcprot.write_packet(server_packets.PlayerListItem(player.name, True, 0))
 
-        self.players[str(player.uuid)] = player
+        self.players.add(player)
+        self.spatial_index.add(player)
+        self.entity_tracker.track(player)
+        player.mcprot.flush()
+        return player
 
-        # player network loop
-        player.network_func()
+    async def _serve_async(self) -> None:
+        self.server = await asyncio.start_server(self.handle_client_connect_async, "0.0.0.0", self.port)
+        async with self.server:
+            await self.server.serve_forever()
 
     def handle_keepalive(self, player: PlayerEntity):
         """Decrease keepalive timer, disconnect if timed out"""
@@ -168,7 +351,7 @@ class IridiumServer():
         if player.keepalive[1] <= 0 and player.keepalive[0] == 0:
             # send keepalive to client
             player.keepalive[0] = 1 # switch to SENT_TO_CLIENT
-            player.keepalive[1] = TPS * 5 # wait for 5 seconds to receive back keepalive
+            player.keepalive[1] = self.TPS * 5 # wait for 5 seconds to receive back keepalive
             ka_packet = server_packets.KeepAlive()
             player.mcprot.write_packet(ka_packet)
             player.keepalive[2] = ka_packet.keep_alive_id # store keepalive_id
@@ -176,22 +359,71 @@ class IridiumServer():
             # player timed out sending back the keepalive
             self.disconnect_player(player, "Timed out waiting for keepalive packet")
 
-    def generate_chunk(self, x: int, z: int) -> None:
-        self.world_gen.generate_chunk_column(x, z)
+    def load_column(self, chunk_x: int, chunk_z: int) -> None:
+        """Add a missing column to the world, read from the region files or generated if it was never saved"""
+
+        column = region_db_manager.load_column(chunk_x, chunk_z)
+        if column is not None:
+            self.world.set_column(chunk_x, chunk_z, column, dirty=False)
+        else:
+            self.world_gen.generate_chunk_column(chunk_x * 16, chunk_z * 16)
+
+    def viewed_columns(self) -> set[tuple[int, int]]:
+        """Return the columns that have to stay loaded"""
+
+        viewed = set(self.spawn_columns)
+        for player in self.players.players():
+            viewed |= player.chunk_streamer.viewed
+        return viewed
+
+    def flush_player(self, player: PlayerEntity) -> None:
+        """Send the packets written to the player, disconnect it if it doesn't keep up with reading them"""
+
+        player.mcprot.flush()
+        if player.mcprot.backlog <= self.MAX_OUTBOUND_BYTES:
+            player.slow_ticks = 0
+            return
+
+        player.slow_ticks += 1
+        if player.slow_ticks == self.SLOW_CLIENT_TIMEOUT:
+            logging.warning(f"{player.name} has {player.mcprot.backlog} bytes waiting to be sent, disconnecting")
+            self.disconnect_player(player, "Too slow to receive data")
+            # the client doesn't read, so don't wait for the queued packets
+            player.mcprot.abort()
+
+    def broadcast(self, constr_packet: packet.ServerPacket, players: Iterable[PlayerEntity] | None = None) -> None:
+        """Write a packet to all players, or only to the given ones
+
+        The packet is encoded once and the same bytes are queued for every player.
+        """
+
+        if players is None:
+            players = self.players.players()
+        frame = constr_packet.frame()
+        for player in players:
+            player.mcprot.write_frame(frame)
 
     def disconnect_player(self, player: PlayerEntity, reason: str = None):
         """Cleanly disconnect the given player"""
 
         def callback(self, player, reason):
+            if not self.players.remove(player):
+                # already disconnected
+                return
+            self.entity_ids.release(player.entity_id)
+            self.spatial_index.remove(player)
+            self.entity_tracker.untrack(player)
+            self.tick_profiler.forget_player(player.name)
+            self.inbound_processor.forget_player(player)
+
             if reason is None:
                 reason = "Disconnected"
             player.mcprot.write_packet(server_packets.Disconnect(reason))
+            player.mcprot.close()
 
-            self.players.pop(str(player.uuid))
             logging.info(f"{player.name} left the game")
-            for pl in self.players.values():
-                pl.mcprot.write_packet(server_packets.ChatMesage(f"{player.name} left the game"))
-                pl.mcprot.write_packet(server_packets.PlayerListItem(player.name, False, 0))
+            self.broadcast(server_packets.ChatMesage(f"{player.name} left the game"))
+            self.broadcast(server_packets.PlayerListItem(player.name, False, 0))
 
         tick_timer.add_event(1, lambda: callback(self, player, reason))
 
@@ -199,39 +431,16 @@ class IridiumServer():
         """Clean up if server exits"""
 
         # disconnect all players
-        for player in self.players:
+        for player in self.players.players():
             self.disconnect_player(player, "Server closed")
         
+        self.chunk_workers.shutdown()
+        self.column_unloader.stop()
+        self.entity_tracker.stop()
+        EventFactory.shutdown()
+
         # save world
         logging.info("saving world...")
-        json_db_manager.save_world(self.world)
+        self.autosaver.shutdown()
+        region_db_manager.close()
         logging.info("done")
-
-    def _get_status(self) -> dict:
-        """Return a json-dict for the server list ping"""
-
-        image_path = "server/server-icon.png"
-        dataurl = None
-        if os.path.isfile(image_path):
-            with open(image_path, "rb") as fb:
-                binary_fc = fb.read()
-            base64_utf8_str = base64.b64encode(binary_fc).decode('utf-8')
-            file_ext = image_path.split('.')[-1]
-            dataurl = f'data:image/{file_ext};base64,{base64_utf8_str}'
-
-        status = {
-            "version": {
-                "name": "1.7.10",
-                "protocol": handshake_packets.DEFAULT_PROTOCOL_VERSION
-            },
-            "players": {
-                "max": self.MAX_PLAYERS,
-                "online": len(self.players),
-                "sample": []
-            },
-            "description": {
-                "text": f"IridiumMC server! - Running with Python {sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}!"
-            },
-            "favicon": dataurl or ""
-        }
-        return status
@@ -0,0 +1,88 @@
+"""The connected players and the entity ids in use"""
+
+from __future__ import annotations
+import threading
+import time
+from collections import deque
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Iterator, Mapping
+
+if TYPE_CHECKING:
+    from entities.player_entity import PlayerEntity
+
+class EntityIdAllocator():
+    """Hands out entity ids in increasing order
+
+    Released ids are reused once they were free for reuse_delay seconds, so clients that still
+    know the old entity had time to get it destroyed. Can be called from any thread.
+    """
+
+    def __init__(self, reuse_delay: float) -> None:
+        self.reuse_delay = reuse_delay
+        self._next_id = 1
+        # (release time, entity id), oldest first
+        self._released: deque[tuple[float, int]] = deque()
+        self._lock = threading.Lock()
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._released and time.monotonic() - self._released[0][0] >= self.reuse_delay:
+                return self._released.popleft()[1]
+            entity_id = self._next_id
+            self._next_id += 1
+            return entity_id
+
+    def release(self, entity_id: int) -> None:
+        with self._lock:
+            self._released.append((time.monotonic(), entity_id))
+
+class PlayerRegistry():
+    """The connected players by their uuid
+
+    Joining and leaving players take a lock and replace the mapping with a new one. Reading never locks,
+    snapshot() and players() return the current immutable mapping and tuple, which stay unchanged while
+    players join and leave, so the tick loop can iterate them from any thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # the mapping and the players in one tuple, so readers always get a matching pair
+        self._snapshot: tuple[Mapping[str, PlayerEntity], tuple[PlayerEntity, ...]] = (MappingProxyType({}), ())
+
+    def __len__(self) -> int:
+        return len(self._snapshot[1])
+
+    def __contains__(self, player_uuid: str) -> bool:
+        return player_uuid in self._snapshot[0]
+
+    def __iter__(self) -> Iterator[PlayerEntity]:
+        return iter(self._snapshot[1])
+
+    def add(self, player: PlayerEntity) -> None:
+        with self._lock:
+            by_uuid = dict(self._snapshot[0])
+            by_uuid[str(player.uuid)] = player
+            self._publish(by_uuid)
+
+    def remove(self, player: PlayerEntity) -> bool:
+        """Remove the player, return False if it wasn't registered"""
+
+        with self._lock:
+            if str(player.uuid) not in self._snapshot[0]:
+                return False
+            by_uuid = dict(self._snapshot[0])
+            del by_uuid[str(player.uuid)]
+            self._publish(by_uuid)
+            return True
+
+    def get(self, player_uuid: str) -> PlayerEntity | None:
+        return self._snapshot[0].get(player_uuid)
+
+    def snapshot(self) -> Mapping[str, PlayerEntity]:
+        return self._snapshot[0]
+
+    def players(self) -> tuple[PlayerEntity, ...]:
+        return self._snapshot[1]
+
+    def _publish(self, by_uuid: dict[str, PlayerEntity]) -> None:
+        self._snapshot = (MappingProxyType(by_uuid), tuple(by_uuid.values()))
@@ -0,0 +1,68 @@
+"""Token bucket rate limiting"""
+
+import threading
+import time
+from typing import Hashable
+
+class TokenBucket():
+    """Allows rate events per second on average and up to burst at once"""
+
+    __slots__ = ("rate", "burst", "tokens", "last")
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.perf_counter()
+
+    def take(self, now: float | None = None) -> bool:
+        """Use up one token, return False if there is none left"""
+
+        if now is None:
+            now = time.perf_counter()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+class KeyedRateLimiter():
+    """A token bucket per key, e.g. per IP address, can be called from any thread
+
+    Buckets that refilled completely are forgotten, so the number of keys stays bounded by the recent ones.
+    """
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[Hashable, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.perf_counter()
+
+        # metrics
+        self.allowed = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def allow(self, key: Hashable) -> bool:
+        now = time.perf_counter()
+        with self._lock:
+            if now - self._last_prune >= self.burst / self.rate:
+                self._prune(now)
+
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            if bucket.take(now):
+                self.allowed += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def _prune(self, now: float) -> None:
+        full_after = self.burst / self.rate
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if now - bucket.last < full_after}
+        self._last_prune = now
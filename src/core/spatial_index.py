@@ -0,0 +1,136 @@
+"""Spatial hash of the entities in the world, keyed by chunk column"""
+
+from __future__ import annotations
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dataclass.position import Position
+    from entities.entity import Entity
+
+def chunk_of(position: Position) -> tuple[int, int]:
+    """Return the coordinates of the column containing the position"""
+
+    return int(position.x // 16), int(position.z // 16)
+
+class SpatialIndex():
+    """Tracks which column each entity is in and which columns each player can see
+
+    Entities with a view_dist attribute (players) are viewers of all columns within their view distance,
+    the same square the ChunkStreamer sends. Call update() after an entity moved or changed its view distance,
+    it only does work if the entity entered another column. All methods can be called from any thread.
+    """
+
+    def __init__(self) -> None:
+        self._entities: dict[tuple[int, int], set[Entity]] = {}
+        self._viewers: dict[tuple[int, int], set[Entity]] = {}
+        # entity -> (column, view distance or None)
+        self._state: dict[Entity, tuple[tuple[int, int], int | None]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def __contains__(self, entity: Entity) -> bool:
+        return entity in self._state
+
+    def add(self, entity: Entity) -> None:
+        with self._lock:
+            if entity in self._state:
+                self._update(entity, chunk_of(entity.position), getattr(entity, "view_dist", None))
+            else:
+                self._add(entity)
+
+    def update(self, entity: Entity) -> bool:
+        """Move the entity to the column it is in now, return whether anything changed"""
+
+        column = chunk_of(entity.position)
+        view_dist = getattr(entity, "view_dist", None)
+        if self._state.get(entity) == (column, view_dist):
+            return False
+
+        with self._lock:
+            return self._update(entity, column, view_dist)
+
+    def remove(self, entity: Entity) -> None:
+        with self._lock:
+            self._remove(entity)
+
+    def entities_in_chunk(self, chunk_x: int, chunk_z: int) -> set[Entity]:
+        with self._lock:
+            return set(self._entities.get((chunk_x, chunk_z), ()))
+
+    def viewers_of_chunk(self, chunk_x: int, chunk_z: int) -> set[Entity]:
+        """Return the players that have the column within their view distance"""
+
+        with self._lock:
+            return set(self._viewers.get((chunk_x, chunk_z), ()))
+
+    def entities_in_radius(self, position: Position, radius: float) -> list[Entity]:
+        """Return the entities within the horizontal radius around the position"""
+
+        min_x, max_x = int((position.x - radius) // 16), int((position.x + radius) // 16)
+        min_z, max_z = int((position.z - radius) // 16), int((position.z + radius) // 16)
+        radius_sq = radius * radius
+        result = []
+        with self._lock:
+            for chunk_x in range(min_x, max_x + 1):
+                for chunk_z in range(min_z, max_z + 1):
+                    for entity in self._entities.get((chunk_x, chunk_z), ()):
+                        if (entity.position.x - position.x) ** 2 + (entity.position.z - position.z) ** 2 <= radius_sq:
+                            result.append(entity)
+        return result
+
+    def _add(self, entity: Entity) -> None:
+        column = chunk_of(entity.position)
+        view_dist = getattr(entity, "view_dist", None)
+        self._state[entity] = (column, view_dist)
+        self._entities.setdefault(column, set()).add(entity)
+        if view_dist is not None:
+            for coords in _square(column, view_dist):
+                self._viewers.setdefault(coords, set()).add(entity)
+
+    def _update(self, entity: Entity, column: tuple[int, int], view_dist: int | None) -> bool:
+        state = self._state.get(entity)
+        if state is None:
+            # removed in the meantime
+            return False
+        old_column, old_view_dist = state
+        if column == old_column and view_dist == old_view_dist:
+            return False
+
+        self._state[entity] = (column, view_dist)
+        if column != old_column:
+            _discard(self._entities, old_column, entity)
+            self._entities.setdefault(column, set()).add(entity)
+
+        # only touch the columns that entered or left the view
+        old_view = _square(old_column, old_view_dist) if old_view_dist is not None else set()
+        new_view = _square(column, view_dist) if view_dist is not None else set()
+        for coords in old_view - new_view:
+            _discard(self._viewers, coords, entity)
+        for coords in new_view - old_view:
+            self._viewers.setdefault(coords, set()).add(entity)
+        return True
+
+    def _remove(self, entity: Entity) -> None:
+        state = self._state.pop(entity, None)
+        if state is None:
+            return
+
+        column, view_dist = state
+        _discard(self._entities, column, entity)
+        if view_dist is not None:
+            for coords in _square(column, view_dist):
+                _discard(self._viewers, coords, entity)
+
+def _square(column: tuple[int, int], view_dist: int) -> set[tuple[int, int]]:
+    return {(column[0] + dx, column[1] + dz) for dx in range(-view_dist, view_dist + 1) for dz in range(-view_dist, view_dist + 1)}
+
+def _discard(cells: dict[tuple[int, int], set[Entity]], coords: tuple[int, int], entity: Entity) -> None:
+    cell = cells.get(coords)
+    if cell is None:
+        return
+    cell.discard(entity)
+    if not cell:
+        del cells[coords]
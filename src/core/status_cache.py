@@ -0,0 +1,96 @@
+"""Builds the server list ping response once and reuses it"""
+
+import base64
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+from network import handshake_packets, status_packets
+
+class StatusCache():
+    """Keeps the encoded StatusResponse packet until the player count, the MOTD or the favicon change
+
+    The favicon is read once and only read again if its modification time changed, which is checked
+    at most every icon_check_interval seconds. frame() can be called from any thread.
+    """
+
+    def __init__(self, icon_path: str, motd: str, max_players: int, online: Callable[[], int], icon_check_interval: float = 5.0) -> None:
+        self.icon_path = icon_path
+        self.motd = motd
+        self.max_players = max_players
+        self.online = online
+        self.icon_check_interval = icon_check_interval
+        self._lock = threading.Lock()
+        self._favicon = ""
+        self._icon_mtime: float | None = None
+        self._icon_checked = float("-inf")
+        self._key = None
+        self._frame = b""
+
+        # metrics
+        self.builds = 0
+        self.icon_loads = 0
+
+    def frame(self) -> bytes:
+        """Return the length prefixed StatusResponse packet"""
+
+        online = self.online()
+        with self._lock:
+            self._check_icon()
+            key = (online, self.max_players, self.motd, self._icon_mtime)
+            if key != self._key:
+                self._frame = status_packets.StatusResponse(self._status(online)).frame()
+                self._key = key
+                self.builds += 1
+            return self._frame
+
+    def _status(self, online: int) -> dict:
+        """Return the json-dict for the server list ping"""
+
+        return {
+            "version": {
+                "name": "1.7.10",
+                "protocol": handshake_packets.DEFAULT_PROTOCOL_VERSION
+            },
+            "players": {
+                "max": self.max_players,
+                "online": online,
+                "sample": []
+            },
+            "description": {
+                "text": self.motd
+            },
+            "favicon": self._favicon
+        }
+
+    def _check_icon(self) -> None:
+        """Reload the favicon if the file changed"""
+
+        now = time.monotonic()
+        if now - self._icon_checked < self.icon_check_interval:
+            return
+        self._icon_checked = now
+
+        try:
+            mtime = os.stat(self.icon_path).st_mtime
+        except OSError:
+            # no icon
+            self._icon_mtime = None
+            self._favicon = ""
+            return
+        if mtime == self._icon_mtime:
+            return
+
+        try:
+            with open(self.icon_path, "rb") as fb:
+                binary_fc = fb.read()
+        except OSError as err:
+            logging.warning(f"Failed to read {self.icon_path}: {err}")
+            return
+        base64_utf8_str = base64.b64encode(binary_fc).decode('utf-8')
+        file_ext = self.icon_path.split('.')[-1]
+        self._favicon = f'data:image/{file_ext};base64,{base64_utf8_str}'
+        self._icon_mtime = mtime
+        self.icon_loads += 1
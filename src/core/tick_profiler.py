@@ -0,0 +1,168 @@
+"""Measures where the time of each tick goes"""
+
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+def _percentile(sorted_values: list[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+class TickProfiler():
+    """Records the duration of each tick, its phases and the players handled in it, over the last window ticks
+
+    The tick thread calls start_tick(), add_phase() and add_player() for each part and end_tick().
+    stats() and capture() can be called from any thread.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self._tick_start = 0.0
+        self._tick_phases: dict[str, float] = {}
+        self._tick_players: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        # rolling values of the last window ticks
+        self._durations: deque[float] = deque(maxlen=window)
+        self._starts: deque[float] = deque(maxlen=window)
+        self._phases: dict[str, deque[float]] = {}
+        self._players: dict[str, deque[float]] = {}
+
+        # cProfile capture
+        self._capture_request: tuple[int, str, Future] | None = None
+        self._profile: cProfile.Profile | None = None
+        self._capture_ticks = 0
+        self._capture_path = ""
+        self._capture_future: Future | None = None
+        self.last_capture: str | None = None
+        # the top functions of the last capture
+        self.last_capture_summary = ""
+
+        # metrics
+        self.ticks = 0
+
+    def start_tick(self) -> None:
+        self._tick_start = time.perf_counter()
+        self._tick_phases = {}
+        self._tick_players = {}
+        if self._capture_request is not None and self._profile is None:
+            self._start_capture()
+
+    def add_phase(self, phase: str, seconds: float) -> None:
+        self._tick_phases[phase] = self._tick_phases.get(phase, 0.0) + seconds
+
+    def add_player(self, name: str, seconds: float) -> None:
+        self._tick_players[name] = self._tick_players.get(name, 0.0) + seconds
+
+    def end_tick(self) -> float:
+        """Store the tick's measurements, return its duration in seconds"""
+
+        duration = time.perf_counter() - self._tick_start
+        self.ticks += 1
+        with self._lock:
+            self._durations.append(duration)
+            self._starts.append(self._tick_start)
+            # phases and players missing in this tick count as 0, so the averages are per tick
+            for phase in self._phases.keys() | self._tick_phases.keys():
+                self._phases.setdefault(phase, deque(maxlen=self.window)).append(self._tick_phases.get(phase, 0.0))
+            for name in self._players.keys() | self._tick_players.keys():
+                self._players.setdefault(name, deque(maxlen=self.window)).append(self._tick_players.get(name, 0.0))
+
+        if self._profile is not None:
+            self._capture_ticks -= 1
+            if self._capture_ticks <= 0:
+                self._finish_capture()
+        return duration
+
+    def forget_player(self, name: str) -> None:
+        """Drop the measurements of a player that left"""
+
+        with self._lock:
+            self._players.pop(name, None)
+
+    def slowest_phase(self) -> tuple[str, float] | None:
+        """Return the phase that took the longest in the last tick, with its duration in seconds"""
+
+        if not self._tick_phases:
+            return None
+        return max(self._tick_phases.items(), key=lambda item: item[1])
+
+    def stats(self) -> dict:
+        """Return the tick statistics in milliseconds, the players are sorted by their average time"""
+
+        with self._lock:
+            durations = sorted(self._durations)
+            starts = list(self._starts)
+            phases = {phase: sum(values) / len(values) * 1000 for phase, values in self._phases.items()}
+            players = {name: sum(values) / len(values) * 1000 for name, values in self._players.items()}
+
+        tps = 0.0
+        if len(starts) > 1 and starts[-1] > starts[0]:
+            tps = (len(starts) - 1) / (starts[-1] - starts[0])
+        return {
+            "ticks": self.ticks,
+            "tps": tps,
+            "mspt_mean": sum(durations) / len(durations) * 1000 if durations else 0.0,
+            "mspt_p50": _percentile(durations, 50) * 1000,
+            "mspt_p95": _percentile(durations, 95) * 1000,
+            "mspt_p99": _percentile(durations, 99) * 1000,
+            "mspt_max": durations[-1] * 1000 if durations else 0.0,
+            "phases_ms": phases,
+            "players_ms": dict(sorted(players.items(), key=lambda item: item[1], reverse=True)),
+            "last_capture": self.last_capture
+        }
+
+    def capture(self, ticks: int, path: str) -> Future:
+        """Run cProfile on the tick thread for the next ticks and dump the stats to path
+
+        The future's result is the path once the capture was written, it can be read with pstats.
+        """
+
+        future = Future()
+        with self._lock:
+            if self._capture_request is not None or self._profile is not None:
+                future.set_exception(RuntimeError("A capture is already running"))
+                return future
+            self._capture_request = (ticks, path, future)
+        return future
+
+    def _start_capture(self) -> None:
+        with self._lock:
+            self._capture_ticks, self._capture_path, self._capture_future = self._capture_request
+            self._capture_request = None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as err:
+            # another profiler is active on this thread
+            self._capture_future.set_exception(err)
+            self._capture_future = None
+            return
+        self._profile = profile
+
+    def _finish_capture(self) -> None:
+        self._profile.disable()
+        profile = self._profile
+        future = self._capture_future
+        try:
+            profile.dump_stats(self._capture_path)
+        except OSError as err:
+            logging.warning(f"Failed to write tick profile to {self._capture_path}: {err}")
+            future.set_exception(err)
+        else:
+            summary = io.StringIO()
+            pstats.Stats(profile, stream=summary).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(20)
+            logging.info(f"Wrote tick profile to {self._capture_path}")
+            self.last_capture = self._capture_path
+            self.last_capture_summary = summary.getvalue()
+            future.set_result(self._capture_path)
+        finally:
+            self._profile = None
+            self._capture_future = None
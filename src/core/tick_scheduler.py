@@ -0,0 +1,78 @@
+"""Paces the game loop at a fixed number of ticks per second"""
+
+import logging
+import time
+
+# what to do with ticks that are late because the server is overloaded
+CATCH_UP = "catch_up" # run them right away, up to max_catch_up ticks, then skip the rest
+SKIP = "skip" # skip them and continue with the next tick on time
+
+class TickScheduler():
+    """Waits for the deadline of each tick on the monotonic clock
+
+    The deadlines are absolute, tick n is due interval * n after the start, so the time a tick takes
+    and the inaccuracy of sleep() don't add up over many ticks. The tps can be changed at any time,
+    from any thread, it applies from the next tick on.
+    """
+
+    def __init__(self, tps: float, policy: str = CATCH_UP, max_catch_up: int = 40) -> None:
+        if policy not in (CATCH_UP, SKIP):
+            raise ValueError(f"Unknown overload policy {policy}")
+
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.tps = tps
+        self._deadline: float | None = None
+
+        # metrics
+        self.late_ticks = 0
+        self.skipped_ticks = 0
+
+    @property
+    def tps(self) -> float:
+        return self._tps
+
+    @tps.setter
+    def tps(self, tps: float) -> None:
+        if tps <= 0:
+            raise ValueError(f"tps has to be positive, got {tps}")
+        self._tps = tps
+        self.interval = 1 / tps
+
+    def wait(self) -> None:
+        """Return when the next tick is due, call it after each tick"""
+
+        now = time.perf_counter()
+        if self._deadline is None:
+            # the first tick ran right away
+            self._deadline = now
+        self._deadline += self.interval
+
+        if now < self._deadline:
+            time.sleep(self._deadline - now)
+            return
+
+        self.late_ticks += 1
+        # ticks that are already due, including the next one
+        due = int((now - self._deadline) / self.interval) + 1
+        if self.policy == CATCH_UP:
+            if due <= self.max_catch_up:
+                return
+            skipped = due - self.max_catch_up
+        else:
+            skipped = due
+
+        # move the deadline along the tick grid, past the skipped ticks
+        self._deadline += skipped * self.interval
+        self.skipped_ticks += skipped
+        logging.warning(f"Can't keep up, skipping {skipped} ticks ({int(skipped * self.interval * 1000)} ms behind)")
+        if self.policy == SKIP:
+            time.sleep(max(0.0, self._deadline - time.perf_counter()))
+
+    def stats(self) -> dict:
+        return {
+            "tps": self.tps,
+            "policy": self.policy,
+            "late_ticks": self.late_ticks,
+            "skipped_ticks": self.skipped_ticks
+        }
@@ -1,28 +1,118 @@
-import uuid
+"""Runs callbacks after a number of ticks
 
-_events = []
+The events are kept in a hierarchical timing wheel. The near wheel has a slot for each of the next
+WHEEL_SIZE ticks. The far wheel has a slot for each of the next WHEEL_SIZE rounds of the near wheel,
+and its events move down into the near wheel when their round starts. Adding and removing an event
+is O(1), and a tick only touches the events that are due.
+"""
 
-def add_event(ticks_remaining: int, callback) -> str:
-    event_id = str(uuid.uuid4())
-    _events.append([ticks_remaining, callback, event_id])
-    return event_id
+import itertools
+import logging
+import threading
+from typing import Callable
 
-def remove_event(event_id: str) -> bool:
-    c = 0
-    while c < len(_events):
-        if _events[c][2] == event_id:
-            _events.pop(c)
+WHEEL_BITS = 9
+WHEEL_SIZE = 1 << WHEEL_BITS
+
+class _Event():
+    __slots__ = ("event_id", "due", "callback", "interval", "slot")
+
+    def __init__(self, event_id: int, due: int, callback: Callable[[], None], interval: int | None) -> None:
+        self.event_id = event_id
+        self.due = due
+        self.callback = callback
+        self.interval = interval
+        # the wheel slot the event is in
+        self.slot: dict[int, "_Event"] | None = None
+
+class TimingWheel():
+    """Schedules callbacks on future ticks, add_event() and remove_event() can be called from any thread"""
+
+    def __init__(self) -> None:
+        self.current_tick = 0
+        self._near: list[dict[int, _Event]] = [{} for _ in range(WHEEL_SIZE)]
+        self._far: list[dict[int, _Event]] = [{} for _ in range(WHEEL_SIZE)]
+        self._events: dict[int, _Event] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def add_event(self, ticks_remaining: int, callback: Callable[[], None], interval: int | None = None) -> int:
+        """Run the callback after ticks_remaining ticks, and then every interval ticks if given
+
+        Returns the id to pass to remove_event(). Events added while a tick runs callbacks run on a later tick.
+        """
+
+        if interval is not None and interval < 1:
+            raise ValueError(f"interval has to be at least 1, got {interval}")
+
+        with self._lock:
+            event = _Event(next(self._ids), self.current_tick + max(ticks_remaining, 1), callback, interval)
+            self._events[event.event_id] = event
+            self._schedule(event)
+        return event.event_id
+
+    def remove_event(self, event_id: int) -> bool:
+        """Cancel an event, return False if it already ran or doesn't exist"""
+
+        with self._lock:
+            event = self._events.pop(event_id, None)
+            if event is None:
+                return False
+            del event.slot[event_id]
             return True
-        c += 1
-    return False
+
+    def tick(self) -> None:
+        """Advance by one tick and run the callbacks that are due"""
+
+        with self._lock:
+            self.current_tick += 1
+            if self.current_tick & (WHEEL_SIZE - 1) == 0:
+                self._cascade()
+
+            slot = self._near[self.current_tick & (WHEEL_SIZE - 1)]
+            due = list(slot.values())
+            slot.clear()
+            for event in due:
+                if event.interval is not None:
+                    event.due += event.interval
+                    self._schedule(event)
+                else:
+                    del self._events[event.event_id]
+
+        for event in due:
+            try:
+                event.callback()
+            except Exception:
+                logging.exception(f"Scheduled event {event.event_id} failed")
+
+    def _schedule(self, event: _Event) -> None:
+        if event.due - self.current_tick < WHEEL_SIZE:
+            slot = self._near[event.due & (WHEEL_SIZE - 1)]
+        else:
+            slot = self._far[(event.due >> WHEEL_BITS) & (WHEEL_SIZE - 1)]
+        slot[event.event_id] = event
+        event.slot = slot
+
+    def _cascade(self) -> None:
+        """Move the events due in the near wheel's new round down from the far wheel"""
+
+        far = self._far[(self.current_tick >> WHEEL_BITS) & (WHEEL_SIZE - 1)]
+        for event in list(far.values()):
+            # events more than a full far wheel ahead stay for a later round
+            if event.due - self.current_tick < WHEEL_SIZE:
+                del far[event.event_id]
+                self._schedule(event)
+
+_wheel = TimingWheel()
+
+def add_event(ticks_remaining: int, callback: Callable[[], None], interval: int | None = None) -> int:
+    return _wheel.add_event(ticks_remaining, callback, interval)
+
+def remove_event(event_id: int) -> bool:
+    return _wheel.remove_event(event_id)
 
 def tick() -> None:
-    c = 0
-    while c < len(_events):
-        _events[c][0] -= 1
-        if _events[c][0] <= 0:
-            _events[c][1]()
-            _events.pop(c)
-            c -= 1
-        
-        c += 1
+    _wheel.tick()
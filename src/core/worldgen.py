@@ -1,16 +1,154 @@
+import math
+
 from dataclass.position import Position
-from dataclass.save import World
-from blocks import tnt, log
+from dataclass.save import SECTION_VOLUME, World, Chunk, ChunkColumn
+from blocks import air, bedrock, dirt, grass, log, sand, stone, water
+
+# superflat preset, "version;layers;biome;structures", layers as "[count x]block_id[:metadata]" from the bottom up
+DEFAULT_FLAT_PRESET = f"2;6x{log.Log.block_id};1;"
+
+class FlatGenerator():
+    """Generates layered flat columns from a superflat preset string
+
+    Each section is built once, generating a column only copies the finished arrays.
+    """
+
+    def __init__(self, preset: str = DEFAULT_FLAT_PRESET) -> None:
+        self.preset = preset
+        parts = preset.split(";")
+        if len(parts) < 2:
+            raise ValueError(f"Invalid flat preset {preset}")
+
+        layers = []
+        for layer in parts[1].split(","):
+            count = 1
+            if "x" in layer:
+                count, layer = layer.split("x")
+                count = int(count)
+            block_id, _, metadata = layer.partition(":")
+            layers.extend([(int(block_id), int(metadata or 0))] * count)
+        if len(layers) > 256:
+            raise ValueError(f"Flat preset {preset} has more than 256 layers")
+
+        self.biome = int(parts[2]) if len(parts) > 2 and parts[2] else 1
+
+        # build the template sections
+        self._sections: dict[int, Chunk] = {}
+        for y, (block_id, metadata) in enumerate(layers):
+            if block_id == air.Air.block_id:
+                continue
+            if y >> 4 not in self._sections:
+                self._sections[y >> 4] = Chunk()
+            section = self._sections[y >> 4]
+            start = (y & 15) << 8
+            section.blocks[start:start + 256] = bytes([block_id]) * 256
+            section.metadata[start >> 1:(start + 256) >> 1] = bytes([metadata | (metadata << 4)]) * 128
+
+    def generate_column(self, chunk_x: int, chunk_z: int, column: ChunkColumn) -> None:
+        for c, template in self._sections.items():
+            if c not in column.chunks:
+                column.chunks[c] = Chunk()
+            column.chunks[c].blocks[:] = template.blocks
+            column.chunks[c].metadata[:] = template.metadata
+        column.biomes[:] = bytes([self.biome]) * 256
+
+class NoiseGenerator():
+    """Generates hilly terrain from a seeded heightmap of layered value noise"""
+
+    SEA_LEVEL = 62
+    BASE_HEIGHT = 64
+    # (wavelength in blocks, amplitude in blocks)
+    OCTAVES = ((128, 24), (64, 10), (32, 5), (16, 2))
+
+    def __init__(self, seed: int = 0) -> None:
+        self.seed = seed
+        # the same height always results in the same vertical strip of blocks
+        self._pillars: dict[int, bytes] = {}
+
+    def heightmap(self, chunk_x: int, chunk_z: int) -> list[int]:
+        """Return the terrain height of the 256 block columns, indexed by (z << 4) | x"""
+
+        heights = [float(self.BASE_HEIGHT)] * 256
+        for octave, (wavelength, amplitude) in enumerate(self.OCTAVES):
+            lattice = {}
+            for z in range(16):
+                world_z = (chunk_z * 16 + z) / wavelength
+                cell_z = math.floor(world_z)
+                fz = _smoothstep(world_z - cell_z)
+                for x in range(16):
+                    world_x = (chunk_x * 16 + x) / wavelength
+                    cell_x = math.floor(world_x)
+                    fx = _smoothstep(world_x - cell_x)
+
+                    corners = []
+                    for corner in ((cell_x, cell_z), (cell_x + 1, cell_z), (cell_x, cell_z + 1), (cell_x + 1, cell_z + 1)):
+                        if corner not in lattice:
+                            lattice[corner] = _lattice_value(self.seed + octave, *corner)
+                        corners.append(lattice[corner])
+                    top = corners[0] + (corners[1] - corners[0]) * fx
+                    bottom = corners[2] + (corners[3] - corners[2]) * fx
+                    heights[(z << 4) | x] += (top + (bottom - top) * fz) * amplitude
+        return [min(max(int(height), 1), 250) for height in heights]
+
+    def generate_column(self, chunk_x: int, chunk_z: int, column: ChunkColumn) -> None:
+        heights = self.heightmap(chunk_x, chunk_z)
+        top_section = max(max(heights), self.SEA_LEVEL) >> 4
+
+        for c in range(top_section + 1):
+            if c not in column.chunks:
+                column.chunks[c] = Chunk()
+            blocks = column.chunks[c].blocks
+            # every block column is a strided slice of the section array
+            for index, height in enumerate(heights):
+                blocks[index:SECTION_VOLUME:256] = self._pillar(height)[c << 4:(c + 1) << 4]
+
+    def _pillar(self, height: int) -> bytes:
+        """Return the 256 block ids of a block column with the given terrain height"""
+
+        pillar = self._pillars.get(height)
+        if pillar is None:
+            if height >= self.SEA_LEVEL:
+                top = [dirt.Dirt.block_id] * 3 + [grass.Grass.block_id]
+            else:
+                top = [sand.Sand.block_id] * 4
+            blocks = [bedrock.Bedrock.block_id] + [stone.Stone.block_id] * (height - 4) + top
+            blocks += [water.Water.block_id] * max(self.SEA_LEVEL + 1 - len(blocks), 0)
+            pillar = self._pillars[height] = bytes(blocks).ljust(256, b"\x00")
+        return pillar
+
+def _smoothstep(t: float) -> float:
+    return t * t * (3 - 2 * t)
+
+def _lattice_value(seed: int, x: int, z: int) -> float:
+    """Return a pseudo random value in [-1, 1) for a lattice point"""
+
+    h = (x * 374761393 + z * 668265263 + seed * 2147483647) & 0xFFFFFFFF
+    h = ((h ^ (h >> 13)) * 1274126177) & 0xFFFFFFFF
+    h ^= h >> 16
+    return h / 2147483648.0 - 1.0
 
 class WorldGenerator():
-    def __init__(self, level_type, world: World) -> None:
+    def __init__(self, level_type, world: World, seed: int = 0, flat_preset: str = DEFAULT_FLAT_PRESET) -> None:
         self._level_type = level_type
         self._world = world
-    
+        self.seed = seed
+        self.flat_preset = flat_preset
+
+        if self._level_type == "flat":
+            self._generator = FlatGenerator(flat_preset)
+        elif self._level_type == "default":
+            self._generator = NoiseGenerator(seed)
+        else:
+            raise ValueError(f"Unknown level type {level_type}")
+
     @property
     def world(self) -> World:
         return self._world
 
+    @property
+    def level_type(self) -> str:
+        return self._level_type
+
     def generate_start_region(self, position: Position):
         for x in range(-(4*16), 4*16, 16):
             for z in range(-(4*16), 4*16, 16):
@@ -21,10 +159,12 @@ class WorldGenerator():
         if self.world.chunk_exists(start_pos_x//16, start_pos_z//16):
             return
 
-        if self._level_type == "flat":
-            for y in range(256):
-                for x in range(16):
-                    for z in range(16):
-                        if (y) <= 5:
-                            block_pos = Position(start_pos_x + x, y, start_pos_z + z)
-                            self.world.set_block(block_pos, log.Log())
+        self.world.set_column(start_pos_x//16, start_pos_z//16, self.generate_column(start_pos_x//16, start_pos_z//16))
+
+    def generate_column(self, chunk_x: int, chunk_z: int, column: ChunkColumn = None) -> ChunkColumn:
+        """Generate a column without touching the world, so it can run on any thread or process"""
+
+        if column is None:
+            column = ChunkColumn()
+        self._generator.generate_column(chunk_x, chunk_z, column)
+        return column
@@ -4,7 +4,7 @@ import os
 
 from dataclass.save import World, Chunk
 from dataclass.position import Position
-from blocks import block, log, tnt
+from blocks import block, block_registry
 
 SAVEPATH = "server/world.json"
 
@@ -47,33 +47,27 @@ def load_world() -> World:
         for y, r2 in r1.items():
             for z, stored_block in r2.items():
                 block_obj = _json_to_block(stored_block)
-                if block_obj is not None:
-                    pos = Position(int(x), int(y), int(z))
-                    world.set_block(pos, block_obj)
+                world.set_block_id(int(x), int(y), int(z), block_obj.block_id, block_obj.metadata)
     
     return world
 
 def _save_chunk(storage: dict, chunk: Chunk, dx: int, dy: int, dz: int) -> None:
-    for encstr, block_obj in chunk.blocks.items():
-        pos = chunk._encstr_to_pos(encstr)
-        pos = Position(pos.x + dx, pos.y + dy, pos.z + dz)
+    for index, block_id in enumerate(chunk.blocks):
+        # air is the default, no need to store it
+        if block_id == 0:
+            continue
+        pos = Position((index & 15) + dx, (index >> 8) + dy, ((index >> 4) & 15) + dz)
         if not pos.x in storage.keys():
             storage[pos.x] = {}
         if not pos.y in storage[pos.x].keys():
             storage[pos.x][pos.y] = {}
-        storage[pos.x][pos.y][pos.z] = _block_to_json(block_obj)
+        storage[pos.x][pos.y][pos.z] = _block_to_json(block_id, chunk.get_block_metadata(pos.x - dx, pos.y - dy, pos.z - dz))
 
-def _block_to_json(block_obj: block.Block) -> dict:
-    stored = {"id": block_obj.block_id}
+def _block_to_json(block_id: int, metadata: int) -> dict:
+    stored = {"id": block_id}
+    if metadata:
+        stored["meta"] = metadata
     return stored
 
-def _json_to_block(stored: dict) -> block.Block | None:
-    block_id = stored["id"]
-    block_obj = None
-
-    if block_id == 17:
-        block_obj = log.Log()
-    elif block_id == 46:
-        block_obj = tnt.TNT()
-    
-    return block_obj
+def _json_to_block(stored: dict) -> block.Block:
+    return block_registry.get(stored["id"], stored.get("meta", 0))
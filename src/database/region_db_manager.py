@@ -0,0 +1,241 @@
+"""Stores the world in region files, each holding 32x32 compressed chunk columns
+
+A region file starts with a header of 1024 entries, one per column, each holding the sector
+offset and the byte length of the column's compressed data. Columns are read on their own
+through a memory-mapped view of the file. New column data is always written to free sectors
+before its header entry is updated, so a crash leaves either the old or the new column behind.
+"""
+
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+
+from dataclass.save import World, ChunkColumn
+from database import json_db_manager
+
+REGION_PATH = "server/region"
+
+REGION_SIZE = 32
+SECTOR_SIZE = 4096
+HEADER_ENTRY = struct.Struct(">II") # sector offset, byte length
+HEADER_SIZE = REGION_SIZE * REGION_SIZE * HEADER_ENTRY.size
+HEADER_SECTORS = HEADER_SIZE // SECTOR_SIZE
+
+COLUMN_FORMAT_VERSION = 1
+COLUMN_HEADER = struct.Struct(">BH") # format version, primary bitmap
+
+_REGION_NAME = re.compile(r"^r\.(-?\d+)\.(-?\d+)\.region$")
+
+_regions: dict[tuple[int, int], "RegionFile"] = {}
+_regions_lock = threading.Lock()
+
+class RegionFile():
+    """A single region file, safe to use from multiple threads"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+        if not os.path.isfile(path):
+            with open(path, "wb") as file:
+                file.write(bytes(HEADER_SIZE))
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._header = bytearray(self._map[:HEADER_SIZE])
+
+        # one byte per sector, 1 if it is in use
+        self._used = bytearray(b"\x01" * HEADER_SECTORS)
+        for index in range(REGION_SIZE * REGION_SIZE):
+            offset, length = HEADER_ENTRY.unpack_from(self._header, index * HEADER_ENTRY.size)
+            if length:
+                self._mark(offset, _sectors(length), 1)
+
+    def has_column(self, chunk_x: int, chunk_z: int) -> bool:
+        with self._lock:
+            return HEADER_ENTRY.unpack_from(self._header, _entry_offset(chunk_x, chunk_z))[1] != 0
+
+    def columns(self) -> list[tuple[int, int]]:
+        """Return the region-local coordinates of all stored columns"""
+
+        with self._lock:
+            return [(index % REGION_SIZE, index // REGION_SIZE) for index in range(REGION_SIZE * REGION_SIZE)
+                    if HEADER_ENTRY.unpack_from(self._header, index * HEADER_ENTRY.size)[1]]
+
+    def read_column(self, chunk_x: int, chunk_z: int) -> ChunkColumn | None:
+        """Read and decompress a single column, or return None if it isn't stored"""
+
+        with self._lock:
+            offset, length = HEADER_ENTRY.unpack_from(self._header, _entry_offset(chunk_x, chunk_z))
+            if not length:
+                return None
+            start = offset * SECTOR_SIZE
+            if start + length > len(self._map):
+                # the file grew since it was mapped
+                self._map.close()
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            compressed = self._map[start:start + length]
+
+        data = zlib.decompress(compressed)
+        version, primary_bitmap = COLUMN_HEADER.unpack_from(data)
+        if version != COLUMN_FORMAT_VERSION:
+            raise ValueError(f"Unsupported column format version {version} in {self.path}")
+        return ChunkColumn.deserialize(memoryview(data)[COLUMN_HEADER.size:], primary_bitmap)
+
+    def write_columns(self, columns: list[tuple[int, int, bytes]]) -> None:
+        """Write already encoded columns, given as (chunk_x, chunk_z, encode_column(...)) tuples
+
+        All data is written and synced before any header entry changes.
+        """
+
+        with self._lock:
+            entries = []
+            for chunk_x, chunk_z, compressed in columns:
+                count = _sectors(len(compressed))
+                offset = self._used.find(bytes(count), HEADER_SECTORS)
+                if offset == -1:
+                    offset = len(self._used)
+                self._mark(offset, count, 1)
+                self._file.seek(offset * SECTOR_SIZE)
+                self._file.write(compressed)
+                entries.append((_entry_offset(chunk_x, chunk_z), offset, len(compressed)))
+            self._sync()
+
+            freed = []
+            for entry_offset, offset, length in entries:
+                freed.append(HEADER_ENTRY.unpack_from(self._header, entry_offset))
+                HEADER_ENTRY.pack_into(self._header, entry_offset, offset, length)
+                self._file.seek(entry_offset)
+                self._file.write(self._header[entry_offset:entry_offset + HEADER_ENTRY.size])
+            self._sync()
+
+            # the old data is only unreferenced now
+            for offset, length in freed:
+                if length:
+                    self._mark(offset, _sectors(length), 0)
+
+    def close(self) -> None:
+        with self._lock:
+            self._map.close()
+            self._file.close()
+
+    def _mark(self, offset: int, count: int, value: int) -> None:
+        if offset + count > len(self._used):
+            self._used.extend(bytes(offset + count - len(self._used)))
+        self._used[offset:offset + count] = bytes([value]) * count
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+def _sectors(length: int) -> int:
+    return (length + SECTOR_SIZE - 1) // SECTOR_SIZE
+
+def _entry_offset(chunk_x: int, chunk_z: int) -> int:
+    return ((chunk_x % REGION_SIZE) + (chunk_z % REGION_SIZE) * REGION_SIZE) * HEADER_ENTRY.size
+
+def _get_region(chunk_x: int, chunk_z: int, create: bool) -> RegionFile | None:
+    region_coords = (chunk_x // REGION_SIZE, chunk_z // REGION_SIZE)
+    with _regions_lock:
+        region = _regions.get(region_coords)
+        if region is None:
+            path = os.path.join(REGION_PATH, f"r.{region_coords[0]}.{region_coords[1]}.region")
+            if not create and not os.path.isfile(path):
+                return None
+            os.makedirs(REGION_PATH, exist_ok=True)
+            region = _regions[region_coords] = RegionFile(path)
+        return region
+
+def encode_column(column: ChunkColumn) -> bytes:
+    """Return the compressed region data of a column"""
+
+    return encode_data(*column.serialize())
+
+def encode_data(data: bytes, primary_bitmap: int) -> bytes:
+    """Return the compressed region data for the output of ChunkColumn.serialize()"""
+
+    return zlib.compress(COLUMN_HEADER.pack(COLUMN_FORMAT_VERSION, primary_bitmap) + data)
+
+def load_column(chunk_x: int, chunk_z: int) -> ChunkColumn | None:
+    """Read a single column, or return None if it was never saved"""
+
+    region = _get_region(chunk_x, chunk_z, create=False)
+    if region is None:
+        return None
+    return region.read_column(chunk_x, chunk_z)
+
+def column_exists(chunk_x: int, chunk_z: int) -> bool:
+    region = _get_region(chunk_x, chunk_z, create=False)
+    return region is not None and region.has_column(chunk_x, chunk_z)
+
+def save_columns(columns: list[tuple[int, int, bytes]]) -> None:
+    """Save (chunk_x, chunk_z, encode_column(...)) tuples, grouped by region file"""
+
+    by_region: dict[tuple[int, int], list[tuple[int, int, bytes]]] = {}
+    for column in columns:
+        by_region.setdefault((column[0] // REGION_SIZE, column[1] // REGION_SIZE), []).append(column)
+    for region_columns in by_region.values():
+        _get_region(region_columns[0][0], region_columns[0][1], create=True).write_columns(region_columns)
+
+def save_column(chunk_x: int, chunk_z: int, column: ChunkColumn) -> None:
+    save_columns([(chunk_x, chunk_z, encode_column(column))])
+
+def save_world(world: World) -> None:
+    columns = []
+    for chunk_x, row in world.chunk_columns.items():
+        for chunk_z, column in row.items():
+            if column is not None:
+                columns.append((chunk_x, chunk_z, encode_column(column)))
+    save_columns(columns)
+    world.dirty_columns.clear()
+
+def open_world() -> World:
+    """Return an empty world, its columns are read with load_column() once they are needed"""
+
+    _migrate_if_needed()
+    return World(0)
+
+def load_world() -> World:
+    """Return a world with all saved columns in memory"""
+
+    world = World(0)
+    _migrate_if_needed()
+
+    if not os.path.isdir(REGION_PATH):
+        return world
+
+    for file_name in os.listdir(REGION_PATH):
+        match = _REGION_NAME.match(file_name)
+        if match is None:
+            continue
+        region_x, region_z = int(match.group(1)), int(match.group(2))
+        region = _get_region(region_x * REGION_SIZE, region_z * REGION_SIZE, create=False)
+        for local_x, local_z in region.columns():
+            chunk_x = region_x * REGION_SIZE + local_x
+            chunk_z = region_z * REGION_SIZE + local_z
+            world.set_column(chunk_x, chunk_z, region.read_column(chunk_x, chunk_z), dirty=False)
+
+    return world
+
+def close() -> None:
+    """Close all open region files"""
+
+    with _regions_lock:
+        for region in _regions.values():
+            region.close()
+        _regions.clear()
+
+def _migrate_if_needed() -> None:
+    if not os.path.isdir(REGION_PATH) and os.path.isfile(json_db_manager.SAVEPATH):
+        _migrate_json_world()
+
+def _migrate_json_world() -> None:
+    """Convert a world saved by json_db_manager into region files"""
+
+    logging.info(f"converting {json_db_manager.SAVEPATH} to region files...")
+    save_world(json_db_manager.load_world())
+    os.rename(json_db_manager.SAVEPATH, json_db_manager.SAVEPATH + ".old")
+    logging.info("done")
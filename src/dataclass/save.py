@@ -1,142 +1,302 @@
 from __future__ import annotations
 from collections import defaultdict
-import zlib
+from concurrent.futures import Future
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Iterable
 
 if TYPE_CHECKING:
     from core.iridium_server import IridiumServer
-from core import server_provider
+from core.chunk_cache import ChunkPacketCache, CompressedColumn, build_bulk_payload, compress_column
 from dataclass.position import Position
+from blocks import block_registry
 from blocks.air import Air
 from blocks.block import Block
-from core import binary_operations
+
+SECTION_VOLUME = 16 * 16 * 16
+# blocks, metadata, block light and sky light of one section
+SECTION_BUFFER_SIZE = SECTION_VOLUME + 3 * (SECTION_VOLUME // 2)
+# 16 sections followed by the biomes
+COLUMN_BUFFER_SIZE = 16 * SECTION_BUFFER_SIZE + 256
+
+_EMPTY_SECTION = bytes(SECTION_VOLUME)
 
 @dataclass
 class Chunk():
-    blocks: dict[int, Block|None] = field(default_factory=lambda: {})
+    """A 16x16x16 section, stored as a block id array and nibble arrays for metadata and light
+
+    Blocks are indexed by (y << 8) | (z << 4) | x, the metadata of even indices is stored in the low nibble.
+    """
+
+    blocks: bytearray | memoryview = field(default_factory=lambda: bytearray(SECTION_VOLUME))
+    metadata: bytearray | memoryview = field(default_factory=lambda: bytearray(SECTION_VOLUME // 2))
+    block_light: bytearray | memoryview = field(default_factory=lambda: bytearray(SECTION_VOLUME // 2))
+    sky_light: bytearray | memoryview = field(default_factory=lambda: bytearray(b"\xff" * (SECTION_VOLUME // 2)))
+
+    def get_block_id(self, x: int, y: int, z: int) -> int:
+        return self.blocks[(y << 8) | (z << 4) | x]
+
+    def get_block_metadata(self, x: int, y: int, z: int) -> int:
+        index = (y << 8) | (z << 4) | x
+        if index & 1:
+            return self.metadata[index >> 1] >> 4
+        return self.metadata[index >> 1] & 0x0F
+
+    def set_block_id(self, x: int, y: int, z: int, block_id: int, metadata: int = 0) -> None:
+        index = (y << 8) | (z << 4) | x
+        self.blocks[index] = block_id
+        nibbles = self.metadata[index >> 1]
+        if index & 1:
+            self.metadata[index >> 1] = (nibbles & 0x0F) | ((metadata & 0x0F) << 4)
+        else:
+            self.metadata[index >> 1] = (nibbles & 0xF0) | (metadata & 0x0F)
 
     def set_block(self, pos: Position, block: Block) -> None:
-        self.blocks[self._pos_to_encstr(pos)] = block
+        self.set_block_id(int(pos.x), int(pos.y), int(pos.z), block.block_id, block.metadata)
 
     def get_block(self, pos: Position) -> Block:
-        block_pos = self._pos_to_encstr(pos)
-        if not block_pos in self.blocks.keys():
-            return Air()
-        return self.blocks[self._pos_to_encstr(pos)]
-
-    def to_packet_data(self) -> tuple[bytes, bytes, bytes, bytes, bytes, bytes]:
-        block_types = []
-        block_metadatas = []
-        block_lights = []
-        sky_lights = []
-        adds = []
-        biomes = []
-
-        for chunk_c in range(16):
-            for y in range(chunk_c, chunk_c + 16):
-                for z in range(16):
-                    for x in range(16):
-                        block_types.append(self.get_block(Position(x, y, z)).block_id)
-                        block_metadatas.append(0b0110) # broken
-                        block_lights.append(0b100) # can't check if its working
-                        sky_lights.append(0b1111)
-                        adds.append(0b0000)
-                    biomes.append(1)
-
-        block_type = b""
-        block_metadata = b""
-        block_light = b""
-        sky_light = b""
-        add = b""
-        biome = b""
-        for c in range(len(block_types)):
-            block_type += binary_operations._encode_byte(block_types[c])
-            if c % 2 != 0:
-                block_metadata += binary_operations._encode_nibbles(block_metadatas[c-1], block_metadatas[c])
-                block_light += binary_operations._encode_nibbles(block_lights[c-1], block_lights[c])
-                sky_light += binary_operations._encode_nibbles(sky_lights[c-1], sky_lights[c])
-                # add += binary_operations._encode_nibbles(adds[c-1], adds[c])
-            if c % 16 == 0:
-                biome += binary_operations._encode_byte(biomes[int(c/16)])
-
-        return (block_type, block_metadata, block_light, sky_light, add, biome)
-
-    def _pos_to_encstr(self, pos: Position) -> str:
-        return f"{pos.x}|{pos.y}|{pos.z}"
-
-    def _encstr_to_pos(self, value: str) -> Position:
-        x, y, z = value.split("|")
-        return Position(int(x), int(y), int(z))
+        x, y, z = int(pos.x), int(pos.y), int(pos.z)
+        return block_registry.get(self.get_block_id(x, y, z), self.get_block_metadata(x, y, z))
+
+    def is_empty(self) -> bool:
+        return self.blocks == _EMPTY_SECTION
+
+    def to_packet_data(self) -> tuple[bytearray, bytearray, bytearray, bytearray]:
+        """Return the block type, metadata, block light and sky light arrays
+
+        The arrays are already stored in the 1.7.10 wire layout, so no per-block encoding is needed.
+        """
+
+        return (self.blocks, self.metadata, self.block_light, self.sky_light)
 
 @dataclass
 class ChunkColumn():
     chunks: dict[int, Chunk] = field(default_factory=lambda: {})
+    biomes: bytearray | memoryview = field(default_factory=lambda: bytearray(b"\x01" * 256)) # plains
+    # incremented on every block change, to detect stale copies of the column
+    version: int = field(default=0, compare=False)
+
+    @classmethod
+    def from_buffer(cls, buffer: memoryview, sections: Iterable[int] = range(16), initialize: bool = False) -> ChunkColumn:
+        """Create a column whose arrays are views into a buffer of COLUMN_BUFFER_SIZE bytes, e.g. shared memory
+
+        If initialize is set, the light and biome arrays of the buffer are set to their defaults first.
+        """
+
+        chunks = {}
+        for c in sections:
+            offset = c * SECTION_BUFFER_SIZE
+            nibbles = offset + SECTION_VOLUME
+            chunk = Chunk(blocks=buffer[offset:nibbles],
+                          metadata=buffer[nibbles:nibbles + SECTION_VOLUME // 2],
+                          block_light=buffer[nibbles + SECTION_VOLUME // 2:nibbles + SECTION_VOLUME],
+                          sky_light=buffer[nibbles + SECTION_VOLUME:nibbles + 3 * (SECTION_VOLUME // 2)])
+            if initialize:
+                chunk.sky_light[:] = b"\xff" * (SECTION_VOLUME // 2)
+            chunks[c] = chunk
+        column = cls(chunks=chunks, biomes=buffer[16 * SECTION_BUFFER_SIZE:COLUMN_BUFFER_SIZE])
+        if initialize:
+            column.biomes[:] = b"\x01" * 256
+        return column
+
+    def copy(self) -> ChunkColumn:
+        """Return a column with its own copies of the arrays, e.g. to keep a column created with from_buffer()"""
+
+        chunks = {c: Chunk(blocks=bytearray(chunk.blocks), metadata=bytearray(chunk.metadata),
+                           block_light=bytearray(chunk.block_light), sky_light=bytearray(chunk.sky_light))
+                  for c, chunk in self.chunks.items()}
+        return ChunkColumn(chunks=chunks, biomes=bytearray(self.biomes), version=self.version)
+
+    def release(self) -> None:
+        """Release the views of a column created with from_buffer()"""
+
+        for chunk in self.chunks.values():
+            for array in (chunk.blocks, chunk.metadata, chunk.block_light, chunk.sky_light):
+                if isinstance(array, memoryview):
+                    array.release()
+        if isinstance(self.biomes, memoryview):
+            self.biomes.release()
+
+    def get_block_id(self, x: int, y: int, z: int) -> int:
+        chunk = self.chunks.get(y >> 4)
+        if chunk is None:
+            return Air.block_id
+        return chunk.blocks[((y & 15) << 8) | (z << 4) | x]
+
+    def get_block_metadata(self, x: int, y: int, z: int) -> int:
+        chunk = self.chunks.get(y >> 4)
+        if chunk is None:
+            return 0
+        return chunk.get_block_metadata(x, y & 15, z)
+
+    def set_block_id(self, x: int, y: int, z: int, block_id: int, metadata: int = 0) -> None:
+        chunk = self.chunks.get(y >> 4)
+        if chunk is None:
+            chunk = self.chunks[y >> 4] = Chunk()
+        chunk.set_block_id(x, y & 15, z, block_id, metadata)
+        self.version += 1
 
     def get_block(self, pos: Position) -> Block:
-        if not (pos.y//16) in self.chunks:
-            return Air()
-        return self.chunks[pos.y//16].get_block(Position(pos.x, pos.y%16, pos.z))
+        x, y, z = int(pos.x), int(pos.y), int(pos.z)
+        return block_registry.get(self.get_block_id(x, y, z), self.get_block_metadata(x, y, z))
 
     def set_block(self, pos: Position, block: Block) -> None:
-        if not (pos.y//16) in self.chunks:
-            self.chunks[pos.y//16] = Chunk()
-        return self.chunks[pos.y//16].set_block(Position(pos.x, pos.y%16, pos.z), block)
+        self.set_block_id(int(pos.x), int(pos.y), int(pos.z), block.block_id, block.metadata)
 
     def to_packet_data(self, chunk_x: int, chunk_z: int) -> tuple[int, int, bool, bytes, bytes]:
-        block_type = b""
-        block_metadata = b""
-        block_light = b""
-        sky_light = b""
-        add = b""
-        biome = b""
+        return build_bulk_payload([compress_column(chunk_x, chunk_z, self)])
+
+    def serialize(self) -> tuple[bytes, int]:
+        """Return the uncompressed column data and its primary bitmap
+
+        The 1.7.10 format stores each array type for all sections before the next one:
+        block types, metadata, block light, sky light, then the 256 biome bytes.
+        """
+
+        sections = [self.chunks[c].to_packet_data() for c in range(16) if c in self.chunks]
         primary_bitmap = 0
+        for c in self.chunks:
+            if 0 <= c < 16:
+                primary_bitmap |= (1 << c)
+
+        arrays = [section[i] for i in range(4) for section in sections]
+        arrays.append(self.biomes)
+        return (b"".join(arrays), primary_bitmap)
+
+    @classmethod
+    def deserialize(cls, data: bytes, primary_bitmap: int) -> ChunkColumn:
+        """Create a column from the output of serialize()"""
 
-        for c in range(16):
-            if c in self.chunks.keys():
-                chunk_data = self.chunks[c].to_packet_data()
-                block_type += chunk_data[0]
-                block_metadata += chunk_data[1]
-                block_light += chunk_data[2]
-                sky_light += chunk_data[3]
-                add += chunk_data[4]
-                biome += chunk_data[5]
-                primary_bitmap += (1 << c)
-
-        zlibbed_str = zlib.compress(block_type + block_metadata + block_light + sky_light + add + biome)
-        data_compressed = zlibbed_str
-        data_len = len(data_compressed)
-
-        metadata = binary_operations._encode_int(chunk_x)
-        metadata += binary_operations._encode_int(chunk_z)
-        metadata += binary_operations._encode_unsigned_short(primary_bitmap) # primary bitmap, 1 sends chunk
-        metadata += binary_operations._encode_unsigned_short(0b0000000000000000) # add bitmap, all empty
-        return (1, data_len, True, data_compressed, metadata)
+        indices = [c for c in range(16) if primary_bitmap & (1 << c)]
+        nibble_size = SECTION_VOLUME // 2
+        light_start = len(indices) * SECTION_VOLUME
+        if len(data) != light_start + len(indices) * 3 * nibble_size + 256:
+            raise ValueError(f"Column data has the wrong size for primary bitmap {primary_bitmap:016b}")
+
+        chunks = {}
+        for n, c in enumerate(indices):
+            nibbles = [light_start + (i * len(indices) + n) * nibble_size for i in range(3)]
+            chunks[c] = Chunk(blocks=bytearray(data[n * SECTION_VOLUME:(n + 1) * SECTION_VOLUME]),
+                              metadata=bytearray(data[nibbles[0]:nibbles[0] + nibble_size]),
+                              block_light=bytearray(data[nibbles[1]:nibbles[1] + nibble_size]),
+                              sky_light=bytearray(data[nibbles[2]:nibbles[2] + nibble_size]))
+        return cls(chunks=chunks, biomes=bytearray(data[-256:]))
 
 @dataclass
 class World():
     dim_id: int
     chunk_columns: dict[int, dict[int, ChunkColumn|None]] = field(default_factory=lambda: defaultdict(dict))
+    packet_cache: ChunkPacketCache = field(default_factory=ChunkPacketCache)
+    # columns modified since they were last saved
+    dirty_columns: set[tuple[int, int]] = field(default_factory=set)
+    # called with the chunk coordinates of a missing column, has to add that column to the world
+    loader: Callable[[int, int], None] | None = field(default=None, compare=False, repr=False)
+
+    def get_block_id(self, x: int, y: int, z: int) -> int:
+        """Return the block id at the given block coordinates without allocating any objects"""
+
+        return self.load_column(x >> 4, z >> 4).get_block_id(x & 15, y, z & 15)
+
+    def get_block_metadata(self, x: int, y: int, z: int) -> int:
+        return self.load_column(x >> 4, z >> 4).get_block_metadata(x & 15, y, z & 15)
+
+    def set_block_id(self, x: int, y: int, z: int, block_id: int, metadata: int = 0) -> None:
+        """Set the block id at the given block coordinates without allocating any objects"""
+
+        column = self._get_column(x >> 4, z >> 4)
+        if column is None:
+            if self.loader is not None:
+                column = self.load_column(x >> 4, z >> 4)
+            else:
+                column = self.chunk_columns[x >> 4][z >> 4] = ChunkColumn()
+        column.set_block_id(x & 15, y, z & 15, block_id, metadata)
+        self.packet_cache.invalidate(x >> 4, z >> 4)
+        self.dirty_columns.add((x >> 4, z >> 4))
 
     def get_block(self, pos: Position) -> Block:
-        if (not (pos.z//16) in self.chunk_columns[pos.x//16].keys()) or \
-           self.chunk_columns[pos.x//16][pos.z//16] is None:
-            raise Exception("Chunk not generated!")
-        return self.chunk_columns[pos.x//16][pos.z//16].get_block(Position(pos.x%16, pos.y, pos.z%16))
+        x, y, z = int(pos.x), int(pos.y), int(pos.z)
+        column = self.load_column(x >> 4, z >> 4)
+        return block_registry.get(column.get_block_id(x & 15, y, z & 15), column.get_block_metadata(x & 15, y, z & 15))
 
     def set_block(self, pos: Position, block: Block) -> None:
-        if not (pos.z//16) in self.chunk_columns[pos.x//16].keys():
-            self.chunk_columns[pos.x//16][pos.z//16] = ChunkColumn()
-        return self.chunk_columns[pos.x//16][pos.z//16].set_block(Position(pos.x%16, pos.y, pos.z%16), block)
+        self.set_block_id(int(pos.x), int(pos.y), int(pos.z), block.block_id, block.metadata)
+
+    def get_highest_block_y(self, x: int, z: int) -> int:
+        """Return the y coordinate of the highest non-air block, or -1"""
+
+        column = self.load_column(x >> 4, z >> 4)
+        for y in range(255, -1, -1):
+            if column.get_block_id(x & 15, y, z & 15) != Air.block_id:
+                return y
+        return -1
+
+    def get_column(self, chunk_x: int, chunk_z: int) -> ChunkColumn | None:
+        return self._get_column(chunk_x, chunk_z)
+
+    def load_column(self, chunk_x: int, chunk_z: int) -> ChunkColumn:
+        """Return the column, asking the loader for it if it isn't in memory"""
+
+        column = self._get_column(chunk_x, chunk_z)
+        if column is None and self.loader is not None:
+            self.loader(chunk_x, chunk_z)
+            column = self._get_column(chunk_x, chunk_z)
+        if column is None:
+            raise Exception("Chunk not generated!")
+        return column
 
-    def to_packet_data(self, chunk_x: int, chunk_z: int):
-        if not self.chunk_exists(chunk_x, chunk_z):
-            server_provider.get().generate_chunk(chunk_x*16, chunk_z*16)
-        return self.chunk_columns[chunk_x][chunk_z].to_packet_data(chunk_x, chunk_z)
+    def set_column(self, chunk_x: int, chunk_z: int, column: ChunkColumn, dirty: bool = True) -> None:
+        """Add a whole column to the world, replacing the existing one
+
+        Set dirty to False if the column comes from the save and doesn't need to be written back.
+        """
+
+        self.chunk_columns[chunk_x][chunk_z] = column
+        self.packet_cache.invalidate(chunk_x, chunk_z)
+        if dirty:
+            self.dirty_columns.add((chunk_x, chunk_z))
+        else:
+            self.dirty_columns.discard((chunk_x, chunk_z))
+
+    def remove_column(self, chunk_x: int, chunk_z: int) -> ChunkColumn | None:
+        """Remove a column from memory without saving it, return the removed column"""
+
+        row = self.chunk_columns.get(chunk_x)
+        if row is None:
+            return None
+        column = row.pop(chunk_z, None)
+        if not row:
+            del self.chunk_columns[chunk_x]
+        self.packet_cache.invalidate(chunk_x, chunk_z)
+        self.dirty_columns.discard((chunk_x, chunk_z))
+        return column
+
+    def to_packet_data(self, chunk_x: int, chunk_z: int) -> tuple[int, int, bool, bytes, bytes]:
+        return build_bulk_payload([self.get_compressed_column(chunk_x, chunk_z)])
+
+    def request_column(self, chunk_x: int, chunk_z: int) -> Future:
+        """Return the compressed column as an already completed future
+
+        This loads missing columns synchronously, core.chunk_workers.ChunkWorkerPool offers the same method off the tick thread.
+        """
+
+        future = Future()
+        future.set_result(self.get_compressed_column(chunk_x, chunk_z))
+        return future
+
+    def get_compressed_column(self, chunk_x: int, chunk_z: int) -> CompressedColumn:
+        """Return the compressed column from the shared packet cache, loading and compressing it if needed"""
+
+        entry = self.packet_cache.get(chunk_x, chunk_z)
+        if entry is None:
+            entry = compress_column(chunk_x, chunk_z, self.load_column(chunk_x, chunk_z))
+            self.packet_cache.put(entry)
+        return entry
 
     def chunk_exists(self, chunk_x: int, chunk_z: int) -> bool:
-        if not (chunk_x in self.chunk_columns.keys()):
-            return False
-        if not (chunk_z in self.chunk_columns[chunk_x].keys()):
-            return False
-        return isinstance(self.chunk_columns[chunk_x][chunk_z], ChunkColumn)
+        return self._get_column(chunk_x, chunk_z) is not None
+
+    def _get_column(self, chunk_x: int, chunk_z: int) -> ChunkColumn | None:
+        # use .get() so lookups don't insert empty rows into the defaultdict
+        column = self.chunk_columns.get(chunk_x, {}).get(chunk_z)
+        if not isinstance(column, ChunkColumn):
+            return None
+        return column
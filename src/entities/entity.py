@@ -1,3 +1,7 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from network.packet import ServerPacket
 from dataclass.position import Position
 from dataclass.rotation import Rotation
 
@@ -7,3 +11,14 @@ class Entity():
         self.position = position
         self.rotation = rotation
         self.on_ground = on_ground
+
+    @property
+    def feet_position(self) -> Position:
+        """The position of the entity's feet, which entity packets use"""
+
+        return self.position
+
+    def spawn_packet(self) -> "ServerPacket":
+        """Return the packet that makes clients spawn this entity"""
+
+        raise NotImplementedError()
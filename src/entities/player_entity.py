@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import struct
 import uuid
@@ -8,10 +9,14 @@ if TYPE_CHECKING:
     from network.protocol import MinecraftProtocol
 
 from core import server_provider
-from network import server_packets
-from dataclass.save import World
+from core.chunk_streamer import ChunkStreamer, ColumnSource
+from dataclass import metadata
 from dataclass.position import Position
 from entities.living_entity import LivingEntity
+from network import server_packets
+
+# player positions are at eye height, which is this far above the feet
+EYE_HEIGHT = 1.62
 
 class PlayerEntity(LivingEntity):
     def __init__(self, uuid: uuid.UUID, name: str, view_dist: int, mcprot: "MinecraftProtocol", **kwargs) -> None:
@@ -27,23 +32,23 @@ class PlayerEntity(LivingEntity):
         # remaining: ticks until next status change
         # value: random int to be sent back by client, or 0
         self.keepalive = [0, 100, 0]
-        self.loaded_chunks = {}
+        # ticks the player's outbound backlog stayed above the limit
+        self.slow_ticks = 0
+        self.chunk_streamer = ChunkStreamer()
+
+    @property
+    def feet_position(self) -> Position:
+        return Position(self.position.x, self.position.y - EYE_HEIGHT, self.position.z)
 
-    def load_chunks(self, world: World):
-        chunk_radius = self.view_dist
-        center_chunk_pos = Position(self.position.x//16, self.position.y, self.position.z//16)
-        for dist_to_center_blocks in range(chunk_radius):
-            for x in range(int(center_chunk_pos.x - dist_to_center_blocks), int(center_chunk_pos.x + dist_to_center_blocks)):
-                for z in range(int(center_chunk_pos.z - dist_to_center_blocks), int(center_chunk_pos.z + dist_to_center_blocks)):
-                    if not self._is_chunk_loaded(x, z):
-                        chunk_data = world.to_packet_data(x, z)
+    def spawn_packet(self) -> server_packets.SpawnPlayer:
+        player_metadata = metadata.Human(health=self.health).to_bytes() + metadata.STOP_BYTE
+        return server_packets.SpawnPlayer(self.entity_id, str(self.uuid), self.name, b"", self.feet_position, self.rotation, 0, player_metadata)
 
-                        self.mcprot.write_packet(server_packets.MapChunkBulk(*chunk_data))
-                        
-                        if not (x in self.loaded_chunks.keys()):
-                            self.loaded_chunks[x] = {}
-                        self.loaded_chunks[x][z] = True
-                        return
+    def load_chunks(self, source: ColumnSource, bytes_per_tick: int):
+        """Send the next nearest columns around the player, up to bytes_per_tick"""
+
+        self.chunk_streamer.update(int(self.position.x // 16), int(self.position.z // 16), self.view_dist, self.mcprot)
+        self.chunk_streamer.tick(source, self.mcprot, bytes_per_tick)
 
     def network_func(self):
         while True:
@@ -59,18 +64,33 @@ class PlayerEntity(LivingEntity):
                 pass
             except (ConnectionAbortedError, OSError):
                 return
-            except struct.error as err:
+            except (EOFError, struct.error, ValueError) as err:
                 # assume that the player disconnected client-side
                 logging.debug(err)
                 server_provider.get().disconnect_player(self)
                 return
 
+    async def network_task(self):
+        """Like network_func(), for players connected through the asyncio server"""
+
+        while True:
+            try:
+                conn_info = await self.mcprot.read_packet_async()
+            except (asyncio.IncompleteReadError, ConnectionError, OSError, EOFError, struct.error, ValueError) as err:
+                # assume that the player disconnected client-side
+                logging.debug(err)
+                server_provider.get().disconnect_player(self)
+                return
+
+            if not isinstance(conn_info, int):
+                self.network_in.put(conn_info)
+            else:
+                logging.error(f"Unknown packet id: {hex(conn_info)}")
+                server_provider.get().disconnect_player(self, {"text": f"Unknown packet id: {hex(conn_info)}", "bold": True, "color": "dark_green"})
+                return
+
     def _is_chunk_loaded(self, chunk_x: int, chunk_z: int) -> bool:
-        if not (chunk_x in self.loaded_chunks.keys()):
-            return False
-        if not (chunk_z in self.loaded_chunks[chunk_x].keys()):
-            return False
-        return self.loaded_chunks[chunk_x][chunk_z]
+        return (chunk_x, chunk_z) in self.chunk_streamer.loaded
 
     def __str__(self) -> str:
-        return f"uuid={self.uuid}, name={self.name}, pos={self.pos}, rot={self.rot}, on_ground={self.on_ground}"
+        return f"uuid={self.uuid}, name={self.name}, pos={self.position}, rotation={self.rotation}, on_ground={self.on_ground}"
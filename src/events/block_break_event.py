@@ -1,9 +1,9 @@
 from entities.player_entity import PlayerEntity
 from blocks.block import Block
-from events.event import Event
+from events.event import CancellableEvent
 from dataclass.position import Position
 
-class BlockBreakEvent(Event):
+class BlockBreakEvent(CancellableEvent):
     def __init__(self, player: PlayerEntity, block: Block, position: Position) -> None:
         self.player = player
         self.block = block
@@ -1,4 +1,11 @@
 from entities.entity import Entity
 
 class Event():
-    pass
+    # only CancellableEvents can be cancelled, but the EventFactory checks it on every event
+    cancelled = False
+
+class CancellableEvent(Event):
+    """An event whose callbacks can stop the action it describes from happening"""
+
+    def cancel(self) -> None:
+        self.cancelled = True
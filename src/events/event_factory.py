@@ -1,13 +1,76 @@
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from events.event import Event
 
+# callbacks with a lower priority are called first, so the ones with a higher priority have the final say
+LOWEST = 0
+LOW = 1
+NORMAL = 2
+HIGH = 3
+HIGHEST = 4
+MONITOR = 5 # only for acting on the outcome, e.g. applying it to the world or logging it
+
+# callbacks that take longer than this are logged
+SLOW_CALLBACK_TIME = 0.005 # seconds
+
+class _Callback():
+    __slots__ = ("callback", "event_type", "priority", "ignore_cancelled", "deferred", "calls", "total_time", "max_time")
+
+    def __init__(self, callback, event_type: type, priority: int, ignore_cancelled: bool, deferred: bool) -> None:
+        self.callback = callback
+        self.event_type = event_type
+        self.priority = priority
+        self.ignore_cancelled = ignore_cancelled
+        self.deferred = deferred
+
+        # metrics
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def run(self, event: Event) -> None:
+        start = time.perf_counter()
+        try:
+            self.callback(event)
+        except Exception:
+            logging.exception(f"Callback {self.name} failed for {type(event).__name__}")
+        duration = time.perf_counter() - start
+
+        self.calls += 1
+        self.total_time += duration
+        if duration > self.max_time:
+            self.max_time = duration
+        if duration > SLOW_CALLBACK_TIME:
+            logging.warning(f"Callback {self.name} took {duration * 1000:.1f} ms for {type(event).__name__}")
+
+    @property
+    def name(self) -> str:
+        return getattr(self.callback, "__qualname__", repr(self.callback))
+
 class EventFactory():
-    _callbacks = {}
+    """Calls the callbacks registered for an event's type and its base classes
+
+    The callbacks for each event type are looked up once and kept in a dispatch table until the
+    registered callbacks change, so calling an event without callbacks costs a single dict lookup.
+    """
+
+    _callbacks: list[_Callback] = []
+    # event type -> (callbacks called right away, callbacks called on the worker thread)
+    _dispatch: dict[type, tuple[tuple[_Callback, ...], tuple[_Callback, ...]]] = {}
+    _lock = threading.Lock()
+    _worker: ThreadPoolExecutor | None = None
 
     @classmethod
-    def register_callback(cls, event_type: type, callback):
-        """Add a callback for a given event type"""
+    def register_callback(cls, event_type: type, callback, priority: int = NORMAL, ignore_cancelled: bool = False, deferred: bool = False):
+        """Add a callback for a given event type, it is also called for events deriving from it
+
+        With ignore_cancelled, the callback isn't called for cancelled events. Deferred callbacks are called on
+        a worker thread after the other callbacks returned, so they can't cancel the event and must not change
+        the world. Use them for work like logging or statistics.
+        """
 
         if not isinstance(event_type, type):
             raise TypeError()
@@ -15,19 +78,92 @@ class EventFactory():
         if not issubclass(event_type, Event):
             raise TypeError(f"Tried to register a callback to event type {event_type}, which doesn't derive from {Event}")
 
-        if not event_type in cls._callbacks.keys():
-            cls._callbacks[event_type] = []
-        cls._callbacks[event_type].append(callback)
+        with cls._lock:
+            cls._callbacks = cls._callbacks + [_Callback(callback, event_type, priority, ignore_cancelled, deferred)]
+            cls._dispatch = {}
+
+    @classmethod
+    def unregister_callback(cls, event_type: type, callback) -> bool:
+        """Remove a callback, return False if it wasn't registered"""
+
+        with cls._lock:
+            callbacks = [entry for entry in cls._callbacks if not (entry.event_type is event_type and entry.callback == callback)]
+            if len(callbacks) == len(cls._callbacks):
+                return False
+            cls._callbacks = callbacks
+            cls._dispatch = {}
+            return True
 
     @classmethod
-    def call(cls, event: Event):
-        """Call all callbacks with the event as the parameter"""
+    def has_callbacks(cls, event_type: type) -> bool:
+        """Return whether calling an event of this type would call anything, to skip creating events nobody listens to"""
 
-        logging.info(f"Called event {type(event)}")
+        immediate, deferred = cls._get_callbacks(event_type)
+        return bool(immediate or deferred)
 
-        if type(event) not in cls._callbacks.keys():
-            logging.warning(f"Event {type(event)} was called, but has no associated callbacks")
-            return
+    @classmethod
+    def call(cls, event: Event) -> Event:
+        """Call all callbacks with the event as the parameter, return the event to check whether it was cancelled"""
+
+        immediate, deferred = cls._dispatch.get(type(event)) or cls._get_callbacks(type(event))
+        for callback in immediate:
+            if event.cancelled and callback.ignore_cancelled:
+                continue
+            callback.run(event)
+
+        if deferred:
+            callbacks = [callback for callback in deferred if not (event.cancelled and callback.ignore_cancelled)]
+            if callbacks:
+                cls._get_worker().submit(cls._run_deferred, callbacks, event)
+        return event
+
+    @classmethod
+    def stats(cls) -> list[dict]:
+        """Return the timings of all callbacks, the slowest first"""
+
+        stats = [{
+            "callback": callback.name,
+            "event": callback.event_type.__name__,
+            "priority": callback.priority,
+            "deferred": callback.deferred,
+            "calls": callback.calls,
+            "total_ms": callback.total_time * 1000,
+            "mean_ms": callback.total_time / callback.calls * 1000 if callback.calls else 0.0,
+            "max_ms": callback.max_time * 1000
+        } for callback in cls._callbacks]
+        return sorted(stats, key=lambda item: item["total_ms"], reverse=True)
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Wait for the deferred callbacks to finish"""
+
+        with cls._lock:
+            worker = cls._worker
+            cls._worker = None
+        if worker is not None:
+            worker.shutdown(wait=True)
+
+    @classmethod
+    def _get_callbacks(cls, event_type: type) -> tuple[tuple[_Callback, ...], tuple[_Callback, ...]]:
+        dispatch = cls._dispatch
+        entry = dispatch.get(event_type)
+        if entry is None:
+            # sorted() is stable, so callbacks with the same priority are called in the order they were registered
+            callbacks = sorted((callback for callback in cls._callbacks if issubclass(event_type, callback.event_type)),
+                               key=lambda callback: callback.priority)
+            entry = (tuple(callback for callback in callbacks if not callback.deferred),
+                     tuple(callback for callback in callbacks if callback.deferred))
+            dispatch[event_type] = entry
+        return entry
+
+    @classmethod
+    def _get_worker(cls) -> ThreadPoolExecutor:
+        with cls._lock:
+            if cls._worker is None:
+                cls._worker = ThreadPoolExecutor(1, thread_name_prefix="events")
+            return cls._worker
 
-        for callback in cls._callbacks[type(event)]:
-            callback(event)
+    @staticmethod
+    def _run_deferred(callbacks: list[_Callback], event: Event) -> None:
+        for callback in callbacks:
+            callback.run(event)
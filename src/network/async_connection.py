@@ -0,0 +1,122 @@
+"""Lets MinecraftProtocol run on top of asyncio streams"""
+
+import asyncio
+import threading
+
+from core.binary_operations import MAX_VARINT_LENGTH
+from network.socket_connection import MAX_QUEUED_BYTES
+
+class AsyncConnection():
+    """Wraps an asyncio stream pair, so packets can be written to it from any thread like to a socket
+
+    Writes are collected until flush() hands them to the event loop in one go,
+    so the loop only wakes up once per flush.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, max_bytes: int = MAX_QUEUED_BYTES) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.max_bytes = max_bytes
+        self._loop = asyncio.get_running_loop()
+        self._lock = threading.Lock()
+        self._pending: list[bytes] = []
+        self._pending_bytes = 0
+        self._flush_scheduled = False
+        self._closed = False
+
+    @property
+    def backlog(self) -> int:
+        """The number of bytes written but not yet handed to the operating system"""
+
+        return self._pending_bytes + self.writer.transport.get_write_buffer_size()
+
+    def send(self, data: bytes) -> int:
+        """Queue data for the next flush, can be called from any thread"""
+
+        if self._closed:
+            raise ConnectionResetError("Connection is closed")
+        if self.backlog + len(data) > self.max_bytes:
+            self.abort()
+            raise ConnectionResetError(f"Closed connection with more than {self.max_bytes} bytes queued")
+
+        with self._lock:
+            self._pending.append(data)
+            self._pending_bytes += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        """Let the event loop write everything queued so far, can be called from any thread"""
+
+        with self._lock:
+            if not self._pending or self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self._call_soon(self._flush)
+
+    def close(self) -> None:
+        """Close the connection once everything queued was sent, can be called from any thread"""
+
+        if self._closed:
+            return
+        self._closed = True
+        self._call_soon(self._close)
+
+    def abort(self) -> None:
+        """Close the connection right away, dropping everything queued, can be called from any thread"""
+
+        self._closed = True
+        self._call_soon(self.writer.transport.abort)
+
+    async def read_varint(self) -> int:
+        """Read a VarInt, raises ValueError if it is longer than 5 bytes"""
+
+        total = 0
+        shift = 0
+        val = 0x80
+        while val & 0x80:
+            if shift >= 7 * MAX_VARINT_LENGTH:
+                raise ValueError("VarInt is too long")
+            val = (await self.reader.readexactly(1))[0]
+            total |= ((val & 0x7F) << shift)
+            shift += 7
+            if total & (1 << 31):
+                total = total - (1 << 32)
+        return total
+
+    async def recv_exactly(self, length: int) -> bytes:
+        return await self.reader.readexactly(length)
+
+    async def drain(self) -> None:
+        """Wait until the queued data was handed to the operating system"""
+
+        self._flush()
+        await self.writer.drain()
+
+    async def wait_closed(self) -> None:
+        self.close()
+        try:
+            await self.writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    def _call_soon(self, callback) -> None:
+        try:
+            self._loop.call_soon_threadsafe(callback)
+        except RuntimeError as err:
+            # the event loop is already closed
+            raise ConnectionResetError("Connection is closed") from err
+
+    def _flush(self) -> None:
+        """Write the queued data, runs on the event loop"""
+
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+            self._pending_bytes = 0
+            self._flush_scheduled = False
+        if pending and not self.writer.is_closing():
+            self.writer.write(b"".join(pending))
+
+    def _close(self) -> None:
+        self._flush()
+        self.writer.close()
@@ -7,23 +7,24 @@ if TYPE_CHECKING:
     from core.iridium_server import IridiumServer
 
 from core import server_provider
+from core.spatial_index import chunk_of
 from entities.player_entity import PlayerEntity
 from dataclass.position import Position
+from dataclass.rotation import Rotation
 from network import handshake_packets, client_packets, server_packets
-from core import binary_operations
 from events.event_factory import EventFactory
-from events import block_break_event
 from network.packet import ClientPacket
 from events.block_break_event import BlockBreakEvent
-from blocks import air
+from blocks import block_registry
 
 class KeepAlive(ClientPacket): # 0x00
+    fields = [
+        ("keep_alive_id", "int"),
+    ]
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def load(self):
-        self.keep_alive_id = binary_operations._decode_int(self.stream)
-
     def process(self, player: PlayerEntity):
         if self.keep_alive_id == player.keepalive[2]:
             player.keepalive[0] = 0 # switch to WAITING
@@ -34,141 +35,151 @@ class KeepAlive(ClientPacket): # 0x00
             server_provider.get().disconnect_player(player, "KeepAliveID is incorrect")
 
 class ChatMessage(ClientPacket): # 0x01
+    fields = [
+        ("message", "string"),
+    ]
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def load(self):
-        self.message = binary_operations._decode_string(self.stream)
-
     def process(self, player: PlayerEntity):
         logging.info(f"[{player.name}] {self.message}")
-        for pl in server_provider.get().players.values():
-            pl.mcprot.write_packet(server_packets.ChatMesage(f"[{player.name}] {self.message}"))
+        server_provider.get().broadcast(server_packets.ChatMesage(f"[{player.name}] {self.message}"))
 
 class PlayerP(ClientPacket):  # 0x03 PlayerOnGround
+    fields = [
+        ("on_ground", "boolean"),
+    ]
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def load(self):
-        self.on_ground = binary_operations._decode_boolean(self.stream)
-
     def process(self, player: PlayerEntity):
         player.on_ground = self.on_ground
 
 class PlayerPosition(ClientPacket): # 0x04
+    fields = [
+        ("x", "double"),
+        ("feety", "double"),
+        ("heady", "double"),
+        ("z", "double"),
+        ("on_ground", "boolean"),
+    ]
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def load(self):
-        self.x = binary_operations._decode_double(self.stream)
-        self.feety = binary_operations._decode_double(self.stream)
-        self.heady = binary_operations._decode_double(self.stream)
-        self.z = binary_operations._decode_double(self.stream)
-        self.on_ground = binary_operations._decode_boolean(self.stream)
-
     def process(self, player: PlayerEntity):
-        player.pos = Position(self.x, self.heady, self.z)
+        player.position = Position(self.x, self.heady, self.z)
+        server_provider.get().spatial_index.update(player)
         player.on_ground = self.on_ground
 
 class PlayerLook(ClientPacket): # 0x05
+    fields = [
+        ("yaw", "float"),
+        ("pitch", "float"),
+        ("on_ground", "boolean"),
+    ]
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def load(self):
-        self.yaw = binary_operations._decode_float(self.stream)
-        self.pitch = binary_operations._decode_float(self.stream)
-        self.on_ground = binary_operations._decode_boolean(self.stream)
-
     def process(self, player: PlayerEntity):
-        player.rot = (self.yaw, self.pitch)
+        player.rotation = Rotation(self.yaw, self.pitch)
         player.on_ground = self.on_ground
 
 class PlayerPositionAndLook(ClientPacket): # 0x06
+    fields = [
+        ("x", "double"),
+        ("feety", "double"),
+        ("heady", "double"),
+        ("z", "double"),
+        ("yaw", "float"),
+        ("pitch", "float"),
+        ("on_ground", "boolean"),
+    ]
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def load(self):
-        self.x = binary_operations._decode_double(self.stream)
-        self.feety = binary_operations._decode_double(self.stream)
-        self.heady = binary_operations._decode_double(self.stream)
-        self.z = binary_operations._decode_double(self.stream)
-        self.yaw = binary_operations._decode_float(self.stream)
-        self.pitch = binary_operations._decode_float(self.stream)
-        self.on_ground = binary_operations._decode_boolean(self.stream)
-
     def process(self, player: PlayerEntity):
-        player.pos = Position(self.x, self.heady, self.z)
-        player.rot = (self.yaw, self.pitch)
+        player.position = Position(self.x, self.heady, self.z)
+        server_provider.get().spatial_index.update(player)
+        player.rotation = Rotation(self.yaw, self.pitch)
         player.on_ground = self.on_ground
 
 class PlayerDigging(ClientPacket): # 0x07
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-
-    def load(self):
+    fields = [
         # 0: Started digging
         # 1: Cancelled digging
         # 2: Finished digging
         # 3: Drop item stack
         # 4: Drop item
         # 5: Shoot arrow / finish eating
-        self.status = binary_operations._decode_byte(self.stream)
-        self.x = binary_operations._decode_int(self.stream)
-        self.y = binary_operations._decode_unsigned_byte(self.stream)
-        self.z = binary_operations._decode_int(self.stream)
-        self.face = binary_operations._decode_byte(self.stream)
+        ("status", "byte"),
+        ("x", "int"),
+        ("y", "unsigned_byte"),
+        ("z", "int"),
+        ("face", "byte"),
+    ]
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
 
     def process(self, player: PlayerEntity):
         if self.status == 2:
+            if not EventFactory.has_callbacks(BlockBreakEvent):
+                return
             block_pos = Position(self.x, self.y, self.z)
             block = server_provider.get().world.get_block(block_pos)
-            EventFactory.call(block_break_event.BlockBreakEvent(player, block, block_pos))
+            if EventFactory.call(BlockBreakEvent(player, block, block_pos)).cancelled:
+                # the client already removed the block
+                player.mcprot.write_packet(server_packets.BlockChange(block_pos, block.block_id, block.metadata))
 
     @staticmethod
     def break_block_callback(event: BlockBreakEvent):
         self = server_provider.get()
-        self.world.set_block(event.position, air.Air())
-        for uuid, player in self.players.items():
-            if uuid != str(event.player.uuid) and player.position.dist_to_horizontal(event.player.position) <= player.view_dist:
-                player.mcprot.write_packet(server_packets.BlockChange(event.position, air.Air.block_id, 0x00000000))
+        self.world.set_block(event.position, block_registry.AIR)
+        viewers = self.spatial_index.viewers_of_chunk(*chunk_of(event.position))
+        viewers.discard(event.player)
+        self.broadcast(server_packets.BlockChange(event.position, block_registry.AIR.block_id, block_registry.AIR.metadata), viewers)
 
 class ClientSettings(ClientPacket): # 0x15
+    fields = [
+        ("locale", "string"),
+        ("view_distance", "byte"),
+        ("chat_flags", "byte"),
+        ("chat_colors", "boolean"),
+        ("difficulty", "byte"),
+        ("show_cape", "boolean"),
+    ]
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def load(self):
-        self.locale = binary_operations._decode_string(self.stream)
-        self.view_distance = binary_operations._decode_byte(self.stream)
-        self.chat_flags = binary_operations._decode_byte(self.stream)
-        self.chat_colors = binary_operations._decode_boolean(self.stream)
-        self.difficulty = binary_operations._decode_byte(self.stream)
-        self.show_cape = binary_operations._decode_boolean(self.stream)
-
     def process(self, player: PlayerEntity):
         if self.view_distance <= server_provider.get().VIEW_DIST:
             player.view_dist = self.view_distance
         else:
             player.view_dist = server_provider.get().VIEW_DIST
+        server_provider.get().spatial_index.update(player)
 
 class PluginMessage(ClientPacket): # 0x17
+    fields = [
+        ("channel", "string"),
+        ("data", "short_prefixed_bytes"),
+    ]
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def load(self):
-        self.channel = binary_operations._decode_string(self.stream)
-        self.length = binary_operations._decode_short(self.stream)
-        self.data = binary_operations._decode_bytearray(self.stream, self.length)
-
     def process(self, player: PlayerEntity):
         pass
 
 class Animation(ClientPacket): # 0x0A
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-
-    def load(self):
-        self.entity_id = binary_operations._decode_int(self.stream)
-        self.animation_id = binary_operations._decode_byte(self.stream)
+    fields = [
+        ("entity_id", "int"),
+        ("animation_id", "byte"),
         # 0: No animation
         # 1: Swing arm
         # 2: Damage animation
@@ -179,19 +190,24 @@ class Animation(ClientPacket): # 0x0A
         # 102: (unknown)
         # 104: Crouch
         # 105: Uncrouch
+    ]
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
 
     def process(self, player: PlayerEntity):
         pass
 
 class EntityAction(ClientPacket): # 0x0B
+    fields = [
+        ("entity_id", "int"),
+        ("action_id", "byte"),
+        ("jump_boost", "int"),
+    ]
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def load(self):
-        self.entity_id = binary_operations._decode_int(self.stream)
-        self.action_id = binary_operations._decode_byte(self.stream)
-        self.jump_boost = binary_operations._decode_int(self.stream)
-
     def process(self, player: PlayerEntity):
         pass
 
@@ -0,0 +1,106 @@
+"""Splits the byte stream of a socket into packets"""
+
+from socket import socket
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+# the protocol limits packets to a 3 byte VarInt length
+MAX_FRAME_SIZE = (1 << 21) - 1
+
+class FrameReader():
+    """Reads length-prefixed packets from a socket through a reusable buffer
+
+    Each recv_into() fills as much of the buffer as the socket has data for, so a single
+    syscall usually returns several small packets, and packets split by TCP are put back together.
+    """
+
+    def __init__(self, sock: socket, buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        self.socket = sock
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        # unread data is self._buffer[self._start:self._end]
+        self._start = 0
+        self._end = 0
+
+        # metrics
+        self.syscalls = 0
+        self.frames = 0
+        self.bytes_received = 0
+
+    def read_frame(self) -> bytes:
+        """Return the next complete packet without its length prefix, blocking until it arrived
+
+        Raises EOFError if the client closed the connection.
+        """
+
+        while True:
+            frame = self._next_frame()
+            if frame is not None:
+                return frame
+            self._fill()
+
+    def stats(self) -> dict:
+        return {
+            "syscalls": self.syscalls,
+            "frames": self.frames,
+            "bytes_received": self.bytes_received,
+            "syscalls_per_frame": self.syscalls / self.frames if self.frames else 0.0
+        }
+
+    def _next_frame(self) -> bytes | None:
+        """Parse the next frame from the buffer, return None if it isn't complete yet"""
+
+        buffer = self._buffer
+        pos = self._start
+        length = 0
+        shift = 0
+        while True:
+            if pos >= self._end:
+                return None
+            byte = buffer[pos]
+            pos += 1
+            length |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                break
+            shift += 7
+            if shift >= 21:
+                raise ValueError("Packet length VarInt is too long")
+
+        if length > MAX_FRAME_SIZE:
+            raise ValueError(f"Packet of {length} bytes is too large")
+        if pos + length > self._end:
+            self._reserve(pos - self._start + length)
+            return None
+
+        self._start = pos + length
+        self.frames += 1
+        return bytes(self._view[pos:self._start])
+
+    def _reserve(self, size: int) -> None:
+        """Make room for a frame of size bytes, including its length prefix"""
+
+        if size <= len(self._buffer) - self._start:
+            return
+        unread = self._end - self._start
+        if size > len(self._buffer):
+            buffer = bytearray(max(size, len(self._buffer) * 2))
+            buffer[:unread] = self._view[self._start:self._end]
+            self._view.release()
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+        else:
+            self._buffer[:unread] = self._view[self._start:self._end]
+        self._start = 0
+        self._end = unread
+
+    def _fill(self) -> None:
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._end == len(self._buffer):
+            self._reserve(len(self._buffer) - self._start + 1)
+
+        received = self.socket.recv_into(self._view[self._end:])
+        self.syscalls += 1
+        if received == 0:
+            raise EOFError("The client closed the connection")
+        self._end += received
+        self.bytes_received += received
@@ -5,6 +5,7 @@ if TYPE_CHECKING:
     from core.iridium_server import IridiumServer
 
 from core import binary_operations
+from network import packet_schema
 
 class Packet:
     def __init__(self, data=None, stream=None):
@@ -12,7 +13,17 @@ class Packet:
         self.stream = stream
 
 class ClientPacket(Packet):
-    """A packet that the client sends"""
+    """A packet that the client sends
+
+    Subclasses can declare their fields as a list of (name, type) pairs, load() is then generated from it.
+    """
+
+    fields: packet_schema.Fields | None = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "fields" in cls.__dict__:
+            cls.load = packet_schema.compile_decoder(cls.fields)
 
     def load(self):
         raise NotImplementedError()
@@ -21,12 +32,34 @@ class ClientPacket(Packet):
         raise NotImplementedError()
 
 class ServerPacket(Packet):
-    """A packet that the server sends"""
+    """A packet that the server sends
+
+    Subclasses can declare their packet_id and fields as a list of (name, type) pairs, encode() is then generated from it.
+    """
+
+    packet_id: int
+    fields: packet_schema.Fields | None = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "fields" in cls.__dict__:
+            cls.encode = packet_schema.compile_encoder(cls.packet_id, cls.fields)
+
+    def encode(self) -> bytes:
+        """Return the packet id followed by the packet's fields"""
+
+        return self.data
+
+    def frame(self) -> bytes:
+        """Return the encoded packet prefixed with its length, as it is sent over the connection"""
+
+        data = self.encode()
+        return binary_operations._encode_varint(len(data)) + data
 
     def reply(self, socket_conn, data=None):
         if data is None:
-            data = self.data
+            data = self.encode()
 
+        # both parts are only queued, MinecraftProtocol.flush() sends them together
         socket_conn.send(binary_operations._encode_varint(len(data)))
         socket_conn.send(data)
-        # writer.drain()
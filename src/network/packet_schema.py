@@ -0,0 +1,142 @@
+"""Compiles the field lists of packet classes into encoders and decoders
+
+A packet declares its fields as (name, type) pairs, in the order they are sent. Server packets may
+use dotted names like "position.x" to reach into attributes. Runs of fixed-width fields are merged
+into a single precompiled struct, so encoding e.g. PlayerPositionAndLook is a single pack() call.
+"""
+
+import math
+import struct
+from typing import Callable
+
+from core import binary_operations
+
+# struct codes of the fixed-width types
+FIXED_TYPES = {
+    "boolean": "?",
+    "byte": "b",
+    "unsigned_byte": "B",
+    "short": "h",
+    "unsigned_short": "H",
+    "int": "i",
+    "long": "q",
+    "float": "f",
+    "double": "d",
+    "fixed_point_int": "i", # value * 32 as int, used for entity positions
+    "angle": "B", # degrees in steps of 1/256 of a full turn, used for entity rotations
+}
+
+# expressions converting the value of a fixed-width type before it is packed, with {} for the value
+_CONVERSIONS = {
+    "fixed_point_int": "_floor({} * 32)",
+    "angle": "_floor({} * 256 / 360) & 0xFF",
+}
+
+# types of variable length, as (encode expression, decode expression) with {} for the value
+VARIABLE_TYPES = {
+    "varint": ("_encode_varint({})", "_decode_varint(stream)"),
+    "string": ("_encode_string({})", "_decode_string(stream)"),
+    "bytes": ("{}", "stream.recv(len(stream))"), # the rest of the packet
+    "short_prefixed_bytes": ("_SHORT.pack(len({0})) + {0}", "stream.recv(stream.unpack(_SHORT)[0])"),
+    "int_prefixed_bytes": ("_INT.pack(len({0})) + {0}", "stream.recv(stream.unpack(_INT)[0])"),
+    "varint_prefixed_bytes": ("_encode_varint(len({0})) + {0}", "stream.recv(_decode_varint(stream))"),
+}
+
+_NAMESPACE = {
+    "_encode_varint": binary_operations._encode_varint,
+    "_decode_varint": binary_operations._decode_varint,
+    "_encode_string": binary_operations._encode_string,
+    "_decode_string": binary_operations._decode_string,
+    "_SHORT": binary_operations._SHORT,
+    "_INT": binary_operations._INT,
+    "_floor": math.floor,
+}
+
+Fields = list[tuple[str, str]]
+
+def compile_encoder(packet_id: int, fields: Fields) -> Callable[[object], bytes]:
+    """Return an encode(self) function that returns the packet id followed by the fields"""
+
+    namespace = dict(_NAMESPACE)
+    parts = []
+    run_codes = ""
+    run_values = []
+
+    # a packet id below 0x80 is a single byte VarInt, so it can go into the first struct
+    if packet_id < 0x80:
+        run_codes = "B"
+        run_values.append(str(packet_id))
+    else:
+        parts.append(repr(binary_operations._encode_varint(packet_id)))
+
+    def end_run():
+        nonlocal run_codes
+        if run_codes:
+            name = f"_struct{len(namespace)}"
+            namespace[name] = struct.Struct(">" + run_codes)
+            parts.append(f"{name}.pack({', '.join(run_values)})")
+            run_codes = ""
+            run_values.clear()
+
+    for name, typ in fields:
+        value = "self." + _check_name(name)
+        if typ in FIXED_TYPES:
+            run_codes += FIXED_TYPES[typ]
+            run_values.append(_CONVERSIONS.get(typ, "{}").format(value))
+        elif typ in VARIABLE_TYPES:
+            end_run()
+            parts.append(VARIABLE_TYPES[typ][0].format(value))
+        else:
+            raise ValueError(f"Unknown field type {typ} of {name}")
+    end_run()
+
+    if len(parts) == 1:
+        body = parts[0]
+    else:
+        body = "b''.join((" + ", ".join(parts) + ",))"
+    return _compile(f"def encode(self):\n    return {body}\n", "encode", namespace)
+
+def compile_decoder(fields: Fields) -> Callable[[object], None]:
+    """Return a load(self) function that sets the fields as attributes, reading from self.stream"""
+
+    namespace = dict(_NAMESPACE)
+    lines = ["def load(self):", "    stream = self.stream"]
+    run_codes = ""
+    run_names = []
+
+    def end_run():
+        nonlocal run_codes
+        if run_codes:
+            name = f"_struct{len(namespace)}"
+            namespace[name] = struct.Struct(">" + run_codes)
+            targets = ", ".join(f"self.{field}" for field in run_names)
+            lines.append(f"    ({targets},) = stream.unpack({name})")
+            run_codes = ""
+            run_names.clear()
+
+    for name, typ in fields:
+        if "." in name:
+            raise ValueError(f"Client packet fields can't be nested, got {name}")
+        _check_name(name)
+        if typ in FIXED_TYPES and typ not in _CONVERSIONS:
+            run_codes += FIXED_TYPES[typ]
+            run_names.append(name)
+        elif typ in VARIABLE_TYPES:
+            end_run()
+            lines.append(f"    self.{name} = {VARIABLE_TYPES[typ][1]}")
+        else:
+            raise ValueError(f"Unknown field type {typ} of {name}")
+    end_run()
+
+    return _compile("\n".join(lines) + "\n", "load", namespace)
+
+def _check_name(name: str) -> str:
+    if not all(part.isidentifier() for part in name.split(".")):
+        raise ValueError(f"Invalid field name {name}")
+    return name
+
+def _compile(source: str, name: str, namespace: dict) -> Callable:
+    exec(compile(source, f"<packet schema {name}>", "exec"), namespace)
+    function = namespace[name]
+    function.__source__ = source
+    return function
@@ -5,39 +5,44 @@ import uuid
 from socket import socket
 
 from core import binary_operations
+from network.async_connection import AsyncConnection
+from network.frame_reader import MAX_FRAME_SIZE, FrameReader
+from network.socket_connection import SocketConnection
 from network.readable_buffer import ReadableBuffer
 from network import packet, handshake_packets, server_packets, status_packets, login_packets, client_packets
 
 STATUS_STATE = 1
 LOGIN_STATE = 2
 
+# how the server accepts and reads connections
+THREAD_MODE = "thread" # one thread per connection
+ASYNCIO_MODE = "asyncio" # all connections on one asyncio event loop
+
 class MinecraftProtocol():
     _transport = None
 
-    def __init__(self, request: socket) -> None:
+    def __init__(self, request: "socket | AsyncConnection") -> None:
         self.socket = request
+        self._frame_reader: FrameReader | None = None
+        # written packets are queued here until the next flush()
+        self.connection = request if isinstance(request, AsyncConnection) else SocketConnection(request)
 
     def read_packet(self, packet_class=None, packet_id_map=client_packets.packet_id_map) -> packet.Packet | int:
         """Read, load and return a packet"""
 
-        packet_length = binary_operations._decode_varint(self.socket)
-        packet_data = self.socket.recv(packet_length)
-        packet_stream = ReadableBuffer(packet_data)
-        packet_id = binary_operations._decode_varint(packet_stream)
-
-        if packet_class is None:
-            if packet_id not in packet_id_map.keys():
-                # the packet wasn't found, return its id
-                return packet_id
-            packet_class = packet_id_map[packet_id]
+        if self._frame_reader is None:
+            self._frame_reader = FrameReader(self.socket)
+        packet_data = self._frame_reader.read_frame()
+        return self._load_packet(packet_data, packet_class, packet_id_map)
 
-        if not issubclass(packet_class, packet.ClientPacket):
-            raise TypeError(f"Tried to read packet of type {packet_class} which doesn't derive from {packet.ClientPacket}")
+    async def read_packet_async(self, packet_class=None, packet_id_map=client_packets.packet_id_map) -> packet.Packet | int:
+        """Read, load and return a packet from an AsyncConnection"""
 
-        logging.debug(f"Reading packet: {packet_class}")
-        constr_packet = packet_class(data=packet_data, stream=packet_stream)
-        constr_packet.load()
-        return constr_packet
+        packet_length = await self.socket.read_varint()
+        if not 0 <= packet_length <= MAX_FRAME_SIZE:
+            raise ValueError(f"Packet of {packet_length} bytes is too large")
+        packet_data = await self.socket.recv_exactly(packet_length)
+        return self._load_packet(packet_data, packet_class, packet_id_map)
 
     def write_packet(self, constr_packet: packet.ServerPacket) -> None:
         """Write a packet to the client"""
@@ -47,12 +52,47 @@ class MinecraftProtocol():
 
         try:
             logging.debug(f"Writing packet: {type(constr_packet)}")
-            constr_packet.reply(self.socket)
+            constr_packet.reply(self.connection)
+        except OSError as oserr:
+            logging.debug(oserr)
+
+    def write_frame(self, frame: bytes) -> None:
+        """Write an already encoded and length prefixed packet, see ServerPacket.frame()"""
+
+        try:
+            self.connection.send(frame)
+        except OSError as oserr:
+            logging.debug(oserr)
+
+    @property
+    def backlog(self) -> int:
+        """The number of bytes written but not yet sent"""
+
+        return self.connection.backlog
+
+    def flush(self) -> None:
+        """Send all packets written since the last flush"""
+
+        self.connection.flush()
+
+    def close(self) -> None:
+        """Close the connection once all written packets were sent"""
+
+        try:
+            self.connection.close()
         except OSError as oserr:
             logging.debug(oserr)
 
-    def handle_status(self, status_json: dict) -> None:
-        """Handle the server list ping"""
+    def abort(self) -> None:
+        """Close the connection right away, without sending the remaining packets"""
+
+        try:
+            self.connection.abort()
+        except OSError as oserr:
+            logging.debug(oserr)
+
+    def handle_status(self, status_frame: bytes) -> None:
+        """Handle the server list ping, status_frame is the StatusResponse packet as returned by frame()"""
 
         conn_info = self.read_packet(packet_id_map=status_packets.packet_id_map)
         # client only wants ping
@@ -60,10 +100,49 @@ class MinecraftProtocol():
             self.write_packet(status_packets.PingResponse(time=conn_info.time))
         # client wants ping and status
         elif type(conn_info) == status_packets.StatusRequest:
-            self.write_packet(status_packets.StatusResponse(status_json))
+            self.write_frame(status_frame)
+            self.flush()
 
             try:
                 conn_info = self.read_packet(status_packets.PingRequest)
                 self.write_packet(status_packets.PingResponse(time=conn_info.time))
             except:
                 logging.warning("Client requestet status but not ping")
+        self.flush()
+
+    async def handle_status_async(self, status_frame: bytes) -> None:
+        """Handle the server list ping on an AsyncConnection, like handle_status()"""
+
+        conn_info = await self.read_packet_async(packet_id_map=status_packets.packet_id_map)
+        # client only wants ping
+        if type(conn_info) == status_packets.PingRequest:
+            self.write_packet(status_packets.PingResponse(time=conn_info.time))
+        # client wants ping and status
+        elif type(conn_info) == status_packets.StatusRequest:
+            self.write_frame(status_frame)
+            self.flush()
+
+            try:
+                conn_info = await self.read_packet_async(status_packets.PingRequest)
+                self.write_packet(status_packets.PingResponse(time=conn_info.time))
+            except:
+                logging.warning("Client requestet status but not ping")
+        await self.socket.drain()
+
+    def _load_packet(self, packet_data: bytes, packet_class, packet_id_map) -> packet.Packet | int:
+        packet_stream = ReadableBuffer(packet_data)
+        packet_id = binary_operations._decode_varint(packet_stream)
+
+        if packet_class is None:
+            if packet_id not in packet_id_map.keys():
+                # the packet wasn't found, return its id
+                return packet_id
+            packet_class = packet_id_map[packet_id]
+
+        if not issubclass(packet_class, packet.ClientPacket):
+            raise TypeError(f"Tried to read packet of type {packet_class} which doesn't derive from {packet.ClientPacket}")
+
+        logging.debug(f"Reading packet: {packet_class}")
+        constr_packet = packet_class(data=packet_data, stream=packet_stream)
+        constr_packet.load()
+        return constr_packet
@@ -1,16 +1,41 @@
 """A module containing the ReadableBuffer class"""
 
-# pylint: disable=R0903
+import struct
 
 class ReadableBuffer():
-    """A class for reading a bytes object bit by bit"""
+    """A cursor for reading a bytes object piece by piece without copying it"""
+
+    __slots__ = ("data", "offset")
 
     def __init__(self, data: bytes) -> None:
-        self.data = data
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def __len__(self) -> int:
+        """Return the number of bytes left to read"""
+
+        return len(self.data) - self.offset
+
+    def recv(self, buffsize: int) -> memoryview:
+        """Return a view of the next buffsize bytes, or of all remaining bytes if there are less"""
+
+        start = self.offset
+        self.offset = min(start + buffsize, len(self.data))
+        return self.data[start:self.offset]
+
+    def read_byte(self) -> int:
+        """Return the next byte as an unsigned int"""
+
+        try:
+            value = self.data[self.offset]
+        except IndexError as err:
+            raise struct.error("unpack requires a buffer of 1 bytes") from err
+        self.offset += 1
+        return value
 
-    def recv(self, buffsize: int) -> bytes:
-        """Slice off and return the requestet amount ob bytes"""
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        """Decode the next fmt.size bytes with a precompiled struct"""
 
-        sliced_data = self.data[0:buffsize]
-        self.data = self.data[buffsize:]
-        return sliced_data
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
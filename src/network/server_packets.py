@@ -3,8 +3,8 @@
 import json
 import random
 import math
+import struct
 
-from core import binary_operations
 from dataclass.position import Position
 from dataclass.rotation import Rotation
 from network.packet import ServerPacket
@@ -12,15 +12,26 @@ from network.packet import ServerPacket
 packet_id_map: dict
 
 class KeepAlive(ServerPacket): # 0x00
+    packet_id = 0x00
+    fields = [
+        ("keep_alive_id", "int"),
+    ]
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.keep_alive_id = random.randint(0, math.pow(2, 31) - 1)
 
-    def reply(self, socket_conn):
-        super().reply(socket_conn, data=binary_operations._encode_varint(0x00) +
-                                         binary_operations._encode_int(self.keep_alive_id)) # random integer
-
 class JoinGame(ServerPacket): # 0x01
+    packet_id = 0x01
+    fields = [
+        ("entity_id", "int"),
+        ("gamemode", "unsigned_byte"), # 0=survival, 1=creative
+        ("dim_id", "byte"), # -1=nether, 0=overworld, 1=end
+        ("difficulty", "unsigned_byte"), # 0=peaceful
+        ("max_players", "unsigned_byte"),
+        ("level_type", "string"),
+    ]
+
     def __init__(self, entity_id: int, gamemode: int, dim_id: int, difficulty: int, max_players: int, level_type: str, **kwargs):
         super().__init__(**kwargs)
         self.entity_id = entity_id
@@ -30,16 +41,12 @@ class JoinGame(ServerPacket): # 0x01
         self.max_players = max_players
         self.level_type = level_type
 
-    def reply(self, socket_conn):
-        super().reply(socket_conn, data=binary_operations._encode_varint(0x01) +
-                                         binary_operations._encode_int(self.entity_id) + # player entity id
-                                         binary_operations._encode_unsigned_byte(self.gamemode) + # gamemode, 0=survival, 1=creative
-                                         binary_operations._encode_byte(self.dim_id) + # dimension, -1=nether, 0=overworld, 1=end
-                                         binary_operations._encode_unsigned_byte(self.difficulty) + # difficulty, 0=peaceful
-                                         binary_operations._encode_unsigned_byte(self.max_players) + # max players
-                                         binary_operations._encode_string(self.level_type)) # level type
-
 class ChatMesage(ServerPacket): # 0x02
+    packet_id = 0x02
+    fields = [
+        ("message", "string"),
+    ]
+
     def __init__(self, message: str|dict, **kwargs):
         super().__init__(**kwargs)
         if isinstance(message, dict):
@@ -49,53 +56,81 @@ class ChatMesage(ServerPacket): # 0x02
                 "text": message
             })
 
-    def reply(self, socket_conn):
-        super().reply(socket_conn, data=binary_operations._encode_varint(0x02) +
-                                         binary_operations._encode_string(self.message))
-
 class SpawnPosition(ServerPacket): # 0x05
+    packet_id = 0x05
+    fields = [
+        ("position.x", "int"),
+        ("position.y", "int"),
+        ("position.z", "int"),
+    ]
+
     def __init__(self, position: Position, **kwargs):
         super().__init__(**kwargs)
         self.position = position
 
-    def reply(self, socket_conn):
-        super().reply(socket_conn, data=binary_operations._encode_varint(0x05) +
-                                         binary_operations._encode_int(self.position.x) +
-                                         binary_operations._encode_int(self.position.y) +
-                                         binary_operations._encode_int(self.position.z))
-
 class PlayerPositionAndLook(ServerPacket): # 0x08
+    packet_id = 0x08
+    fields = [
+        ("position.x", "double"),
+        ("position.y", "double"),
+        ("position.z", "double"),
+        ("look.yaw", "float"),
+        ("look.pitch", "float"),
+        ("on_ground", "boolean"),
+    ]
+
     def __init__(self, position: Position, look: Rotation, on_ground: bool, **kwargs):
         super().__init__(**kwargs)
         self.position = position
         self.look = look
         self.on_ground = on_ground
 
-    def reply(self, socket_conn):
-        super().reply(socket_conn, data=binary_operations._encode_varint(0x08) +
-                                         binary_operations._encode_double(self.position.x) +
-                                         binary_operations._encode_double(self.position.y) +
-                                         binary_operations._encode_double(self.position.z) +
-                                         binary_operations._encode_float(self.look.yaw) +
-                                         binary_operations._encode_float(self.look.pitch) +
-                                         binary_operations._encode_boolean(self.on_ground))
-
 class BlockChange(ServerPacket): # 0x23
+    packet_id = 0x23
+    fields = [
+        ("position.x", "int"),
+        ("position.y", "unsigned_byte"),
+        ("position.z", "int"),
+        ("block_id", "varint"),
+        ("metadata", "unsigned_byte"),
+    ]
+
     def __init__(self, position: Position, block_id: int, metadata: bytes, **kwargs):
         super().__init__(**kwargs)
         self.position = position
         self.block_id = block_id
         self.metadata = metadata
 
-    def reply(self, socket_conn):
-        super().reply(socket_conn, data=binary_operations._encode_varint(0x23) +
-                                         binary_operations._encode_int(self.position.x) +
-                                         binary_operations._encode_unsigned_byte(self.position.y) +
-                                         binary_operations._encode_int(self.position.z) +
-                                         binary_operations._encode_varint(self.block_id) +
-                                         binary_operations._encode_unsigned_byte(self.metadata))
+class ChunkData(ServerPacket): # 0x21
+    packet_id = 0x21
+    fields = [
+        ("chunk_x", "int"),
+        ("chunk_z", "int"),
+        ("ground_up_continuous", "boolean"), # with an empty primary bitmap, this unloads the column
+        ("primary_bitmap", "unsigned_short"),
+        ("add_bitmap", "unsigned_short"),
+        ("data", "int_prefixed_bytes"),
+    ]
+
+    def __init__(self, chunk_x: int, chunk_z: int, ground_up_continuous: bool, primary_bitmap: int, add_bitmap: int, data: bytes, **kwargs):
+        super().__init__(**kwargs)
+        self.chunk_x = chunk_x
+        self.chunk_z = chunk_z
+        self.ground_up_continuous = ground_up_continuous
+        self.primary_bitmap = primary_bitmap
+        self.add_bitmap = add_bitmap
+        self.data = data
 
 class MapChunkBulk(ServerPacket): # 0x26
+    packet_id = 0x26
+    fields = [
+        ("chunk_column_count", "short"),
+        ("data_len", "int"),
+        ("sky_light", "boolean"),
+        ("data", "bytes"),
+        ("metadata", "bytes"),
+    ]
+
     def __init__(self, chunk_column_count: int, data_len: int, sky_light: bool, data: bytes, metadata: bytes, **kwargs):
         super().__init__(**kwargs)
         self.chunk_column_count = chunk_column_count
@@ -104,28 +139,26 @@ class MapChunkBulk(ServerPacket): # 0x26
         self.data = data
         self.metadata = metadata
 
-    def reply(self, socket_conn):
-        super().reply(socket_conn, data=binary_operations._encode_varint(0x26) +
-                                         binary_operations._encode_short(self.chunk_column_count) +
-                                         binary_operations._encode_int(self.data_len) +
-                                         binary_operations._encode_boolean(self.sky_light) +
-                                         self.data +
-                                         self.metadata)
-
 class PlayerListItem(ServerPacket): # 0x38
+    packet_id = 0x38
+    fields = [
+        ("player_name", "string"),
+        ("online", "boolean"),
+        ("ping", "short"),
+    ]
+
     def __init__(self, player_name: str, online: bool, ping: int, **kwargs):
         super().__init__(**kwargs)
         self.player_name = player_name
         self.online = online
         self.ping = ping
 
-    def reply(self, socket_conn):
-        super().reply(socket_conn, data=binary_operations._encode_varint(0x38) +
-                                        binary_operations._encode_string(self.player_name) +
-                                        binary_operations._encode_boolean(self.online) +
-                                        binary_operations._encode_short(self.ping))
-
 class Disconnect(ServerPacket): # 0x40
+    packet_id = 0x40
+    fields = [
+        ("reason", "string"),
+    ]
+
     def __init__(self, reason: str|dict, **kwargs):
         super().__init__(**kwargs)
         if isinstance(reason, dict):
@@ -135,11 +168,22 @@ class Disconnect(ServerPacket): # 0x40
                 "text": reason
             })
 
-    def reply(self, socket_conn):
-        super().reply(socket_conn, data=binary_operations._encode_varint(0x40) +
-                                        binary_operations._encode_string(self.reason))
-
 class SpawnPlayer(ServerPacket): #0x0C
+    packet_id = 0x0C
+    fields = [
+        ("entity_id", "varint"),
+        ("player_uuid", "string"),
+        ("player_name", "string"),
+        ("data", "varint_prefixed_bytes"),
+        ("pos.x", "fixed_point_int"), # positions as fixed-point numbers
+        ("pos.y", "fixed_point_int"),
+        ("pos.z", "fixed_point_int"),
+        ("rot.yaw", "angle"),
+        ("rot.pitch", "angle"),
+        ("current_item", "short"),
+        ("metadata", "bytes"),
+    ]
+
     def __init__(self, entity_id: int, player_uuid: str, player_name: str, data: bytes, pos: Position, rot: Rotation, current_item: int, metadata: bytes, **kwargs):
         super().__init__(**kwargs)
         self.entity_id = entity_id
@@ -151,17 +195,94 @@ class SpawnPlayer(ServerPacket): #0x0C
         self.current_item = current_item
         self.metadata = metadata
 
-    def reply(self, socket_conn):
-        super().reply(socket_conn, data=binary_operations._encode_varint(0x0C) +
-                                        binary_operations._encode_varint(self.entity_id) +
-                                        binary_operations._encode_string(self.player_uuid) +
-                                        binary_operations._encode_string(self.player_name) +
-                                        binary_operations._encode_varint(len(self.data)) +
-                                        self.data +
-                                        binary_operations._encode_int(int(self.pos.x * 32)) + # positions as fixed-point numbers
-                                        binary_operations._encode_int(int(self.pos.y * 32)) +
-                                        binary_operations._encode_int(int(self.pos.z * 32)) +
-                                        binary_operations._encode_byte(self.rot.yaw) +
-                                        binary_operations._encode_byte(self.rot.pitch) +
-                                        binary_operations._encode_short(self.current_item) +
-                                        self.metadata)
+class DestroyEntities(ServerPacket): # 0x13
+    packet_id = 0x13
+    fields = [
+        ("count", "byte"),
+        ("entity_ids_data", "bytes"),
+    ]
+
+    # the count is a signed byte
+    MAX_ENTITIES = 127
+
+    def __init__(self, entity_ids: list[int], **kwargs):
+        super().__init__(**kwargs)
+        self.count = len(entity_ids)
+        self.entity_ids_data = struct.pack(f">{len(entity_ids)}i", *entity_ids)
+
+class EntityRelativeMove(ServerPacket): # 0x15
+    packet_id = 0x15
+    fields = [
+        ("entity_id", "int"),
+        ("dx", "byte"), # in 1/32 blocks
+        ("dy", "byte"),
+        ("dz", "byte"),
+    ]
+
+    def __init__(self, entity_id: int, dx: int, dy: int, dz: int, **kwargs):
+        super().__init__(**kwargs)
+        self.entity_id = entity_id
+        self.dx = dx
+        self.dy = dy
+        self.dz = dz
+
+class EntityLook(ServerPacket): # 0x16
+    packet_id = 0x16
+    fields = [
+        ("entity_id", "int"),
+        ("rot.yaw", "angle"),
+        ("rot.pitch", "angle"),
+    ]
+
+    def __init__(self, entity_id: int, rot: Rotation, **kwargs):
+        super().__init__(**kwargs)
+        self.entity_id = entity_id
+        self.rot = rot
+
+class EntityLookAndRelativeMove(ServerPacket): # 0x17
+    packet_id = 0x17
+    fields = [
+        ("entity_id", "int"),
+        ("dx", "byte"), # in 1/32 blocks
+        ("dy", "byte"),
+        ("dz", "byte"),
+        ("rot.yaw", "angle"),
+        ("rot.pitch", "angle"),
+    ]
+
+    def __init__(self, entity_id: int, dx: int, dy: int, dz: int, rot: Rotation, **kwargs):
+        super().__init__(**kwargs)
+        self.entity_id = entity_id
+        self.dx = dx
+        self.dy = dy
+        self.dz = dz
+        self.rot = rot
+
+class EntityTeleport(ServerPacket): # 0x18
+    packet_id = 0x18
+    fields = [
+        ("entity_id", "int"),
+        ("pos.x", "fixed_point_int"),
+        ("pos.y", "fixed_point_int"),
+        ("pos.z", "fixed_point_int"),
+        ("rot.yaw", "angle"),
+        ("rot.pitch", "angle"),
+    ]
+
+    def __init__(self, entity_id: int, pos: Position, rot: Rotation, **kwargs):
+        super().__init__(**kwargs)
+        self.entity_id = entity_id
+        self.pos = pos
+        self.rot = rot
+
+class EntityHeadLook(ServerPacket): # 0x19
+    packet_id = 0x19
+    fields = [
+        ("entity_id", "int"),
+        ("head_yaw", "angle"),
+    ]
+
+    def __init__(self, entity_id: int, head_yaw: float, **kwargs):
+        super().__init__(**kwargs)
+        self.entity_id = entity_id
+        self.head_yaw = head_yaw
@@ -0,0 +1,124 @@
+"""Queues the data written to a socket and sends it from a writer thread"""
+
+import logging
+import socket
+import threading
+
+# a connection is closed when more than this is waiting to be sent
+MAX_QUEUED_BYTES = 32 * 1024 * 1024
+
+class SocketConnection():
+    """Collects writes to a socket until flush() hands them to a writer thread in one sendall()
+
+    Writing never blocks, so a client with a full TCP window can only stall its own writer thread.
+    """
+
+    def __init__(self, sock: socket.socket, max_bytes: int = MAX_QUEUED_BYTES) -> None:
+        self.socket = sock
+        self.max_bytes = max_bytes
+        self._cond = threading.Condition()
+        self._pending: list[bytes] = []
+        self._pending_bytes = 0
+        # bytes the writer thread is sending right now
+        self._sending_bytes = 0
+        self._flush_requested = False
+        self._closing = False
+        self._writer: threading.Thread | None = None
+
+        # metrics
+        self.sends = 0
+        self.bytes_sent = 0
+
+    @property
+    def backlog(self) -> int:
+        """The number of bytes written but not yet handed to the operating system"""
+
+        return self._pending_bytes + self._sending_bytes
+
+    def send(self, data: bytes) -> int:
+        """Queue data for the next flush, can be called from any thread"""
+
+        with self._cond:
+            if self._closing:
+                raise ConnectionResetError("Connection is closed")
+            if self.backlog + len(data) > self.max_bytes:
+                self._closing = True
+                self._shutdown()
+                raise ConnectionResetError(f"Closed connection with more than {self.max_bytes} bytes queued")
+            self._pending.append(data)
+            self._pending_bytes += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        """Let the writer thread send everything queued so far"""
+
+        with self._cond:
+            if not self._pending:
+                return
+            self._request_flush()
+
+    def close(self) -> None:
+        """Close the connection once everything queued was sent"""
+
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._request_flush()
+
+    def abort(self) -> None:
+        """Close the connection right away, dropping everything queued"""
+
+        with self._cond:
+            self._closing = True
+            self._shutdown()
+
+    def wait_closed(self, timeout: float | None = None) -> None:
+        """Wait for close() to finish, then shut the socket down even if the client didn't read everything"""
+
+        if self._writer is not None:
+            self._writer.join(timeout)
+        self._shutdown()
+
+    def _request_flush(self) -> None:
+        self._flush_requested = True
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._run, name="connection-writer", daemon=True)
+            self._writer.start()
+        self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._flush_requested:
+                    self._cond.wait()
+                self._flush_requested = False
+                pending = self._pending
+                self._pending = []
+                self._sending_bytes = self._pending_bytes
+                self._pending_bytes = 0
+                closing = self._closing
+
+            try:
+                if pending:
+                    self.socket.sendall(b"".join(pending))
+                    self.sends += 1
+                    self.bytes_sent += self._sending_bytes
+            except OSError as oserr:
+                logging.debug(oserr)
+                closing = True
+            finally:
+                self._sending_bytes = 0
+
+            if closing:
+                with self._cond:
+                    self._closing = True
+                self._shutdown()
+                return
+
+    def _shutdown(self) -> None:
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            # already closed
+            pass
@@ -9,3 +9,13 @@ def server():
     Thread(target=main.run, daemon=True).start()
     sleep(0.5)
     yield "localhost:20003"
+
+@pytest.fixture
+def region_path(tmp_path, monkeypatch):
+    from database import json_db_manager, region_db_manager
+
+    path = tmp_path / "region"
+    monkeypatch.setattr(region_db_manager, "REGION_PATH", str(path))
+    monkeypatch.setattr(json_db_manager, "SAVEPATH", str(tmp_path / "world.json"))
+    yield path
+    region_db_manager.close()
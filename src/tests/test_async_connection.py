@@ -0,0 +1,103 @@
+import asyncio
+import socket
+import struct
+
+import pytest
+
+from core import binary_operations
+from core.iridium_server import IridiumServer
+from network import handshake_packets, login_packets, server_packets
+from network.async_connection import AsyncConnection
+from network.protocol import MinecraftProtocol
+
+def _frame(data: bytes) -> bytes:
+    return binary_operations._encode_varint(len(data)) + data
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    length = 0
+    shift = 0
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return await reader.readexactly(length)
+
+async def _connect() -> tuple[AsyncConnection, asyncio.StreamReader, asyncio.StreamWriter]:
+    server_sock, client_sock = socket.socketpair()
+    reader, writer = await asyncio.open_connection(sock=server_sock)
+    client_reader, client_writer = await asyncio.open_connection(sock=client_sock)
+    return AsyncConnection(reader, writer), client_reader, client_writer
+
+def test_packets_are_framed_and_sent_on_flush():
+    async def run():
+        connection, client_reader, client_writer = await _connect()
+        mcprot = MinecraftProtocol(connection)
+        for _ in range(50):
+            mcprot.write_packet(server_packets.ChatMesage("hello"))
+        assert mcprot.backlog == 50 * 20
+
+        mcprot.flush()
+        frames = [await _read_frame(client_reader) for _ in range(50)]
+        assert set(frames) == {server_packets.ChatMesage("hello").encode()}
+
+        client_writer.write(_frame(b"\x00" + binary_operations._encode_string("alice")))
+        packet = await mcprot.read_packet_async(login_packets.LoginStart)
+        assert packet.name == "alice"
+
+        client_writer.close()
+        await connection.wait_closed()
+    asyncio.run(run())
+
+def test_close_sends_queued_data_and_abort_drops_it():
+    async def run():
+        connection, client_reader, client_writer = await _connect()
+        connection.send(b"queued")
+        connection.close()
+        assert await client_reader.read() == b"queued"
+        with pytest.raises(ConnectionResetError):
+            connection.send(b"late")
+        client_writer.close()
+
+        connection, client_reader, client_writer = await _connect()
+        connection.send(b"dropped")
+        connection.abort()
+        assert await client_reader.read() == b""
+        client_writer.close()
+    asyncio.run(run())
+
+def test_overlong_varints_are_rejected():
+    async def run():
+        connection, client_reader, client_writer = await _connect()
+        client_writer.write(b"\xff" * 6)
+        with pytest.raises(ValueError):
+            await connection.read_varint()
+
+        # a length that doesn't fit into a packet
+        client_writer.write(binary_operations._encode_varint(1 << 24))
+        with pytest.raises(ValueError):
+            await MinecraftProtocol(connection).read_packet_async()
+        client_writer.close()
+        await connection.wait_closed()
+    asyncio.run(run())
+
+def test_login_through_the_asyncio_server(region_path):
+    server = IridiumServer(20003, "")
+
+    async def run():
+        server_sock, client_sock = socket.socketpair()
+        client_reader, client_writer = await asyncio.open_connection(sock=client_sock)
+        reader, writer = await asyncio.open_connection(sock=server_sock)
+        task = asyncio.create_task(server.handle_client_connect_async(reader, writer))
+
+        handshake = (b"\x00" + binary_operations._encode_varint(handshake_packets.DEFAULT_PROTOCOL_VERSION)
+                     + binary_operations._encode_string("localhost") + struct.pack(">H", 20003) + b"\x02")
+        client_writer.write(_frame(handshake) + _frame(b"\x00" + binary_operations._encode_string("alice")))
+
+        packet_ids = [(await _read_frame(client_reader))[0] for _ in range(2)]
+        assert packet_ids == [login_packets.LoginSuccess.packet_id, server_packets.JoinGame.packet_id]
+        assert [player.name for player in server.players] == ["alice"]
+
+        client_writer.close()
+        await asyncio.wait_for(task, 5)
+    asyncio.run(run())
@@ -0,0 +1,53 @@
+from blocks.log import Log
+from blocks.tnt import TNT
+from core import tick_timer
+from core.autosave import AutoSaver
+from database import region_db_manager
+from dataclass.save import ChunkColumn, World
+
+def test_only_dirty_columns_are_saved(region_path):
+    world = World(0)
+    world.set_column(0, 0, ChunkColumn(), dirty=False)
+    world.set_column(1, 0, ChunkColumn(), dirty=False)
+    world.set_block_id(20, 5, 3, Log.block_id)
+    assert world.dirty_columns == {(1, 0)}
+
+    saver = AutoSaver(world, 20)
+    saver.flush()
+    assert world.dirty_columns == set()
+    assert saver.stats()["last_dirty_count"] == 1
+    assert region_db_manager.load_column(1, 0).get_block_id(4, 5, 3) == Log.block_id
+    assert region_db_manager.load_column(0, 0) is None
+
+    # nothing changed, nothing to write
+    saver.flush()
+    assert saver.stats()["last_dirty_count"] == 0
+    assert saver.stats()["saved_columns"] == 1
+
+def test_saves_periodically(region_path):
+    world = World(0)
+    saver = AutoSaver(world, 3)
+    saver.start()
+    try:
+        world.set_block_id(0, 0, 0, TNT.block_id)
+        for _ in range(3):
+            tick_timer.tick()
+        saver._last_save.result()
+        assert saver.saves == 1
+        assert region_db_manager.column_exists(0, 0)
+    finally:
+        saver.shutdown()
+
+def test_shutdown_saves_after_the_writer_was_shut_down(region_path):
+    world = World(0)
+    saver = AutoSaver(world, 20)
+    world.set_block_id(0, 0, 0, Log.block_id)
+    saver.save_dirty()
+    world.set_block_id(16, 0, 0, TNT.block_id)
+
+    # what concurrent.futures does at interpreter exit, before the atexit handlers run
+    saver._writer.shutdown()
+    saver.shutdown()
+    assert world.dirty_columns == set()
+    assert region_db_manager.load_column(0, 0).get_block_id(0, 0, 0) == Log.block_id
+    assert region_db_manager.load_column(1, 0).get_block_id(0, 0, 0) == TNT.block_id
@@ -0,0 +1,41 @@
+import pytest
+
+from blocks import block_registry
+from blocks.air import Air
+from blocks.block import Block
+from blocks.log import Log
+from dataclass.position import Position
+from dataclass.save import World
+
+def test_blocks_are_shared_per_id_and_metadata():
+    log = block_registry.get(Log.block_id, 2)
+    assert isinstance(log, Log)
+    assert log.metadata == 2
+    assert block_registry.get(Log.block_id, 2) is log
+    assert block_registry.get(Log.block_id) is not log
+    assert block_registry.get(Air.block_id) is block_registry.AIR
+
+def test_blocks_are_immutable():
+    with pytest.raises(AttributeError):
+        block_registry.AIR.metadata = 3
+    with pytest.raises(AttributeError):
+        block_registry.AIR.block_id = 1
+
+def test_unknown_block_ids_get_a_plain_type():
+    block_obj = block_registry.get(200, 1)
+    assert type(block_obj).__mro__[1] is Block
+    assert (block_obj.block_id, block_obj.metadata) == (200, 1)
+    assert not block_registry.is_registered(200)
+
+def test_invalid_blocks_are_rejected():
+    for block_id, metadata in ((256, 0), (-1, 0), (1, 16)):
+        with pytest.raises(ValueError):
+            block_registry.get(block_id, metadata)
+    with pytest.raises(ValueError):
+        block_registry.register(Log)
+
+def test_world_returns_registry_blocks():
+    world = World(0)
+    world.set_block(Position(4, 70, 4), block_registry.get(Log.block_id, 3))
+    assert world.get_block(Position(4, 70, 4)) is block_registry.get(Log.block_id, 3)
+    assert world.get_block(Position(4, 71, 4)) is block_registry.AIR
@@ -0,0 +1,40 @@
+import uuid
+from types import SimpleNamespace
+
+from core import binary_operations
+from core.iridium_server import IridiumServer
+from network import server_packets
+
+class _RecordingProtocol():
+    def __init__(self) -> None:
+        self.frames = []
+
+    def write_frame(self, frame: bytes) -> None:
+        self.frames.append(frame)
+
+def _server_with_players(*names: str) -> IridiumServer:
+    server = IridiumServer(20003, "")
+    for name in names:
+        server.players.add(SimpleNamespace(uuid=uuid.uuid4(), name=name, mcprot=_RecordingProtocol()))
+    return server
+
+def test_frame_is_length_prefixed_packet():
+    packet = server_packets.ChatMesage("hello")
+    data = packet.encode()
+    assert packet.frame() == binary_operations._encode_varint(len(data)) + data
+
+def test_broadcast_encodes_once_for_all_players():
+    server = _server_with_players("a", "b", "c")
+    server.broadcast(server_packets.ChatMesage("hello"))
+
+    frames = [player.mcprot.frames for player in server.players]
+    assert all(len(player_frames) == 1 for player_frames in frames)
+    # every player got the very same bytes object
+    assert frames[0][0] is frames[1][0] is frames[2][0]
+    assert frames[0][0] == server_packets.ChatMesage("hello").frame()
+
+def test_broadcast_to_subset():
+    server = _server_with_players("a", "b", "c")
+    server.broadcast(server_packets.ChatMesage("hello"), [server.players.players()[1]])
+
+    assert [len(player.mcprot.frames) for player in server.players] == [0, 1, 0]
@@ -0,0 +1,51 @@
+import zlib
+
+from blocks.log import Log
+from core.chunk_cache import ChunkPacketCache, build_bulk_payload, compress_column
+from dataclass.save import ChunkColumn, World
+
+def _column(block_id: int) -> ChunkColumn:
+    column = ChunkColumn()
+    for y in range(20):
+        column.set_block_id(y % 16, y, 3, block_id)
+    return column
+
+def test_bulk_payload_is_one_zlib_stream():
+    columns = [_column(block_id) for block_id in (1, 17, 46)]
+    entries = [compress_column(c, -c, column) for c, column in enumerate(columns)]
+
+    count, data_len, sky_light, data, metadata = build_bulk_payload(entries)
+    assert count == 3
+    assert sky_light
+    assert data_len == len(data)
+    assert zlib.decompress(data) == b"".join(column.serialize()[0] for column in columns)
+    assert metadata == b"".join(entry.metadata for entry in entries)
+
+def test_cache_lru_eviction_and_counters():
+    entries = [compress_column(c, 0, _column(17)) for c in range(3)]
+    cache = ChunkPacketCache(max_bytes=entries[0].size * 2)
+
+    cache.put(entries[0])
+    cache.put(entries[1])
+    assert cache.get(0, 0) is entries[0]
+    cache.put(entries[2])
+
+    # 1|0 was the least recently used column
+    assert cache.get(1, 0) is None
+    assert cache.get(0, 0) is entries[0]
+    assert cache.get(2, 0) is entries[2]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (3, 1, 1, 2)
+    assert stats["size"] <= stats["max_size"]
+
+def test_set_block_invalidates_cached_column():
+    world = World(0)
+    world.set_block_id(5, 5, 5, Log.block_id)
+
+    first = world.get_compressed_column(0, 0)
+    assert world.get_compressed_column(0, 0) is first
+
+    world.set_block_id(6, 5, 5, Log.block_id)
+    second = world.get_compressed_column(0, 0)
+    assert second is not first
+    assert world.packet_cache.stats()["misses"] == 2
@@ -0,0 +1,52 @@
+from blocks.air import Air
+from blocks.log import Log
+from blocks.tnt import TNT
+from dataclass.position import Position
+from dataclass.save import Chunk, ChunkColumn, World
+
+def test_chunk_block_ids():
+    chunk = Chunk()
+    assert chunk.get_block_id(3, 4, 5) == Air.block_id
+
+    chunk.set_block_id(3, 4, 5, Log.block_id)
+    assert chunk.get_block_id(3, 4, 5) == Log.block_id
+    assert chunk.blocks[(4 << 8) | (5 << 4) | 3] == Log.block_id
+    assert len(chunk.blocks) == 4096
+
+def test_chunk_metadata_nibbles():
+    chunk = Chunk()
+    chunk.set_block_id(0, 0, 0, Log.block_id, 0x3)
+    chunk.set_block_id(1, 0, 0, Log.block_id, 0xC)
+    assert chunk.get_block_metadata(0, 0, 0) == 0x3
+    assert chunk.get_block_metadata(1, 0, 0) == 0xC
+    assert chunk.metadata[0] == 0xC3
+
+    chunk.set_block_id(0, 0, 0, Air.block_id)
+    assert chunk.get_block_metadata(0, 0, 0) == 0
+    assert chunk.get_block_metadata(1, 0, 0) == 0xC
+
+def test_world_block_api():
+    world = World(0)
+    world.set_block(Position(-1, 70, 33), TNT())
+    assert world.chunk_exists(-1, 2)
+    assert isinstance(world.get_block(Position(-1, 70, 33)), TNT)
+    assert world.get_block_id(-1, 70, 33) == TNT.block_id
+    assert world.get_block(Position(-1, 71, 33)) is world.get_block(Position(-2, 5, 40))
+    assert not world.chunk_exists(5, 5)
+    assert 5 not in world.chunk_columns
+
+def test_column_serialization_layout():
+    column = ChunkColumn()
+    column.set_block_id(1, 0, 0, Log.block_id, 0x5)
+    column.set_block_id(2, 35, 0, TNT.block_id)
+
+    data, primary_bitmap = column.serialize()
+    assert primary_bitmap == 0b101
+    assert len(data) == 2 * (4096 + 3 * 2048) + 256
+
+    # all block types first, then all metadata, block light and sky light, then biomes
+    assert data[1] == Log.block_id
+    assert data[4096 + (3 << 8) + 2] == TNT.block_id
+    assert data[2 * 4096] == 0x50
+    assert data[2 * 4096 + 2 * 2048 + 2 * 2048] == 0xff
+    assert data[-256:] == b"\x01" * 256
@@ -0,0 +1,96 @@
+from concurrent.futures import Future
+
+from blocks.log import Log
+from core.chunk_streamer import MAX_COLUMN_RETRIES, ChunkStreamer, _spiral_offsets
+from dataclass.save import World
+from network import server_packets
+
+class RecordingProtocol():
+    def __init__(self) -> None:
+        self.packets = []
+
+    def write_packet(self, constr_packet) -> None:
+        self.packets.append(constr_packet)
+
+def _world(radius: int) -> World:
+    world = World(0)
+    for chunk_x in range(-radius - 2, radius + 3):
+        for chunk_z in range(-radius - 2, radius + 3):
+            world.set_block_id(chunk_x * 16, 0, chunk_z * 16, Log.block_id)
+    return world
+
+def test_spiral_is_nearest_first():
+    offsets = _spiral_offsets(2)
+    assert len(offsets) == 25
+    assert offsets[0] == (0, 0)
+    rings = [max(abs(dx), abs(dz)) for dx, dz in offsets]
+    assert rings == sorted(rings)
+
+def test_columns_are_batched_within_budget():
+    world = _world(2)
+    mcprot = RecordingProtocol()
+    streamer = ChunkStreamer()
+    column_size = world.get_compressed_column(0, 0).size
+
+    streamer.update(0, 0, 2, mcprot)
+    assert streamer.tick(world, mcprot, column_size * 3) == 3
+    assert len(mcprot.packets) == 1
+    assert mcprot.packets[0].chunk_column_count == 3
+
+    while streamer.pending:
+        streamer.tick(world, mcprot, column_size * 3)
+    assert len(streamer.loaded) == 25
+
+def test_moving_away_unloads_columns():
+    world = _world(3)
+    mcprot = RecordingProtocol()
+    streamer = ChunkStreamer()
+
+    streamer.update(0, 0, 1, mcprot)
+    streamer.tick(world, mcprot, 1 << 20)
+    mcprot.packets.clear()
+
+    streamer.update(2, 0, 1, mcprot)
+    unloaded = {(p.chunk_x, p.chunk_z) for p in mcprot.packets if isinstance(p, server_packets.ChunkData)}
+    # column x=0 stays loaded, it's within the one column of slack
+    assert unloaded == {(-1, z) for z in (-1, 0, 1)}
+    assert streamer.pending == 6
+
+class _FlakySource():
+    """Fails the first requests of a column, then hands out the world's columns"""
+
+    def __init__(self, world: World, failures: int) -> None:
+        self.world = world
+        self.failures = failures
+        self.requests = 0
+
+    def request_column(self, chunk_x: int, chunk_z: int) -> Future:
+        self.requests += 1
+        if self.failures:
+            self.failures -= 1
+            future = Future()
+            future.set_exception(OSError("broken region file"))
+            return future
+        return self.world.request_column(chunk_x, chunk_z)
+
+def test_failed_columns_are_requested_again():
+    source = _FlakySource(_world(0), 2)
+    mcprot = RecordingProtocol()
+    streamer = ChunkStreamer()
+
+    streamer.update(0, 0, 0, mcprot)
+    for _ in range(3):
+        streamer.tick(source, mcprot, 1 << 20)
+    assert streamer.loaded == {(0, 0)}
+    assert source.requests == 3
+
+def test_failed_columns_give_up_after_retries():
+    source = _FlakySource(_world(0), MAX_COLUMN_RETRIES + 5)
+    mcprot = RecordingProtocol()
+    streamer = ChunkStreamer()
+
+    streamer.update(0, 0, 0, mcprot)
+    for _ in range(MAX_COLUMN_RETRIES + 5):
+        streamer.tick(source, mcprot, 1 << 20)
+    assert source.requests == MAX_COLUMN_RETRIES + 1
+    assert streamer.pending == 0 and not streamer.loaded
@@ -0,0 +1,96 @@
+import time
+
+from blocks.log import Log
+from blocks.tnt import TNT
+from core.chunk_workers import PROCESS_MODE, ChunkWorkerPool
+from core.worldgen import WorldGenerator
+from database import region_db_manager
+from dataclass.save import ChunkColumn, World
+
+def _wait(pool: ChunkWorkerPool, futures: list) -> None:
+    deadline = time.monotonic() + 30
+    while not all(future.done() for future in futures):
+        assert time.monotonic() < deadline
+        pool.process_completed()
+        time.sleep(0.001)
+
+def test_columns_are_generated_off_thread_and_installed_on_completion(region_path):
+    world = World(0)
+    pool = ChunkWorkerPool(world, WorldGenerator("flat", world))
+    try:
+        futures = [pool.request_column(x, 0) for x in range(4)]
+        assert pool.request_column(0, 0) is futures[0]
+
+        _wait(pool, futures)
+        assert world.get_block_id(1, 5, 1) == Log.block_id
+        assert [future.result().chunk_x for future in futures] == [0, 1, 2, 3]
+        assert pool.pending == 0
+        assert pool.request_column(0, 0).result() is futures[0].result()
+    finally:
+        pool.shutdown()
+
+def test_modified_columns_are_compressed_again(region_path):
+    world = World(0)
+    pool = ChunkWorkerPool(world, WorldGenerator("flat", world))
+    try:
+        first = pool.request_column(0, 0)
+        _wait(pool, [first])
+
+        world.set_block_id(0, 10, 0, TNT.block_id)
+        second = pool.request_column(0, 0)
+        _wait(pool, [second])
+        assert second.result() is not first.result()
+        assert second.result() is world.packet_cache.get(0, 0)
+    finally:
+        pool.shutdown()
+
+def test_saved_columns_are_loaded_instead_of_generated(region_path):
+    saved = ChunkColumn()
+    saved.set_block_id(3, 70, 3, TNT.block_id)
+    region_db_manager.save_column(2, -1, saved)
+
+    world = World(0)
+    pool = ChunkWorkerPool(world, WorldGenerator("flat", world))
+    try:
+        futures = [pool.request_column(2, -1), pool.request_column(3, -1)]
+        _wait(pool, futures)
+        assert world.get_column(2, -1) == saved
+        assert world.get_block_id(49, 5, -13) == Log.block_id
+        # only the generated column has to be saved
+        assert world.dirty_columns == {(3, -1)}
+    finally:
+        pool.shutdown()
+
+def test_process_mode_generates_into_shared_memory(region_path):
+    world = World(0)
+    pool = ChunkWorkerPool(world, WorldGenerator("flat", world), mode=PROCESS_MODE)
+    try:
+        futures = [pool.request_column(x, 0) for x in range(3)]
+        _wait(pool, futures)
+        assert world.get_block_id(33, 5, 1) == Log.block_id
+        assert world.dirty_columns == {(0, 0), (1, 0), (2, 0)}
+
+        # the installed columns own their arrays, the shared memory is gone
+        world.set_block_id(1, 5, 1, TNT.block_id)
+        assert world.get_block_id(1, 5, 1) == TNT.block_id
+        assert all(isinstance(chunk.blocks, bytearray) for chunk in world.get_column(0, 0).chunks.values())
+
+        changed = pool.request_column(0, 0)
+        _wait(pool, [changed])
+        assert changed.result() is not futures[0].result()
+    finally:
+        pool.shutdown()
+
+def test_shutdown_fails_cancelled_requests(region_path):
+    world = World(0)
+    pool = ChunkWorkerPool(world, WorldGenerator("flat", world), workers=1)
+    futures = [pool.request_column(x, 0) for x in range(50)]
+    pool.shutdown()
+
+    # cancelled jobs are still queued as completed, they must not raise CancelledError here
+    _wait(pool, futures)
+    failed = [future for future in futures if future.exception() is not None]
+    assert failed
+    assert all(isinstance(future.exception(), RuntimeError) for future in failed)
+    assert pool.pending == 0
+    assert isinstance(pool.request_column(100, 0).exception(), RuntimeError)
@@ -0,0 +1,74 @@
+from blocks.tnt import TNT
+from core.autosave import AutoSaver
+from core.column_unloader import ColumnUnloader
+from database import region_db_manager
+from dataclass.save import ChunkColumn, World
+
+def _world(columns: int) -> World:
+    world = World(0)
+    for chunk_x in range(columns):
+        world.set_column(chunk_x, 0, ChunkColumn(), dirty=False)
+    return world
+
+def test_unviewed_columns_are_unloaded_after_the_delay(region_path):
+    world = _world(3)
+    viewed = {(0, 0)}
+    unloader = ColumnUnloader(world, AutoSaver(world, 20), lambda: viewed, delay_ticks=40, max_columns=100, interval_ticks=20)
+
+    assert unloader.check() == 0
+    assert unloader.check() == 0
+    assert unloader.check() == 2
+    assert world.chunk_exists(0, 0)
+    assert not world.chunk_exists(1, 0) and not world.chunk_exists(2, 0)
+
+def test_oldest_columns_are_unloaded_over_the_limit(region_path):
+    world = _world(2)
+    viewed = {(1, 0)}
+    unloader = ColumnUnloader(world, AutoSaver(world, 20), lambda: viewed, delay_ticks=1000, max_columns=2, interval_ticks=20)
+
+    unloader.check()
+    viewed = set()
+    world.set_column(2, 0, ChunkColumn(), dirty=False)
+    world.set_column(3, 0, ChunkColumn(), dirty=False)
+    assert unloader.check() == 2
+    assert [chunk_x for chunk_x in range(4) if world.chunk_exists(chunk_x, 0)] == [2, 3]
+
+def test_modified_columns_are_saved_before_unloading(region_path):
+    world = _world(1)
+    saver = AutoSaver(world, 20)
+    unloader = ColumnUnloader(world, saver, set, delay_ticks=0, max_columns=100, interval_ticks=20)
+
+    world.set_block_id(1, 70, 1, TNT.block_id)
+    assert unloader.check() == 0
+    assert world.chunk_exists(0, 0)
+    saver.flush()
+    assert unloader.check() == 1
+    assert not world.chunk_exists(0, 0)
+
+    # the next access loads the column from the region files again
+    world.loader = lambda chunk_x, chunk_z: world.set_column(chunk_x, chunk_z, region_db_manager.load_column(chunk_x, chunk_z), dirty=False)
+    assert world.get_block_id(1, 70, 1) == TNT.block_id
+    assert world.dirty_columns == set()
+
+def test_columns_whose_write_failed_stay_loaded(region_path, monkeypatch):
+    world = _world(1)
+    saver = AutoSaver(world, 20)
+    unloader = ColumnUnloader(world, saver, set, delay_ticks=0, max_columns=100, interval_ticks=20)
+
+    save_columns = region_db_manager.save_columns
+    def failing_save(columns):
+        raise OSError("disk full")
+    monkeypatch.setattr(region_db_manager, "save_columns", failing_save)
+    world.set_block_id(1, 70, 1, TNT.block_id)
+    saver.flush()
+    assert world.dirty_columns == set()
+    assert saver.pending_columns() == {(0, 0)}
+    assert unloader.check() == 0
+    assert world.chunk_exists(0, 0)
+
+    # the next save writes the column again, then it can be unloaded
+    monkeypatch.setattr(region_db_manager, "save_columns", save_columns)
+    saver.flush()
+    assert saver.pending_columns() == set()
+    assert unloader.check() == 1
+    assert region_db_manager.load_column(0, 0).get_block_id(1, 70, 1) == TNT.block_id
@@ -0,0 +1,94 @@
+import uuid
+
+from core.entity_tracker import EntityTracker
+from core.spatial_index import SpatialIndex
+from dataclass.position import Position
+from dataclass.rotation import Rotation
+from entities.player_entity import PlayerEntity
+from network.readable_buffer import ReadableBuffer
+from core import binary_operations
+
+class _RecordingProtocol():
+    def __init__(self) -> None:
+        self.packet_ids = []
+
+    def write_frame(self, frame: bytes) -> None:
+        stream = ReadableBuffer(frame)
+        binary_operations._decode_varint(stream)
+        self.packet_ids.append(binary_operations._decode_varint(stream))
+
+    def write_packet(self, packet) -> None:
+        self.write_frame(packet.frame())
+
+    def take(self) -> list[int]:
+        packet_ids = self.packet_ids
+        self.packet_ids = []
+        return packet_ids
+
+def _player(entity_id: int, x: float) -> PlayerEntity:
+    return PlayerEntity(uuid.uuid4(), f"player{entity_id}", 2, _RecordingProtocol(), health=20, position=Position(x, 65.62, 0),
+                        rotation=Rotation(0, 0), on_ground=True, entity_id=entity_id)
+
+def _tracker(*players: PlayerEntity) -> EntityTracker:
+    def broadcast(packet, viewers):
+        for viewer in viewers:
+            viewer.mcprot.write_frame(packet.frame())
+
+    index = SpatialIndex()
+    tracker = EntityTracker(index, broadcast, 2, 100)
+    for player in players:
+        index.add(player)
+        tracker.track(player)
+    return tracker
+
+def test_players_are_spawned_moved_and_destroyed():
+    alice = _player(1, 0)
+    bob = _player(2, 20)
+    tracker = _tracker(alice, bob)
+
+    tracker.update()
+    # SpawnPlayer and EntityHeadLook
+    assert alice.mcprot.take() == [0x0C, 0x19]
+    assert bob.mcprot.take() == [0x0C, 0x19]
+    assert tracker.viewers(alice) == {bob}
+
+    # nothing changed, nothing is sent
+    tracker.update()
+    assert alice.mcprot.take() == [] and bob.mcprot.take() == []
+
+    bob.position = Position(21, 65.62, 0)
+    tracker.spatial_index.update(bob)
+    tracker.update()
+    assert alice.mcprot.take() == [0x15]
+
+    bob.rotation = Rotation(90, 0)
+    bob.position = Position(22, 65.62, 0)
+    tracker.update()
+    # EntityLookAndRelativeMove and EntityHeadLook
+    assert alice.mcprot.take() == [0x17, 0x19]
+
+    # too far for a relative move
+    bob.position = Position(30, 65.62, 0)
+    tracker.spatial_index.update(bob)
+    tracker.update()
+    assert alice.mcprot.take() == [0x18]
+
+    # out of view distance
+    bob.position = Position(100, 65.62, 0)
+    tracker.spatial_index.update(bob)
+    tracker.update()
+    assert alice.mcprot.take() == [0x13]
+    assert bob.mcprot.take() == [0x13]
+    assert tracker.viewers(alice) == set()
+
+def test_untrack_destroys_for_viewers():
+    alice = _player(1, 0)
+    bob = _player(2, 20)
+    tracker = _tracker(alice, bob)
+    tracker.update()
+    alice.mcprot.take()
+
+    tracker.spatial_index.remove(bob)
+    tracker.untrack(bob)
+    assert alice.mcprot.take() == [0x13]
+    assert tracker.viewers(alice) == set()
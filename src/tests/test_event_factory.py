@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from events import event_factory
+from events.event import CancellableEvent, Event
+from events.event_factory import EventFactory
+
+class _BaseEvent(CancellableEvent):
+    pass
+
+class _ChildEvent(_BaseEvent):
+    pass
+
+@pytest.fixture(autouse=True)
+def _clean_factory(monkeypatch):
+    monkeypatch.setattr(EventFactory, "_callbacks", [])
+    monkeypatch.setattr(EventFactory, "_dispatch", {})
+    yield
+    EventFactory.shutdown()
+
+def test_callbacks_of_base_classes_are_called_by_priority():
+    called = []
+    EventFactory.register_callback(_ChildEvent, lambda event: called.append("child"))
+    EventFactory.register_callback(_BaseEvent, lambda event: called.append("base_low"), priority=event_factory.LOW)
+    EventFactory.register_callback(Event, lambda event: called.append("any"), priority=event_factory.MONITOR)
+
+    EventFactory.call(_ChildEvent())
+    assert called == ["base_low", "child", "any"]
+
+    called.clear()
+    EventFactory.call(_BaseEvent())
+    assert called == ["base_low", "any"]
+
+def test_cancelled_events_skip_ignore_cancelled_callbacks():
+    called = []
+    EventFactory.register_callback(_BaseEvent, lambda event: event.cancel(), priority=event_factory.HIGH)
+    EventFactory.register_callback(_BaseEvent, lambda event: called.append("monitor"), priority=event_factory.MONITOR, ignore_cancelled=True)
+    EventFactory.register_callback(_BaseEvent, lambda event: called.append("always"), priority=event_factory.MONITOR)
+
+    assert EventFactory.call(_BaseEvent()).cancelled
+    assert called == ["always"]
+
+def test_unregister_rebuilds_dispatch():
+    called = []
+    callback = lambda event: called.append(event)
+    EventFactory.register_callback(_BaseEvent, callback)
+    assert EventFactory.has_callbacks(_ChildEvent)
+
+    assert EventFactory.unregister_callback(_BaseEvent, callback)
+    assert not EventFactory.unregister_callback(_BaseEvent, callback)
+    assert not EventFactory.has_callbacks(_ChildEvent)
+    EventFactory.call(_ChildEvent())
+    assert called == []
+
+def test_deferred_callbacks_run_on_worker_thread():
+    threads = []
+    done = threading.Event()
+    def deferred(event):
+        threads.append(threading.current_thread())
+        done.set()
+    EventFactory.register_callback(_BaseEvent, deferred, deferred=True)
+
+    EventFactory.call(_BaseEvent())
+    assert done.wait(5)
+    assert threads[0] is not threading.current_thread()
+
+def test_failing_callback_is_timed_and_does_not_stop_others():
+    called = []
+    def failing(event):
+        raise ValueError()
+    EventFactory.register_callback(_BaseEvent, failing)
+    EventFactory.register_callback(_BaseEvent, lambda event: called.append(event))
+
+    EventFactory.call(_BaseEvent())
+    assert len(called) == 1
+    assert {item["callback"]: item["calls"] for item in EventFactory.stats()}["test_failing_callback_is_timed_and_does_not_stop_others.<locals>.failing"] == 1
+
+def test_register_rejects_non_events():
+    with pytest.raises(TypeError):
+        EventFactory.register_callback(int, print)
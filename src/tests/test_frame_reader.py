@@ -0,0 +1,42 @@
+import socket
+from threading import Thread
+
+import pytest
+
+from core import binary_operations
+from network.frame_reader import FrameReader
+
+def _frame(payload: bytes) -> bytes:
+    return binary_operations._encode_varint(len(payload)) + payload
+
+def test_merged_frames_need_a_single_syscall():
+    server, client = socket.socketpair()
+    with server, client:
+        payloads = [bytes([index]) * index for index in range(1, 20)]
+        client.sendall(b"".join(_frame(payload) for payload in payloads))
+
+        reader = FrameReader(server)
+        assert [reader.read_frame() for _ in payloads] == payloads
+        assert reader.syscalls == 1
+        assert reader.stats()["syscalls_per_frame"] == pytest.approx(1 / 19)
+
+def test_split_and_oversized_frames_are_reassembled():
+    server, client = socket.socketpair()
+    with server, client:
+        large = bytes(range(256)) * 1000
+        data = _frame(b"\x01\x02") + _frame(large) + _frame(b"\x03")
+
+        reader = FrameReader(server, buffer_size=1024)
+        # the length prefix of the large frame arrives in two parts
+        client.sendall(data[:4])
+        assert reader.read_frame() == b"\x01\x02"
+        # more than the socket buffer holds, so send it while reading
+        sender = Thread(target=client.sendall, args=(data[4:],))
+        sender.start()
+        assert reader.read_frame() == large
+        sender.join()
+        assert reader.read_frame() == b"\x03"
+
+        client.close()
+        with pytest.raises(EOFError):
+            reader.read_frame()
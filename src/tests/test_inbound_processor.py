@@ -0,0 +1,79 @@
+from queue import Queue
+
+from core.inbound_processor import InboundProcessor
+
+class _Player():
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.network_in = Queue()
+
+class _Packet():
+    def __init__(self, log: list, name: str) -> None:
+        self.log = log
+        self.name = name
+
+    def process(self, player: _Player):
+        self.log.append((player.name, self.name))
+
+class _Move(_Packet):
+    pass
+
+def _processor(disconnected: list, **kwargs) -> InboundProcessor:
+    options = {
+        "packets_per_tick": 3,
+        "time_per_tick": 1,
+        "tick_budget": 1,
+        "rate_limits": {},
+        "max_queue": 100,
+        "queue_timeout": 2
+    }
+    options.update(kwargs)
+    return InboundProcessor(disconnect=lambda player, reason: disconnected.append(player.name), **options)
+
+def test_round_robin_with_budget():
+    log = []
+    flooder = _Player("flooder")
+    quiet = _Player("quiet")
+    for i in range(10):
+        flooder.network_in.put(_Packet(log, f"f{i}"))
+    quiet.network_in.put(_Packet(log, "q0"))
+    quiet.network_in.put(_Packet(log, "q1"))
+
+    processor = _processor([])
+    spent = processor.process([flooder, quiet])
+    # the players take turns, the flooder only gets its budget
+    assert [name for _, name in log] == ["q0", "f0", "q1", "f1", "f2"]
+    assert set(spent) == {flooder, quiet}
+    assert processor.stats()["queue_depth"] == 7
+    assert processor.stats()["deferred"] == 7
+
+    # the leftovers are processed on the next ticks
+    processor.process([flooder, quiet])
+    assert [name for _, name in log[5:]] == ["f3", "f4", "f5"]
+
+def test_rate_limit_drops_packets():
+    log = []
+    player = _Player("player")
+    for i in range(5):
+        player.network_in.put(_Move(log, f"m{i}"))
+    player.network_in.put(_Packet(log, "chat"))
+
+    processor = _processor([], packets_per_tick=10, rate_limits={_Move: (0.001, 2)})
+    processor.process([player])
+    assert [name for _, name in log] == ["m0", "m1", "chat"]
+    assert processor.stats()["dropped"] == {"_Move": 3}
+
+def test_disconnect_when_queue_stays_full():
+    disconnected = []
+    player = _Player("player")
+    for i in range(20):
+        player.network_in.put(_Packet([], str(i)))
+
+    processor = _processor(disconnected, packets_per_tick=1, max_queue=10)
+    processor.process([player])
+    assert disconnected == []
+    processor.process([player])
+    assert disconnected == ["player"]
+    processor.process([player])
+    assert disconnected == ["player"]
+    assert processor.stats()["disconnected"] == 1
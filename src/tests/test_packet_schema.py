@@ -0,0 +1,43 @@
+import uuid
+
+import pytest
+
+from core import binary_operations
+from dataclass.position import Position
+from dataclass.rotation import Rotation
+from network import client_packets, login_packets, packet_schema, server_packets
+from network.readable_buffer import ReadableBuffer
+
+def test_encoders_match_the_protocol():
+    player_uuid = uuid.uuid4()
+    assert login_packets.LoginSuccess("Steve", player_uuid).encode() == (binary_operations._encode_varint(0x02)
+        + binary_operations._encode_string(str(player_uuid)) + binary_operations._encode_string("Steve"))
+
+    spawn = server_packets.SpawnPlayer(7, "id", "Steve", b"\x01\x02", Position(1.5, 64, -2), Rotation(90, -45), 0, b"\x7f")
+    assert spawn.encode() == (b"\x0c\x07" + binary_operations._encode_string("id") + binary_operations._encode_string("Steve")
+        + b"\x02\x01\x02" + binary_operations._encode_int(48) + binary_operations._encode_int(2048) + binary_operations._encode_int(-64)
+        + b"\x40\xe0\x00\x00\x7f")
+
+    unload = server_packets.ChunkData(1, -1, True, 0, 0, b"xyz")
+    assert unload.encode() == (b"\x21" + binary_operations._encode_int(1) + binary_operations._encode_int(-1) + b"\x01\x00\x00\x00\x00"
+        + binary_operations._encode_int(3) + b"xyz")
+
+def test_fixed_width_runs_are_merged():
+    encode = server_packets.PlayerPositionAndLook.encode
+    assert encode.__source__.count(".pack(") == 1
+    packet = server_packets.PlayerPositionAndLook(Position(1, 2, 3), Rotation(4, 5), True)
+    assert len(encode(packet)) == 1 + 3 * 8 + 2 * 4 + 1
+
+    data = b"\x02" + binary_operations._encode_int(-5) + b"\x40" + binary_operations._encode_int(9) + b"\x01"
+    digging = client_packets.PlayerDigging(stream=ReadableBuffer(data))
+    digging.load()
+    assert (digging.status, digging.x, digging.y, digging.z, digging.face) == (2, -5, 64, 9, 1)
+    assert client_packets.PlayerDigging.load.__source__.count("unpack") == 1
+
+def test_invalid_schemas_are_rejected():
+    with pytest.raises(ValueError):
+        packet_schema.compile_encoder(0x00, [("x", "quaternion")])
+    with pytest.raises(ValueError):
+        packet_schema.compile_decoder([("position.x", "int")])
+    with pytest.raises(ValueError):
+        packet_schema.compile_encoder(0x00, [("x; import os", "int")])
@@ -0,0 +1,41 @@
+import uuid
+from types import SimpleNamespace
+
+from core import player_registry
+from core.player_registry import EntityIdAllocator, PlayerRegistry
+
+def _player(name: str) -> SimpleNamespace:
+    return SimpleNamespace(uuid=uuid.uuid4(), name=name)
+
+def test_snapshots_dont_change():
+    registry = PlayerRegistry()
+    alice = _player("alice")
+    bob = _player("bob")
+    registry.add(alice)
+    snapshot = registry.players()
+    mapping = registry.snapshot()
+
+    registry.add(bob)
+    assert snapshot == (alice,)
+    assert len(mapping) == 1
+    assert registry.players() == (alice, bob)
+    assert registry.get(str(bob.uuid)) is bob
+
+    assert registry.remove(alice)
+    assert not registry.remove(alice)
+    assert list(registry) == [bob]
+    assert str(alice.uuid) not in registry
+    assert str(alice.uuid) in mapping
+
+def test_entity_ids_are_reused_after_the_delay(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(player_registry.time, "monotonic", lambda: now[0])
+    allocator = EntityIdAllocator(60)
+
+    assert [allocator.allocate() for _ in range(3)] == [1, 2, 3]
+    allocator.release(2)
+    now[0] = 30
+    assert allocator.allocate() == 4
+    now[0] = 61
+    assert allocator.allocate() == 2
+    assert allocator.allocate() == 5
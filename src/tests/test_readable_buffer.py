@@ -0,0 +1,30 @@
+import struct
+
+import pytest
+
+from core import binary_operations
+from network import client_packets, handshake_packets
+from network.readable_buffer import ReadableBuffer
+
+def test_fields_are_decoded_in_order():
+    data = (binary_operations._encode_varint(5) + binary_operations._encode_string("localhost")
+            + binary_operations._encode_unsigned_short(25565) + binary_operations._encode_varint(2))
+    handshake = handshake_packets.Handshake(data=data, stream=ReadableBuffer(data))
+    handshake.load()
+
+    assert (handshake.protocol_version, handshake.address, handshake.port) == (5, "localhost", 25565)
+    assert handshake.is_login_next()
+    assert len(handshake.stream) == 0
+    with pytest.raises(struct.error):
+        binary_operations._decode_int(handshake.stream)
+
+def test_byte_ranges_are_views_of_the_packet():
+    payload = bytes(range(256)) * 64
+    data = binary_operations._encode_string("MC|Brand") + binary_operations._encode_short(len(payload)) + payload
+    plugin_message = client_packets.PluginMessage(stream=ReadableBuffer(data))
+    plugin_message.load()
+
+    assert plugin_message.channel == "MC|Brand"
+    assert isinstance(plugin_message.data, memoryview)
+    assert plugin_message.data.obj is data
+    assert plugin_message.data == payload
@@ -0,0 +1,58 @@
+import json
+import os
+
+from blocks.log import Log
+from blocks.tnt import TNT
+from database import region_db_manager
+from dataclass.save import ChunkColumn
+
+def _column(block_id: int) -> ChunkColumn:
+    column = ChunkColumn()
+    for y in (0, 17, 200):
+        column.set_block_id(y % 16, y, 4, block_id, y % 16)
+    column.biomes[7] = 3
+    return column
+
+def test_single_columns_roundtrip(region_path):
+    region_db_manager.save_column(-1, 33, _column(Log.block_id))
+    region_db_manager.save_column(0, 0, _column(TNT.block_id))
+    region_db_manager.close()
+
+    assert sorted(os.listdir(region_path)) == ["r.-1.1.region", "r.0.0.region"]
+    assert region_db_manager.load_column(-1, 33) == _column(Log.block_id)
+    assert region_db_manager.load_column(0, 0) == _column(TNT.block_id)
+    assert region_db_manager.load_column(0, 1) is None
+    assert region_db_manager.load_column(100, 100) is None
+    assert region_db_manager.column_exists(-1, 33)
+
+def test_rewrites_reuse_free_sectors(region_path):
+    for block_id in range(1, 5):
+        region_db_manager.save_column(5, 5, _column(block_id))
+    size = os.path.getsize(region_path / "r.0.0.region")
+
+    for block_id in range(1, 5):
+        region_db_manager.save_column(5, 5, _column(block_id))
+    assert os.path.getsize(region_path / "r.0.0.region") == size
+    assert region_db_manager.load_column(5, 5) == _column(4)
+
+def test_world_roundtrip(region_path):
+    from dataclass.save import World
+
+    world = World(0)
+    world.set_column(3, -40, _column(Log.block_id))
+    world.set_column(4, -40, _column(TNT.block_id))
+    region_db_manager.save_world(world)
+    region_db_manager.close()
+
+    loaded = region_db_manager.load_world()
+    assert loaded.get_column(3, -40) == _column(Log.block_id)
+    assert loaded.get_column(4, -40) == _column(TNT.block_id)
+
+def test_json_world_is_migrated(region_path, tmp_path):
+    with open(tmp_path / "world.json", "w") as file:
+        json.dump({"17": {"70": {"-3": {"id": Log.block_id}}}}, file)
+
+    world = region_db_manager.load_world()
+    assert world.get_block_id(17, 70, -3) == Log.block_id
+    assert os.path.isfile(tmp_path / "world.json.old")
+    assert region_db_manager.load_column(1, -1).get_block_id(1, 70, 13) == Log.block_id
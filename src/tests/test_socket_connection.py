@@ -0,0 +1,40 @@
+import socket
+
+import pytest
+
+from network import server_packets
+from network.protocol import MinecraftProtocol
+from network.socket_connection import SocketConnection
+
+def _read_all(sock: socket.socket) -> bytes:
+    data = b""
+    while chunk := sock.recv(65536):
+        data += chunk
+    return data
+
+def test_packets_are_sent_together_on_flush():
+    server, client = socket.socketpair()
+    with server, client:
+        mcprot = MinecraftProtocol(server)
+        for _ in range(50):
+            mcprot.write_packet(server_packets.ChatMesage("hello"))
+        # 1 length byte, 1 id byte, 1 string length byte and '{"text": "hello"}'
+        assert mcprot.backlog == 50 * 20
+
+        mcprot.flush()
+        mcprot.close()
+        mcprot.connection.wait_closed(5)
+        assert len(_read_all(client)) == 50 * 20
+        assert mcprot.connection.sends == 1
+        assert mcprot.backlog == 0
+
+def test_connection_is_closed_when_the_queue_is_full():
+    server, client = socket.socketpair()
+    with server, client:
+        connection = SocketConnection(server, max_bytes=1000)
+        connection.send(bytes(600))
+        with pytest.raises(ConnectionResetError):
+            connection.send(bytes(600))
+        with pytest.raises(ConnectionResetError):
+            connection.send(bytes(1))
+        assert _read_all(client) == b""
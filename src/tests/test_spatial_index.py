@@ -0,0 +1,50 @@
+from core.spatial_index import SpatialIndex
+from dataclass.position import Position
+
+class _Entity():
+    def __init__(self, x: float, z: float) -> None:
+        self.position = Position(x, 64, z)
+
+class _Player(_Entity):
+    def __init__(self, x: float, z: float, view_dist: int) -> None:
+        super().__init__(x, z)
+        self.view_dist = view_dist
+
+def test_viewers_follow_the_player():
+    index = SpatialIndex()
+    player = _Player(8, 8, 2)
+    index.add(player)
+    assert index.viewers_of_chunk(2, -2) == {player}
+    assert index.viewers_of_chunk(3, 0) == set()
+
+    # moving within the column changes nothing
+    player.position = Position(15, 64, 1)
+    assert not index.update(player)
+
+    player.position = Position(16, 64, 8)
+    assert index.update(player)
+    assert index.viewers_of_chunk(3, 0) == {player}
+    assert index.viewers_of_chunk(-2, 0) == set()
+    assert index.entities_in_chunk(1, 0) == {player}
+    assert index.entities_in_chunk(0, 0) == set()
+
+    player.view_dist = 1
+    assert index.update(player)
+    assert index.viewers_of_chunk(3, 0) == set()
+    assert index.viewers_of_chunk(2, 1) == {player}
+
+    index.remove(player)
+    assert len(index) == 0
+    assert index.viewers_of_chunk(1, 0) == set()
+
+def test_entities_in_radius():
+    index = SpatialIndex()
+    near = _Entity(-5, 3)
+    edge = _Entity(10, 0)
+    far = _Entity(8, 8)
+    for entity in (near, edge, far):
+        index.add(entity)
+
+    assert sorted(index.entities_in_radius(Position(0, 64, 0), 10), key=id) == sorted([near, edge], key=id)
+    # entities without a view distance don't view anything
+    assert index.viewers_of_chunk(0, 0) == set()
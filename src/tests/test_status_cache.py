@@ -0,0 +1,47 @@
+import json
+import os
+
+from core import binary_operations
+from core.rate_limit import KeyedRateLimiter
+from core.status_cache import StatusCache
+from network.readable_buffer import ReadableBuffer
+
+def _decode(frame: bytes) -> dict:
+    stream = ReadableBuffer(frame)
+    binary_operations._decode_varint(stream)
+    assert binary_operations._decode_varint(stream) == 0x00
+    return json.loads(binary_operations._decode_string(stream))
+
+def test_frame_is_rebuilt_only_on_changes(tmp_path):
+    icon = tmp_path / "server-icon.png"
+    icon.write_bytes(b"png")
+    online = [0]
+    cache = StatusCache(str(icon), "hello", 20, lambda: online[0], icon_check_interval=0)
+
+    frame = cache.frame()
+    assert cache.frame() is frame
+    status = _decode(frame)
+    assert status["description"]["text"] == "hello"
+    assert status["players"]["online"] == 0
+    assert status["favicon"] == "data:image/png;base64,cG5n"
+
+    online[0] = 1
+    assert _decode(cache.frame())["players"]["online"] == 1
+    cache.motd = "bye"
+    assert _decode(cache.frame())["description"]["text"] == "bye"
+    assert cache.builds == 3
+    assert cache.icon_loads == 1
+
+    icon.write_bytes(b"new")
+    os.utime(icon, (1, 1))
+    assert _decode(cache.frame())["favicon"] == "data:image/png;base64,bmV3"
+    assert cache.icon_loads == 2
+
+    icon.unlink()
+    assert _decode(cache.frame())["favicon"] == ""
+
+def test_rate_limiter_per_key():
+    limiter = KeyedRateLimiter(0.001, 3)
+    assert [limiter.allow("1.2.3.4") for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("5.6.7.8")
+    assert limiter.rejected == 1
@@ -0,0 +1,46 @@
+import pstats
+import time
+
+from core.tick_profiler import TickProfiler
+
+def _tick(profiler: TickProfiler, players: dict[str, float]) -> None:
+    profiler.start_tick()
+    profiler.add_phase("tick_timer", 0.001)
+    for name, seconds in players.items():
+        profiler.add_phase("network_in", seconds)
+        profiler.add_player(name, seconds)
+    profiler.end_tick()
+
+def test_stats():
+    profiler = TickProfiler(10)
+    for _ in range(5):
+        _tick(profiler, {"alice": 0.002})
+    for _ in range(5):
+        _tick(profiler, {"alice": 0.002, "bob": 0.004})
+
+    stats = profiler.stats()
+    assert stats["ticks"] == 10
+    assert stats["tps"] > 0
+    assert stats["mspt_p50"] <= stats["mspt_p95"] <= stats["mspt_max"]
+    assert abs(stats["phases_ms"]["tick_timer"] - 1) < 1e-9
+    assert abs(stats["phases_ms"]["network_in"] - 4) < 1e-9
+    # sorted by the average time of the ticks the player was there
+    assert list(stats["players_ms"]) == ["bob", "alice"]
+    assert abs(stats["players_ms"]["bob"] - 4) < 1e-9
+
+    profiler.forget_player("bob")
+    assert list(profiler.stats()["players_ms"]) == ["alice"]
+
+def test_capture(tmp_path):
+    profiler = TickProfiler(10)
+    future = profiler.capture(3, str(tmp_path / "ticks.prof"))
+    assert profiler.capture(1, str(tmp_path / "other.prof")).exception() is not None
+
+    for _ in range(3):
+        profiler.start_tick()
+        time.sleep(0.001)
+        profiler.end_tick()
+    assert future.result(0) == str(tmp_path / "ticks.prof")
+    assert profiler.stats()["last_capture"] == str(tmp_path / "ticks.prof")
+    assert "sleep" in profiler.last_capture_summary
+    pstats.Stats(future.result())
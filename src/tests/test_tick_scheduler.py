@@ -0,0 +1,73 @@
+import pytest
+
+from core import tick_scheduler
+from core.tick_scheduler import TickScheduler
+
+class _Clock():
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(tick_scheduler.time, "perf_counter", clock.perf_counter)
+    monkeypatch.setattr(tick_scheduler.time, "sleep", clock.sleep)
+    return clock
+
+def test_deadlines_dont_drift(clock):
+    scheduler = TickScheduler(20)
+    start = clock.now
+    for tick in range(100):
+        # ticks of varying length
+        clock.now += 0.001 * (tick % 7)
+        scheduler.wait()
+    assert clock.now == pytest.approx(start + 100 * 0.05)
+    assert scheduler.late_ticks == 0
+
+def test_catch_up(clock):
+    scheduler = TickScheduler(20, tick_scheduler.CATCH_UP, max_catch_up=5)
+    scheduler.wait()
+    start = clock.now
+
+    # a tick that took 3 ticks, the next 3 run right away
+    clock.now += 0.15
+    scheduler.wait()
+    assert clock.now == start + 0.15
+    scheduler.wait()
+    scheduler.wait()
+    assert clock.now == start + 0.15
+    scheduler.wait()
+    assert clock.now == pytest.approx(start + 0.2)
+    assert scheduler.skipped_ticks == 0
+
+    # too far behind, only 5 ticks are caught up
+    clock.now += 1
+    scheduler.wait()
+    assert scheduler.skipped_ticks == 15
+
+def test_skip(clock):
+    scheduler = TickScheduler(20, tick_scheduler.SKIP)
+    scheduler.wait()
+    start = clock.now
+
+    clock.now += 0.12
+    scheduler.wait()
+    # continues on the tick grid
+    assert clock.now == pytest.approx(start + 0.15)
+    assert scheduler.skipped_ticks == 2
+
+def test_change_tps(clock):
+    scheduler = TickScheduler(20)
+    scheduler.wait()
+    scheduler.tps = 10
+    start = clock.now
+    scheduler.wait()
+    assert clock.now == pytest.approx(start + 0.1)
+    with pytest.raises(ValueError):
+        scheduler.tps = 0
@@ -0,0 +1,49 @@
+from core.tick_timer import WHEEL_SIZE, TimingWheel
+
+def test_events_fire_on_their_tick():
+    wheel = TimingWheel()
+    fired = []
+    delays = [1, 2, WHEEL_SIZE - 1, WHEEL_SIZE, WHEEL_SIZE + 1, 3 * WHEEL_SIZE + 5, WHEEL_SIZE * WHEEL_SIZE + 7]
+    for delay in delays:
+        wheel.add_event(delay, lambda delay=delay: fired.append((delay, wheel.current_tick)))
+
+    while len(wheel):
+        wheel.tick()
+    assert fired == [(delay, delay) for delay in delays]
+
+def test_remove_event():
+    wheel = TimingWheel()
+    fired = []
+    near = wheel.add_event(5, lambda: fired.append("near"))
+    far = wheel.add_event(2 * WHEEL_SIZE, lambda: fired.append("far"))
+    wheel.add_event(6, lambda: fired.append("kept"))
+
+    assert wheel.remove_event(near)
+    assert wheel.remove_event(far)
+    assert not wheel.remove_event(near)
+    for _ in range(3 * WHEEL_SIZE):
+        wheel.tick()
+    assert fired == ["kept"]
+    assert len(wheel) == 0
+
+def test_repeating_event():
+    wheel = TimingWheel()
+    fired = []
+    event_id = wheel.add_event(2, lambda: fired.append(wheel.current_tick), interval=3)
+    for _ in range(11):
+        wheel.tick()
+    assert fired == [2, 5, 8, 11]
+
+    wheel.remove_event(event_id)
+    for _ in range(10):
+        wheel.tick()
+    assert fired == [2, 5, 8, 11]
+
+def test_events_added_by_callbacks_run_on_a_later_tick():
+    wheel = TimingWheel()
+    fired = []
+    wheel.add_event(1, lambda: wheel.add_event(1, lambda: fired.append(wheel.current_tick)))
+    wheel.tick()
+    assert fired == []
+    wheel.tick()
+    assert fired == [2]
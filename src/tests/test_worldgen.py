@@ -0,0 +1,47 @@
+import pytest
+
+from blocks.bedrock import Bedrock
+from blocks.dirt import Dirt
+from blocks.grass import Grass
+from blocks.log import Log
+from core.worldgen import WorldGenerator
+from dataclass.save import World
+
+def test_flat_preset_layers():
+    generator = WorldGenerator("flat", World(0), flat_preset="2;7,2x3:1,2;4;")
+    column = generator.generate_column(0, 0)
+
+    assert [column.get_block_id(5, y, 9) for y in range(5)] == [Bedrock.block_id, Dirt.block_id, Dirt.block_id, Grass.block_id, 0]
+    assert column.get_block_metadata(5, 2, 9) == 1
+    assert column.get_block_metadata(5, 3, 9) == 0
+    assert list(column.chunks) == [0]
+    assert column.biomes == bytearray(b"\x04" * 256)
+
+def test_default_flat_world_is_unchanged():
+    column = WorldGenerator("flat", World(0)).generate_column(3, -2)
+    assert all(column.get_block_id(x, y, 15 - x) == Log.block_id for x in range(16) for y in range(6))
+    assert column.get_block_id(0, 6, 0) == 0
+
+def test_noise_terrain_is_seeded():
+    first = WorldGenerator("default", World(0), seed=7)
+    second = WorldGenerator("default", World(0), seed=7)
+    other = WorldGenerator("default", World(0), seed=8)
+
+    assert first.generate_column(4, 5).serialize() == second.generate_column(4, 5).serialize()
+    assert first.generate_column(4, 5).serialize() != other.generate_column(4, 5).serialize()
+
+def test_noise_terrain_matches_heightmap():
+    generator = WorldGenerator("default", World(0), seed=1)
+    heights = generator._generator.heightmap(-1, 2)
+    column = generator.generate_column(-1, 2)
+
+    for z in range(16):
+        for x in range(16):
+            height = heights[(z << 4) | x]
+            assert column.get_block_id(x, 0, z) == Bedrock.block_id
+            assert column.get_block_id(x, height, z) != 0
+            assert column.get_block_id(x, max(height, generator._generator.SEA_LEVEL) + 1, z) == 0
+
+def test_unknown_level_type():
+    with pytest.raises(ValueError):
+        WorldGenerator("amplified", World(0))